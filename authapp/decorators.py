@@ -0,0 +1,50 @@
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.contrib.auth import REDIRECT_FIELD_NAME
+from django.contrib.auth.decorators import login_required as django_login_required
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import resolve_url
+
+
+async def autilisateur(request):
+    """
+    Résout l'utilisateur de la requête par l'API asynchrone et le fixe sur
+    request.user : le rendu des templates (processeurs de contexte) n'a plus
+    à le charger de façon synchrone depuis la boucle d'événements.
+    """
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+def login_required(view_func=None, login_url=None, redirect_field_name=REDIRECT_FIELD_NAME):
+    """
+    login_required de Django, avec une version native pour les vues async :
+    celle de Django y évalue le test d'authentification par sync_to_async,
+    soit un passage par le pool de threads à chaque requête.
+    """
+    def decorator(view_func):
+        if not iscoroutinefunction(view_func):
+            return django_login_required(
+                view_func, login_url=login_url, redirect_field_name=redirect_field_name
+            )
+
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            user = await autilisateur(request)
+            if user.is_authenticated:
+                return await view_func(request, *args, **kwargs)
+            return redirect_to_login(
+                request.get_full_path(), resolve_url(login_url or settings.LOGIN_URL), redirect_field_name
+            )
+
+        # Attributs lus par LoginRequiredMiddleware
+        _wrapped_view.login_url = login_url
+        _wrapped_view.redirect_field_name = redirect_field_name
+        return _wrapped_view
+
+    if view_func is not None:
+        return decorator(view_func)
+    return decorator
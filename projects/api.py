@@ -0,0 +1,34 @@
+from todolist.api import CompactViewSet
+from .models import Projet
+from .serializers import ProjetSerializer
+
+
+class ProjetViewSet(CompactViewSet):
+    """API des projets de l'utilisateur."""
+    serializer_class = ProjetSerializer
+    fields = {
+        'id': 'id',
+        'titre': 'titre',
+        'description': 'description',
+        'statut': 'statut',
+        'date_creation': 'date_creation',
+        'date_mise_a_jour': 'date_mise_a_jour',
+        'nb_taches': 'nb_taches',
+        'nb_a_faire': 'nb_a_faire',
+        'nb_en_cours': 'nb_en_cours',
+        'nb_terminees': 'nb_terminees',
+        'nb_en_retard': 'nb_en_retard',
+    }
+    default_fields = ('id', 'titre', 'statut', 'date_creation', 'date_mise_a_jour', 'nb_taches', 'nb_terminees')
+
+    def get_queryset(self):
+        return Projet.objects.filter(proprietaire=self.request.user)
+
+    def filter_queryset(self, queryset):
+        statut = self.request.query_params.get('statut')
+        if statut in dict(Projet.StatutProjet.choices):
+            queryset = queryset.filter(statut=statut)
+        return queryset
+
+    def perform_create(self, serializer):
+        return serializer.save(proprietaire=self.request.user)
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tasks.counters import recalculer_compteurs
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de tâches dénormalisés des projets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'projets',
+            nargs='*',
+            type=int,
+            help="Identifiants des projets à recalculer (tous par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        debut = time.perf_counter()
+        with transaction.atomic():
+            total = recalculer_compteurs(options['projets'] or None)
+        duree = time.perf_counter() - debut
+        self.stdout.write(self.style.SUCCESS(
+            f'Compteurs recalculés pour {total} projets en {duree:.2f} s.'
+        ))
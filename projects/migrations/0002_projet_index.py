@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projet',
+            index=models.Index(fields=['proprietaire', '-date_creation'], name='projet_proprio_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projet',
+            index=models.Index(fields=['proprietaire', 'statut'], name='projet_proprio_statut_idx'),
+        ),
+    ]
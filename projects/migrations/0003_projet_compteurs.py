@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_projet_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projet',
+            name='nb_a_faire',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='tâches à faire'),
+        ),
+        migrations.AddField(
+            model_name='projet',
+            name='nb_en_cours',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='tâches en cours'),
+        ),
+        migrations.AddField(
+            model_name='projet',
+            name='nb_en_retard',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='tâches en retard'),
+        ),
+        migrations.AddField(
+            model_name='projet',
+            name='nb_taches',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='nombre de tâches'),
+        ),
+        migrations.AddField(
+            model_name='projet',
+            name='nb_terminees',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='tâches terminées'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_projet_compteurs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projet',
+            name='sequence',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='séquence'),
+        ),
+        migrations.AddIndex(
+            model_name='projet',
+            index=models.Index(fields=['proprietaire', 'sequence', 'id'], name='projet_proprio_seq_idx'),
+        ),
+    ]
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
+from sync.models import prochaine_sequence
+
 class Projet(models.Model):
     """
     Modèle représentant un projet dans l'application.
@@ -29,10 +31,55 @@ class Projet(models.Model):
     date_creation = models.DateTimeField(_('date de création'), auto_now_add=True)
     date_mise_a_jour = models.DateTimeField(_('date de mise à jour'), auto_now=True)
 
+    # Compteurs de tâches dénormalisés, maintenus par tasks.counters
+    nb_taches = models.PositiveIntegerField(_('nombre de tâches'), default=0, editable=False)
+    nb_a_faire = models.PositiveIntegerField(_('tâches à faire'), default=0, editable=False)
+    nb_en_cours = models.PositiveIntegerField(_('tâches en cours'), default=0, editable=False)
+    nb_terminees = models.PositiveIntegerField(_('tâches terminées'), default=0, editable=False)
+    nb_en_retard = models.PositiveIntegerField(_('tâches en retard'), default=0, editable=False)
+
+    CHAMPS_COMPTEURS = ['nb_taches', 'nb_a_faire', 'nb_en_cours', 'nb_terminees', 'nb_en_retard']
+
+    # Position de la dernière écriture dans la séquence globale (flux de changements)
+    sequence = models.BigIntegerField(_('séquence'), default=0, editable=False)
+
     class Meta:
         verbose_name = _('projet')
         verbose_name_plural = _('projets')
         ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['proprietaire', '-date_creation'], name='projet_proprio_date_idx'),
+            models.Index(fields=['proprietaire', 'statut'], name='projet_proprio_statut_idx'),
+            models.Index(fields=['proprietaire', 'sequence', 'id'], name='projet_proprio_seq_idx'),
+        ]
 
     def __str__(self):
         return self.titre
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Propriétaire chargé : son changement réindexe les tâches (tasks.signals)
+        instance._proprietaire_initial = instance.__dict__.get('proprietaire_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) <= set(self.CHAMPS_COMPTEURS):
+            # Compteurs dérivés : ils ne font pas partie du flux de changements
+            return super().save(*args, **kwargs)
+
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Sauvegarde complète d'un projet existant : les compteurs, incrémentés
+            # par F() dans d'autres transactions, ne sont pas réécrits avec les
+            # valeurs lues au chargement de l'instance
+            update_fields = [
+                champ.name for champ in self._meta.concrete_fields
+                if not champ.primary_key and champ.name not in self.CHAMPS_COMPTEURS
+            ]
+
+        with transaction.atomic():
+            self.sequence = prochaine_sequence()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'sequence'}
+            super().save(*args, **kwargs)
@@ -0,0 +1,11 @@
+from rest_framework import serializers
+
+from .models import Projet
+
+
+class ProjetSerializer(serializers.ModelSerializer):
+    """Validation des écritures de projets ; le propriétaire est l'utilisateur courant."""
+
+    class Meta:
+        model = Projet
+        fields = ['titre', 'description', 'statut']
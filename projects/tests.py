@@ -1,3 +1,78 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from tasks.models import Tache
+from .models import Projet
+
+User = get_user_model()
+
+
+class ProjetAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        Projet.objects.create(titre='Mon projet', proprietaire=cls.user)
+        autre = User.objects.create_user(
+            email='bob@example.com', password='motdepasse123',
+            first_name='Bob', last_name='Durand'
+        )
+        Projet.objects.create(titre='Projet de Bob', proprietaire=autre)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_liste(self):
+        response = self.client.get(reverse('api:projet-list'), {'fields': 'titre,nb_taches'})
+        self.assertEqual(response.data['results'], [{'titre': 'Mon projet', 'nb_taches': 0}])
+        self.assertIsNone(response.data['next'])
+
+    def test_identifiant_non_numerique(self):
+        url = reverse('api:projet-list') + 'abc/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.patch(url, {'titre': 'X'}, format='json').status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+    def test_creation(self):
+        response = self.client.post(reverse('api:projet-list'), {'titre': 'Nouveau'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Projet.objects.get(pk=response.data['id']).proprietaire, self.user)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        # Cookie CSRF déjà posé, comme pour un navigateur : il fait partie de l'ETag
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+
+    def test_detail_suit_les_compteurs(self):
+        url = reverse('projects:detail', args=[self.projet.id])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Les compteurs changent sans modifier date_mise_a_jour
+        Tache.objects.create(titre='Tâche', projet=self.projet)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_liste(self):
+        url = reverse('projects:liste')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Projet.objects.create(titre='Autre', proprietaire=self.user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
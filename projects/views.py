@@ -1,13 +1,29 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from authapp.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count
+from django.db.models import Count, Max
+from todolist import cache as cache_app
+from todolist.conditional import conditional_get
 from .models import Projet
 
+async def _validateurs_liste_projets(request):
+    etat = await Projet.objects.filter(proprietaire=request.user).aaggregate(
+        total=Count('id'),
+        dernier=Max('date_mise_a_jour'),
+    )
+    return None, tuple(etat.values())
+
 @login_required
-def liste_projets(request):
+@conditional_get(_validateurs_liste_projets)
+async def liste_projets(request):
     """Affiche la liste des projets de l'utilisateur"""
-    projets = Projet.objects.filter(proprietaire=request.user).order_by('-date_creation')
+    # Liste évaluée avant le rendu (le template ne peut pas interroger la base depuis la boucle)
+    # et mise en cache dans l'espace « projets » de l'utilisateur
+    async def charger():
+        return [
+            projet async for projet in Projet.objects.filter(proprietaire=request.user).order_by('-date_creation')
+        ]
+    projets = await cache_app.alire(cache_app.PROJETS, request.user.pk, ('liste',), charger)
     return render(request, 'projects/liste.html', {'projets': projets})
 
 @login_required
@@ -34,54 +50,27 @@ def creer_projet(request):
     
     return render(request, 'projects/creer.html')
 
-import logging
-from django.db import connection
-
-logger = logging.getLogger(__name__)
+async def _validateurs_detail_projet(request, projet_id):
+    # Les compteurs sont mis à jour sans toucher date_mise_a_jour : ils font partie de l'empreinte
+    etat = await Projet.objects.filter(id=projet_id, proprietaire=request.user).values_list(
+        'date_mise_a_jour', *Projet.CHAMPS_COMPTEURS
+    ).afirst()
+    if etat is None:
+        return None
+    return etat[0], etat
 
 @login_required
-def detail_projet(request, projet_id):
+@conditional_get(_validateurs_detail_projet)
+async def detail_projet(request, projet_id):
     """Affiche les détails d'un projet"""
-    # Récupération du projet
-    projet = get_object_or_404(Projet, id=projet_id, proprietaire=request.user)
-    
-    # Récupération des tâches avec sélection des champs nécessaires
-    taches = projet.taches.all().select_related('projet')
-    
-    # Logs de débogage détaillés
-    logger.info("\n=== DÉTAIL PROJET ===")
-    logger.info(f"Projet: {projet.titre} (ID: {projet.id})")
-    logger.info(f"Nombre total de tâches: {taches.count()}")
-    
-    # Afficher les requêtes SQL exécutées
-    logger.info("Requêtes SQL exécutées:")
-    for i, query in enumerate(connection.queries, 1):
-        logger.info(f"{i}. {query['sql']} (temps: {query['time']}s)")
-    
-    # Compter les tâches par statut
-    stats = taches.values('statut').annotate(total=Count('id'))
-    logger.info("Statistiques des tâches:")
-    for stat in stats:
-        logger.info(f"- {stat['statut']}: {stat['total']} tâches")
-    
-    # Vérifier le type et les attributs des premières tâches
-    sample_tasks = list(taches[:3])  # Prendre les 3 premières tâches pour l'échantillon
-    logger.info("\nExemple de tâches (3 premières):")
-    for i, tache in enumerate(sample_tasks, 1):
-        logger.info(f"Tâche {i}:")
-        logger.info(f"  - ID: {tache.id}")
-        logger.info(f"  - Titre: {tache.titre}")
-        logger.info(f"  - Statut: {tache.statut}")
-        logger.info(f"  - Type: {type(tache)}")
-        logger.info(f"  - Attributs: {dir(tache) if hasattr(tache, '__dict__') else 'Pas de __dict__'}")
+    # Récupération du projet ; les compteurs affichés sont ceux de Projet
+    projet = await aget_object_or_404(Projet, id=projet_id, proprietaire=request.user)
     
     # Préparer le contexte
     context = {
         'projet': projet,
-        'taches': taches,  # QuerySet des tâches
     }
     
-    logger.info("=== FIN DÉTAIL PROJET ===\n")
     return render(request, 'projects/detail.html', context)
 
 @login_required
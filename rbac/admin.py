@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.utils.translation import gettext_lazy as _
 from django import forms
+from django.db.models import Count
 
 from .models import Role, UserRole
 
@@ -36,9 +37,14 @@ class RoleAdmin(admin.ModelAdmin):
     search_fields = ('name', 'description')
     filter_horizontal = ('permissions',)
     
+    def get_queryset(self, request):
+        # Nombre de permissions compté dans la requête de la liste
+        return super().get_queryset(request).annotate(nb_permissions=Count('permissions'))
+
     def get_permissions_count(self, obj):
-        return obj.permissions.count()
+        return obj.nb_permissions
     get_permissions_count.short_description = _("Nombre de permissions")
+    get_permissions_count.admin_order_field = 'nb_permissions'
 
 
 class UserRoleAdmin(admin.ModelAdmin):
@@ -46,6 +52,7 @@ class UserRoleAdmin(admin.ModelAdmin):
     list_filter = ('role', 'created_at')
     search_fields = ('user__email', 'role__name')
     readonly_fields = ('created_at',)
+    list_select_related = ('user', 'role', 'created_by')
     
     def user_email(self, obj):
         return obj.user.email
@@ -72,6 +79,9 @@ class CustomUserAdmin(admin.ModelAdmin):
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'groups')
     search_fields = ('username', 'first_name', 'last_name', 'email')
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('user_roles__role')
+
     def get_roles(self, obj):
         return ", ".join([ur.role.name for ur in obj.user_roles.all()])
     get_roles.short_description = _("Rôles")
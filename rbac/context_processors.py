@@ -3,6 +3,7 @@ from .models import user_has_permission, user_has_role
 def user_permissions(request):
     """
     Ajoute les méthodes de vérification des permissions au contexte des templates.
+    Les rôles et permissions sont résolus au premier accès, une seule fois par requête.
     """
     if not hasattr(request, 'user') or not request.user.is_authenticated:
         return {}
@@ -13,8 +14,12 @@ def user_permissions(request):
     def has_role(role_name):
         return user_has_role(request.user, role_name)
     
+    def is_admin():
+        # Évalué par le moteur de templates seulement si {{ is_admin }} est utilisé
+        return request.user.is_superuser or has_role('admin')
+    
     return {
         'has_perm': has_perm,
         'has_role': has_role,
-        'is_admin': request.user.is_superuser or has_role('admin'),
+        'is_admin': is_admin,
     }
@@ -1,85 +1,134 @@
 from functools import wraps
+from inspect import iscoroutinefunction
+
 from django.http import HttpResponseForbidden, JsonResponse
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.urls import reverse_lazy
 
-from .models import user_has_permission
+from authapp.decorators import autilisateur
+from .models import aget_user_rbac, get_user_rbac
 
 
-def require_permission(permission_codename, login_url=None, message=None, json_response=False):
+def _refuser(request, login_url, message, json_response, default_message):
+    """Réponse commune lorsque l'utilisateur authentifié n'a pas les droits requis."""
+    if json_response:
+        return JsonResponse(
+            {'error': message or default_message}, 
+            status=403
+        )
+    
+    if message:
+        messages.error(request, message)
+    return redirect(login_url or reverse_lazy('home'))
+
+
+def _require(check, login_url, message, json_response, default_message):
     """
-    Décorateur pour vérifier si un utilisateur a une permission spécifique.
+    Construit un décorateur qui exige check(rbac), où rbac contient les
+    rôles et permissions de l'utilisateur, résolus une seule fois par requête.
+    Les superutilisateurs passent toujours.
+    Les vues async sont gardées sans passage par le pool de threads.
     """
+    def _non_authentifie():
+        if json_response:
+            return JsonResponse(
+                {'error': 'Authentication required'}, 
+                status=401
+            )
+        return redirect(login_url or 'login')
+
     def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _async_wrapped_view(request, *args, **kwargs):
+                user = await autilisateur(request)
+                if not user.is_authenticated:
+                    return _non_authentifie()
+
+                if not user.is_superuser and not check(await aget_user_rbac(user)):
+                    return _refuser(request, login_url, message, json_response, default_message)
+
+                return await view_func(request, *args, **kwargs)
+            return _async_wrapped_view
+
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
             if not request.user.is_authenticated:
-                if json_response:
-                    return JsonResponse(
-                        {'error': 'Authentication required'}, 
-                        status=401
-                    )
-                return redirect(login_url or 'login')
-
-            if not user_has_permission(request.user, permission_codename):
-                if json_response:
-                    return JsonResponse(
-                        {'error': message or 'Permission denied'}, 
-                        status=403
-                    )
-                
-                if message:
-                    messages.error(request, message)
-                return redirect(login_url or reverse_lazy('home'))
+                return _non_authentifie()
+
+            if not request.user.is_superuser and not check(get_user_rbac(request.user)):
+                return _refuser(request, login_url, message, json_response, default_message)
 
             return view_func(request, *args, **kwargs)
         return _wrapped_view
     return decorator
 
 
+def require_permission(permission_codename, login_url=None, message=None, json_response=False):
+    """
+    Décorateur pour vérifier si un utilisateur a une permission spécifique.
+    """
+    return _require(
+        lambda rbac: permission_codename in rbac.permissions,
+        login_url, message, json_response, 'Permission denied'
+    )
+
+
 def require_roles(roles, login_url=None, message=None, json_response=False):
     """
     Décorateur pour vérifier si un utilisateur a un des rôles spécifiés.
     """
     if isinstance(roles, str):
         roles = [roles]
+    roles = frozenset(roles)
     
-    def decorator(view_func):
-        @wraps(view_func)
-        def _wrapped_view(request, *args, **kwargs):
-            if not request.user.is_authenticated:
-                if json_response:
-                    return JsonResponse(
-                        {'error': 'Authentication required'}, 
-                        status=401
-                    )
-                return redirect(login_url or 'login')
-
-            from .models import user_has_role
-            
-            has_role = any(user_has_role(request.user, role) for role in roles)
-            
-            if not has_role and not request.user.is_superuser:
-                if json_response:
-                    return JsonResponse(
-                        {'error': message or 'Accès non autorisé'}, 
-                        status=403
-                    )
-                
-                if message:
-                    messages.error(request, message)
-                return redirect(login_url or reverse_lazy('home'))
+    return _require(
+        lambda rbac: not roles.isdisjoint(rbac.roles),
+        login_url, message, json_response, 'Accès non autorisé'
+    )
 
-            return view_func(request, *args, **kwargs)
-        return _wrapped_view
-    return decorator
+
+def require_any_permission(permission_codenames, login_url=None, message=None, json_response=False):
+    """
+    Décorateur pour vérifier si un utilisateur a au moins une des permissions spécifiées.
+    """
+    if isinstance(permission_codenames, str):
+        permission_codenames = [permission_codenames]
+    permissions = frozenset(permission_codenames)
+    
+    return _require(
+        lambda rbac: not permissions.isdisjoint(rbac.permissions),
+        login_url, message, json_response, 'Permission denied'
+    )
+
+
+def require_all_permissions(permission_codenames, login_url=None, message=None, json_response=False):
+    """
+    Décorateur pour vérifier si un utilisateur a toutes les permissions spécifiées.
+    """
+    if isinstance(permission_codenames, str):
+        permission_codenames = [permission_codenames]
+    permissions = frozenset(permission_codenames)
+    
+    return _require(
+        lambda rbac: permissions <= rbac.permissions,
+        login_url, message, json_response, 'Permission denied'
+    )
 
 
 def require_ajax(view_func):
     """
     Décorateur pour s'assurer que la requête est une requête AJAX.
     """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapped_view(request, *args, **kwargs):
+            if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return HttpResponseForbidden('Accès non autorisé')
+            return await view_func(request, *args, **kwargs)
+        return _async_wrapped_view
+
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
         if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
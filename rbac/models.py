@@ -1,9 +1,12 @@
+from dataclasses import dataclass
+
 from django.db import models
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+
+from todolist.cache import RBAC, alire, invalider, invalider_tous, lire
 
 class Role(models.Model):
     """
@@ -79,6 +82,7 @@ def assign_role_to_user(user, role_name, created_by=None):
             role=role,
             defaults={'created_by': created_by or user}
         )
+        clear_request_rbac(user)
         return user_role, created
     except Role.DoesNotExist:
         return None, False
@@ -90,18 +94,95 @@ def remove_role_from_user(user, role_name):
     """
     try:
         role = Role.objects.get(name=role_name)
-        return UserRole.objects.filter(user=user, role=role).delete()
+        deleted = UserRole.objects.filter(user=user, role=role).delete()
+        clear_request_rbac(user)
+        return deleted
     except Role.DoesNotExist:
         return False
 
 
+# Durée de vie des rôles et permissions résolus dans le cache partagé
+RBAC_CACHE_TIMEOUT = getattr(settings, 'RBAC_CACHE_TIMEOUT', 600)
+
+
+@dataclass(frozen=True)
+class ResolvedRBAC:
+    """Rôles et permissions (codenames) d'un utilisateur, résolus en une requête."""
+    roles: frozenset
+    permissions: frozenset
+
+
+def bump_rbac_version(user_id=None):
+    """
+    Invalide les rôles et permissions en cache : ceux d'un utilisateur,
+    ou ceux de tous les utilisateurs si user_id est None.
+    """
+    if user_id is None:
+        invalider_tous([RBAC])
+    else:
+        invalider([RBAC], user_id)
+
+
+def _rbac_pairs(user):
+    return UserRole.objects.filter(user=user).values_list('role__name', 'role__permissions__codename')
+
+
+def _resolve(pairs):
+    roles, permissions = set(), set()
+    for role_name, codename in pairs:
+        roles.add(role_name)
+        if codename:
+            permissions.add(codename)
+    return ResolvedRBAC(frozenset(roles), frozenset(permissions))
+
+
+def _load_rbac(user):
+    return _resolve(_rbac_pairs(user))
+
+
+async def _aload_rbac(user):
+    return _resolve([pair async for pair in _rbac_pairs(user)])
+
+
+def get_user_rbac(user):
+    """
+    Retourne les rôles et permissions résolus d'un utilisateur.
+
+    Mémorisé sur l'objet utilisateur pour la durée de la requête, et dans
+    l'espace « rbac » du cache applicatif (todolist.cache) : au plus une
+    requête SQL, aucune à chaud.
+    """
+    resolved = getattr(user, '_rbac_resolu', None)
+    if resolved is None:
+        resolved = lire(RBAC, user.pk, ('resolu',), lambda: _load_rbac(user), RBAC_CACHE_TIMEOUT)
+        user._rbac_resolu = resolved
+    return resolved
+
+
+async def aget_user_rbac(user):
+    """
+    Équivalent asynchrone de get_user_rbac, pour les vues async : cache et
+    base sont interrogés par leurs API asynchrones, sans bloquer la boucle.
+    """
+    resolved = getattr(user, '_rbac_resolu', None)
+    if resolved is None:
+        resolved = await alire(RBAC, user.pk, ('resolu',), lambda: _aload_rbac(user), RBAC_CACHE_TIMEOUT)
+        user._rbac_resolu = resolved
+    return resolved
+
+
+def clear_request_rbac(user):
+    """Oublie les rôles et permissions mémorisés sur l'objet utilisateur."""
+    user.__dict__.pop('_rbac_resolu', None)
+
+
 def user_has_role(user, role_name):
     """
     Vérifie si un utilisateur a un rôle spécifique.
     """
     if not user.is_authenticated:
         return False
-    return UserRole.objects.filter(user=user, role__name=role_name).exists()
+    return role_name in get_user_rbac(user).roles
 
 
 def user_has_permission(user, permission_codename):
@@ -116,7 +197,4 @@ def user_has_permission(user, permission_codename):
         return True
         
     # Vérifier les permissions via les rôles
-    return Permission.objects.filter(
-        Q(roles__user_roles__user=user) & 
-        Q(codename=permission_codename)
-    ).exists()
+    return permission_codename in get_user_rbac(user).permissions
@@ -1,8 +1,10 @@
-from django.db.models.signals import post_migrate
+from django.conf import settings
+from django.db.models.signals import post_migrate, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth.models import Permission, Group
 from django.contrib.contenttypes.models import ContentType
 
+
 @receiver(post_migrate)
 def create_initial_roles_and_permissions(sender, **kwargs):
     """
@@ -89,3 +91,36 @@ def create_initial_roles_and_permissions(sender, **kwargs):
             admin_group.save()
         except Role.DoesNotExist:
             pass
+
+
+# Invalidation du cache des rôles et permissions résolus
+
+@receiver(post_save, sender='rbac.Role')
+@receiver(post_delete, sender='rbac.Role')
+def invalider_rbac_role(sender, **kwargs):
+    """Un rôle modifié peut concerner tous les utilisateurs : version globale."""
+    from .models import bump_rbac_version
+    bump_rbac_version()
+
+
+@receiver(m2m_changed, sender='rbac.Role_permissions')
+def invalider_rbac_permissions_role(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        from .models import bump_rbac_version
+        bump_rbac_version()
+
+
+@receiver(post_save, sender='rbac.UserRole')
+@receiver(post_delete, sender='rbac.UserRole')
+def invalider_rbac_utilisateur_role(sender, instance, **kwargs):
+    from .models import bump_rbac_version
+    bump_rbac_version(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalider_rbac_utilisateur(sender, instance, update_fields=None, **kwargs):
+    """Invalide si is_superuser a pu changer (les mises à jour de last_login sont ignorées)."""
+    if update_fields is not None and 'is_superuser' not in update_fields:
+        return
+    from .models import bump_rbac_version
+    bump_rbac_version(instance.pk)
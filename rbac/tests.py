@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from .decorators import require_all_permissions, require_any_permission, require_roles
+from .views import role_autocomplete
+from .models import (
+    Role, UserRole, assign_role_to_user, clear_request_rbac,
+    user_has_permission, user_has_role,
+)
+
+User = get_user_model()
+
+
+class PermissionCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.role = Role.objects.create(name='relecteur')
+        cls.permission = Permission.objects.get(codename='view_role')
+        cls.role.permissions.add(cls.permission)
+
+    def setUp(self):
+        cache.clear()
+        assign_role_to_user(self.user, 'relecteur')
+
+    def fresh_user(self):
+        """Simule une nouvelle requête : nouvel objet utilisateur."""
+        return User.objects.get(pk=self.user.pk)
+
+    def test_une_requete_par_requete_http(self):
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            self.assertTrue(user_has_permission(user, 'view_role'))
+            self.assertFalse(user_has_permission(user, 'delete_role'))
+            self.assertTrue(user_has_role(user, 'relecteur'))
+            self.assertFalse(user_has_role(user, 'admin'))
+
+    def test_aucune_requete_a_chaud(self):
+        user_has_role(self.fresh_user(), 'relecteur')
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_permission(user, 'view_role'))
+
+    def test_invalidation_permissions_du_role(self):
+        self.assertTrue(user_has_permission(self.fresh_user(), 'view_role'))
+        self.role.permissions.remove(self.permission)
+        self.assertFalse(user_has_permission(self.fresh_user(), 'view_role'))
+
+    def test_invalidation_roles_utilisateur(self):
+        self.assertTrue(user_has_role(self.fresh_user(), 'relecteur'))
+        UserRole.objects.filter(user=self.user).delete()
+        self.assertFalse(user_has_role(self.fresh_user(), 'relecteur'))
+
+    def test_memoisation_effacee_par_attribution(self):
+        user = self.fresh_user()
+        Role.objects.create(name='gestion')
+        self.assertFalse(user_has_role(user, 'gestion'))
+        assign_role_to_user(user, 'gestion')
+        self.assertTrue(user_has_role(user, 'gestion'))
+
+    def test_superutilisateur(self):
+        user = self.fresh_user()
+        user.is_superuser = True
+        user.save()
+        clear_request_rbac(user)
+        self.assertTrue(user_has_permission(user, 'delete_role'))
+
+
+class DecoratorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        role = Role.objects.create(name='relecteur')
+        role.permissions.add(Permission.objects.get(codename='view_role'))
+        UserRole.objects.create(user=cls.user, role=role)
+
+    def setUp(self):
+        cache.clear()
+
+    def call(self, decorator):
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(pk=self.user.pk)
+        view = decorator(lambda request: HttpResponse('ok'))
+        return view(request).status_code
+
+    def test_roles_en_une_requete(self):
+        with self.assertNumQueries(1 + 1):  # utilisateur + rôles/permissions
+            status = self.call(require_roles(
+                ['admin', 'gestionnaire', 'membre', 'relecteur'], json_response=True
+            ))
+        self.assertEqual(status, 200)
+        self.assertEqual(self.call(require_roles('admin', json_response=True)), 403)
+
+    def test_permissions_composees(self):
+        self.assertEqual(self.call(require_any_permission(
+            ['delete_role', 'view_role'], json_response=True
+        )), 200)
+        self.assertEqual(self.call(require_all_permissions(
+            ['delete_role', 'view_role'], json_response=True
+        )), 403)
+        self.assertEqual(self.call(require_all_permissions(
+            ['view_role'], json_response=True
+        )), 200)
+
+    def test_autocompletion_roles(self):
+        # La garde de la vue réelle utilise le codename tel que stocké
+        self.assertEqual(self.call(lambda vue: role_autocomplete), 200)
+        autre = User.objects.create_user(email='bob@example.com', password='motdepasse123')
+        request = RequestFactory().get('/')
+        request.user = autre
+        self.assertEqual(role_autocomplete(request).status_code, 403)
+
+    def test_permission_unique_en_chaine(self):
+        # Une chaîne est une permission, pas une suite de caractères
+        self.assertEqual(self.call(require_any_permission('view_role', json_response=True)), 200)
+        self.assertEqual(self.call(require_all_permissions('view_role', json_response=True)), 200)
+        self.assertEqual(self.call(require_all_permissions('delete_role', json_response=True)), 403)
+
+    async def test_vue_async(self):
+        @require_roles('relecteur', json_response=True)
+        async def vue(request):
+            return HttpResponse('ok')
+
+        @require_all_permissions(['delete_role'], json_response=True)
+        async def vue_interdite(request):
+            return HttpResponse('ok')
+
+        request = RequestFactory().get('/')
+        user = await User.objects.aget(pk=self.user.pk)
+        async def auser():
+            return user
+        request.auser = auser
+        self.assertEqual((await vue(request)).status_code, 200)
+        self.assertEqual((await vue_interdite(request)).status_code, 403)
+        # Rôles et permissions résolus une fois, mémorisés sur l'utilisateur
+        self.assertIs(request.user, user)
+        self.assertIsNotNone(user._rbac_resolu)
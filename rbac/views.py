@@ -160,7 +160,8 @@ class RolePermissionsAPIView(StaffRequiredMixin, View):
 
 
 # Vues utilitaires
-@require_permission('rbac.view_role')
+# Codename seul, tel que le résout get_user_rbac (sans préfixe d'application)
+@require_permission('view_role', json_response=True)
 def role_autocomplete(request):
     """Vue pour l'autocomplétion des rôles."""
     search = request.GET.get('q', '')
@@ -0,0 +1,42 @@
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .feed import ATTENTE_MAX, LIMITE, LIMITE_MAX, CurseurInvalide, CurseurPerime, attendre_flux
+
+
+def _entier(params, nom, defaut, maximum):
+    try:
+        return max(0, min(int(params.get(nom, defaut)), maximum))
+    except ValueError:
+        raise ValidationError({nom: 'Entier attendu.'})
+
+
+class ChangementsView(APIView):
+    """
+    Flux de changements des projets et tâches de l'utilisateur.
+
+    Paramètres : curseur (retourné par l'appel précédent, vide pour une
+    synchronisation complète), limite, attente (secondes de long-polling
+    lorsqu'aucun changement n'est disponible, au plus ATTENTE_MAX).
+    Un curseur périmé (traces de suppression purgées) reçoit 410 : le
+    client repart d'une synchronisation complète.
+    """
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            page = attendre_flux(
+                request.user,
+                curseur=params.get('curseur'),
+                limite=_entier(params, 'limite', LIMITE, LIMITE_MAX) or LIMITE,
+                attente=_entier(params, 'attente', 0, ATTENTE_MAX),
+            )
+        except CurseurPerime:
+            return Response(
+                {'curseur': 'Curseur périmé : synchronisation complète requise.'}, status=status.HTTP_410_GONE
+            )
+        except CurseurInvalide:
+            raise ValidationError({'curseur': 'Curseur invalide.'})
+        return Response(page.as_dict())
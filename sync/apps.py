@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class SyncConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'sync'
+    verbose_name = "Synchronisation des clients"
+
+    def ready(self):
+        # Importer les signaux ici pour éviter les imports circulaires
+        from . import signals  # noqa
@@ -0,0 +1,200 @@
+"""
+Flux de changements : projets et tâches écrits, et suppressions, depuis un curseur.
+
+Chaque écriture porte une valeur de la séquence globale (sync.models). Le
+flux fusionne trois sources triées par (séquence, type, id) et s'arrête
+après `limite` éléments ; le curseur retourné est la clé du dernier élément
+transmis. Un client rejoue le flux jusqu'à `encore = False`, puis
+interroge à nouveau avec son dernier curseur pour ne recevoir que les deltas.
+
+Seul l'état courant de chaque objet est transmis : un objet modifié
+plusieurs fois entre deux appels n'apparaît qu'une fois.
+
+Les traces de suppression anciennes sont purgées (purger_suppressions) :
+un curseur antérieur à l'horizon de purge est périmé, le client doit
+repartir d'une synchronisation complète.
+
+Le long-polling (attendre_flux) attend dans la vue synchrone : chaque client
+en attente occupe un worker WSGI, ou un thread du pool sync_to_async sous
+ASGI, pendant toute l'attente. SYNC_ATTENTE_MAX la borne (5 s par défaut) :
+quelques dizaines de clients en attente ne doivent pas épuiser les workers
+du site ; à ajuster selon leur nombre.
+"""
+import base64
+import binascii
+import heapq
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db.models import Q
+
+from projects.models import Projet
+from tasks.models import Tache
+from .models import Suppression, horizon_purge, sequence_actuelle
+
+# Nombre d'éléments par réponse, borné par LIMITE_MAX
+LIMITE = 500
+LIMITE_MAX = 2000
+
+# Attente maximale d'une requête en long-polling (secondes, un worker occupé
+# pendant l'attente), et intervalle de vérification
+ATTENTE_MAX = getattr(settings, 'SYNC_ATTENTE_MAX', 5)
+INTERVALLE = 0.5
+
+# Sources du flux, dans l'ordre de départage à séquence égale :
+# (nom, rang, {champ du flux: lookup ORM})
+CHAMPS_PROJET = {
+    'id': 'id',
+    'titre': 'titre',
+    'description': 'description',
+    'statut': 'statut',
+    'date_creation': 'date_creation',
+    'date_mise_a_jour': 'date_mise_a_jour',
+    'sequence': 'sequence',
+}
+CHAMPS_TACHE = {
+    'id': 'id',
+    'titre': 'titre',
+    'description': 'description',
+    'statut': 'statut',
+    'priorite': 'priorite',
+    'projet': 'projet_id',
+    'date_echeance': 'date_echeance',
+    'date_accomplissement': 'date_accomplissement',
+    'date_creation': 'date_creation',
+    'date_mise_a_jour': 'date_mise_a_jour',
+    'cree_par': 'cree_par_id',
+    'assigne_a': 'assigne_a_id',
+    'version': 'version',
+    'sequence': 'sequence',
+}
+CHAMPS_SUPPRESSION = {
+    'id': 'id',
+    'type': 'type_objet',
+    'objet_id': 'objet_id',
+    'sequence': 'sequence',
+}
+
+
+class CurseurInvalide(ValueError):
+    """Curseur de flux illisible ou altéré."""
+
+
+class CurseurPerime(CurseurInvalide):
+    """Curseur antérieur à l'horizon de purge des traces de suppression."""
+
+
+def encoder_curseur(cle):
+    payload = json.dumps(list(cle), separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decoder_curseur(curseur):
+    """Décode un curseur opaque en clé (séquence, rang, id) ; None pour le début du flux."""
+    if not curseur:
+        return None
+    try:
+        padded = curseur + '=' * (-len(curseur) % 4)
+        cle = tuple(json.loads(base64.urlsafe_b64decode(padded.encode())))
+    except (binascii.Error, TypeError, ValueError, UnicodeDecodeError):
+        raise CurseurInvalide(curseur)
+    if len(cle) != 3 or not all(isinstance(valeur, int) for valeur in cle):
+        raise CurseurInvalide(curseur)
+    return cle
+
+
+def _sources(user):
+    projets = Projet.objects.filter(proprietaire=user)
+    # Sous-requête sur les projets : l'index (projet, sequence, id) est utilisé par projet
+    taches = Tache.objects.filter(projet__in=Projet.objects.filter(proprietaire=user).values('id'))
+    suppressions = Suppression.objects.filter(proprietaire=user)
+    return (
+        ('projets', 0, projets, CHAMPS_PROJET),
+        ('taches', 1, taches, CHAMPS_TACHE),
+        ('suppressions', 2, suppressions, CHAMPS_SUPPRESSION),
+    )
+
+
+def _apres(rang, cle):
+    """Filtre des lignes d'une source de rang donné situées après la clé du curseur."""
+    sequence, rang_curseur, pk = cle
+    if rang > rang_curseur:
+        return Q(sequence__gte=sequence)
+    if rang < rang_curseur:
+        return Q(sequence__gt=sequence)
+    return Q(sequence__gt=sequence) | Q(sequence=sequence, pk__gt=pk)
+
+
+@dataclass
+class PageFlux:
+    projets: list = field(default_factory=list)
+    taches: list = field(default_factory=list)
+    suppressions: list = field(default_factory=list)
+    curseur: str = ''
+    encore: bool = False
+
+    @property
+    def vide(self):
+        return not (self.projets or self.taches or self.suppressions)
+
+    def as_dict(self):
+        return {
+            'projets': self.projets,
+            'taches': self.taches,
+            'suppressions': self.suppressions,
+            'curseur': self.curseur,
+            'encore': self.encore,
+        }
+
+
+def lire_flux(user, curseur=None, limite=LIMITE):
+    """
+    Retourne la PageFlux des changements postérieurs au curseur : au plus
+    `limite` éléments, et limite + 1 lignes lues par source.
+    """
+    cle = decoder_curseur(curseur)
+    if cle is not None and cle[0] < horizon_purge():
+        raise CurseurPerime(curseur)
+    flux = []
+    for nom, rang, queryset, champs in _sources(user):
+        if cle is not None:
+            queryset = queryset.filter(_apres(rang, cle))
+        lignes = queryset.order_by('sequence', 'id').values(*champs.values())[:limite + 1]
+        flux.append([
+            (
+                (ligne['sequence'], rang, ligne['id']),
+                nom,
+                {nom_champ: ligne[lookup] for nom_champ, lookup in champs.items()},
+            )
+            for ligne in lignes
+        ])
+
+    page = PageFlux(curseur=curseur or '')
+    fusion = heapq.merge(*flux, key=lambda element: element[0])
+    for nombre, (cle_element, nom, donnees) in enumerate(fusion):
+        if nombre == limite:
+            page.encore = True
+            break
+        getattr(page, nom).append(donnees)
+        page.curseur = encoder_curseur(cle_element)
+    return page
+
+
+def attendre_flux(user, curseur=None, limite=LIMITE, attente=0):
+    """
+    Long-polling : si aucun changement n'est disponible, attend jusqu'à
+    `attente` secondes qu'une écriture fasse avancer la séquence globale
+    (une lecture d'une ligne par intervalle), puis relit le flux.
+    """
+    fin = time.monotonic() + min(attente, ATTENTE_MAX)
+    while True:
+        observee = sequence_actuelle()
+        page = lire_flux(user, curseur, limite)
+        if not page.vide or time.monotonic() >= fin:
+            return page
+        while sequence_actuelle() == observee:
+            if time.monotonic() >= fin:
+                return page
+            time.sleep(INTERVALLE)
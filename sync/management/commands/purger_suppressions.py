@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sync.models import purger_suppressions
+
+RETENTION_JOURS = getattr(settings, 'SYNC_RETENTION_SUPPRESSIONS_JOURS', 90)
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les traces de suppression plus anciennes que la rétention (à planifier). "
+        "Les clients dont le curseur est antérieur devront refaire une synchronisation complète."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jours', type=int, default=RETENTION_JOURS,
+                            help=f'Rétention en jours ({RETENTION_JOURS} par défaut).')
+
+    def handle(self, *args, **options):
+        if options['jours'] < 1:
+            raise CommandError('--jours doit être positif.')
+        nombre = purger_suppressions(timezone.now() - timedelta(days=options['jours']))
+        self.stdout.write(self.style.SUCCESS(f'{nombre} traces de suppression purgées.'))
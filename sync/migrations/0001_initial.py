@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def creer_sequence(apps, schema_editor):
+    apps.get_model('sync', 'Sequence').objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valeur', models.BigIntegerField(default=0, verbose_name='valeur')),
+            ],
+            options={
+                'verbose_name': 'séquence',
+            },
+        ),
+        migrations.CreateModel(
+            name='Suppression',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_objet', models.CharField(choices=[('projet', 'Projet'), ('tache', 'Tâche')], max_length=10, verbose_name="type d'objet")),
+                ('objet_id', models.BigIntegerField(verbose_name="identifiant de l'objet")),
+                ('sequence', models.BigIntegerField(verbose_name='séquence')),
+                ('date_suppression', models.DateTimeField(default=django.utils.timezone.now, verbose_name='date de suppression')),
+                ('proprietaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suppressions', to=settings.AUTH_USER_MODEL, verbose_name='propriétaire')),
+            ],
+            options={
+                'verbose_name': 'suppression',
+                'verbose_name_plural': 'suppressions',
+                'indexes': [models.Index(fields=['proprietaire', 'sequence', 'id'], name='suppression_proprio_seq_idx')],
+            },
+        ),
+        migrations.RunPython(creer_sequence, migrations.RunPython.noop),
+    ]
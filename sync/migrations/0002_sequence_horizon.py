@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sequence',
+            name='horizon',
+            field=models.BigIntegerField(default=0, verbose_name='horizon de purge'),
+        ),
+    ]
@@ -0,0 +1,133 @@
+"""
+Séquence globale des écritures et traces des suppressions (tombstones),
+sur lesquelles repose le flux de changements des clients (sync.feed).
+"""
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Sequence(models.Model):
+    """
+    Compteur global à une seule ligne. Chaque écriture de projet ou de tâche
+    en réserve la valeur suivante dans sa propre transaction : la ligne reste
+    verrouillée jusqu'au commit, donc l'ordre des séquences suit l'ordre des
+    commits et un client ne peut pas « sauter » une écriture encore en cours.
+
+    Contrepartie : toutes les écritures de projets et de tâches de
+    l'application sont sérialisées sur cette ligne, de la réservation au
+    commit. Les transactions d'écriture doivent rester courtes ; les
+    écritures en masse réservent un bloc de valeurs en une fois.
+
+    `horizon` est la dernière séquence des traces de suppression purgées
+    (purger_suppressions) : un curseur antérieur ne peut plus être rejoué.
+    """
+    valeur = models.BigIntegerField(_('valeur'), default=0)
+    horizon = models.BigIntegerField(_('horizon de purge'), default=0)
+
+    class Meta:
+        verbose_name = _('séquence')
+
+
+# Identifiant de l'unique ligne de Sequence (créée par la migration initiale)
+SEQUENCE_ID = 1
+
+
+def prochaine_sequence(nombre=1):
+    """
+    Réserve `nombre` valeurs consécutives de la séquence et retourne la
+    dernière. À appeler dans la transaction de l'écriture concernée.
+    """
+    table = Sequence._meta.db_table
+    if connection.vendor in ('sqlite', 'postgresql'):
+        # Incrément et lecture en une instruction
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET valeur = valeur + %s WHERE id = %s RETURNING valeur',
+                [nombre, SEQUENCE_ID]
+            )
+            ligne = cursor.fetchone()
+        if ligne is not None:
+            return ligne[0]
+    elif Sequence.objects.filter(pk=SEQUENCE_ID).update(valeur=F('valeur') + nombre):
+        return Sequence.objects.values_list('valeur', flat=True).get(pk=SEQUENCE_ID)
+
+    Sequence.objects.get_or_create(pk=SEQUENCE_ID)
+    return prochaine_sequence(nombre)
+
+
+def sequence_actuelle():
+    """Dernière valeur attribuée (0 si aucune écriture)."""
+    return Sequence.objects.filter(pk=SEQUENCE_ID).values_list('valeur', flat=True).first() or 0
+
+
+def horizon_purge():
+    """Dernière séquence des traces purgées (0 si aucune purge)."""
+    return Sequence.objects.filter(pk=SEQUENCE_ID).values_list('horizon', flat=True).first() or 0
+
+
+class Suppression(models.Model):
+    """Trace d'un projet ou d'une tâche supprimé, transmise aux clients par le flux."""
+
+    class TypeObjet(models.TextChoices):
+        PROJET = 'projet', _('Projet')
+        TACHE = 'tache', _('Tâche')
+
+    type_objet = models.CharField(_("type d'objet"), max_length=10, choices=TypeObjet.choices)
+    objet_id = models.BigIntegerField(_("identifiant de l'objet"))
+    proprietaire = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='suppressions',
+        verbose_name=_('propriétaire')
+    )
+    sequence = models.BigIntegerField(_('séquence'))
+    date_suppression = models.DateTimeField(_('date de suppression'), default=timezone.now)
+
+    class Meta:
+        verbose_name = _('suppression')
+        verbose_name_plural = _('suppressions')
+        indexes = [
+            models.Index(fields=['proprietaire', 'sequence', 'id'], name='suppression_proprio_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.type_objet} {self.objet_id}'
+
+
+def enregistrer_suppressions(type_objet, queryset, proprietaire_id):
+    """
+    Trace la suppression des objets d'un QuerySet en une instruction
+    INSERT ... SELECT, avant leur suppression. Retourne la séquence attribuée.
+    """
+    sequence = prochaine_sequence()
+    sql, params = queryset.order_by().values('id').query.sql_with_params()
+    table = Suppression._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (type_objet, objet_id, proprietaire_id, sequence, date_suppression) '
+            f'SELECT %s, id, %s, %s, %s FROM ({sql}) selection',
+            [type_objet, proprietaire_id, sequence,
+             connection.ops.adapt_datetimefield_value(timezone.now()), *params]
+        )
+    return sequence
+
+
+def purger_suppressions(avant):
+    """
+    Supprime les traces de suppression antérieures à la date `avant` et
+    avance l'horizon de purge : les clients dont le curseur le précède
+    devront refaire une synchronisation complète. Retourne le nombre de
+    traces supprimées.
+    """
+    with transaction.atomic():
+        anciennes = Suppression.objects.filter(date_suppression__lt=avant)
+        derniere = anciennes.aggregate(derniere=Max('sequence'))['derniere']
+        if derniere is None:
+            return 0
+        # Toutes les traces jusqu'à l'horizon : un curseur postérieur n'en a manqué aucune
+        nombre, _ = Suppression.objects.filter(sequence__lte=derniere).delete()
+        Sequence.objects.filter(pk=SEQUENCE_ID, horizon__lt=derniere).update(horizon=derniere)
+    return nombre
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from projects.models import Projet
+from tasks.models import Tache
+from .models import Suppression, prochaine_sequence
+
+
+def _depuis(origin, modele):
+    """Vrai si la suppression vient d'une instance ou d'un queryset de ce modèle."""
+    return isinstance(origin, modele) or getattr(origin, 'model', None) is modele
+
+
+@receiver(post_delete, sender=Projet)
+def tracer_suppression_projet(sender, instance, origin=None, **kwargs):
+    """La trace du projet vaut pour ses tâches, supprimées en cascade."""
+    if _depuis(origin, get_user_model()):
+        # Propriétaire supprimé : ses traces disparaissent avec lui
+        return
+    Suppression.objects.create(
+        type_objet=Suppression.TypeObjet.PROJET,
+        objet_id=instance.pk,
+        proprietaire_id=instance.proprietaire_id,
+        sequence=prochaine_sequence(),
+    )
+
+
+@receiver(post_delete, sender=Tache)
+def tracer_suppression_tache(sender, instance, origin=None, **kwargs):
+    if _depuis(origin, Projet) or _depuis(origin, get_user_model()):
+        return
+    if Tache._meta.get_field('projet').is_cached(instance):
+        proprietaire_id = instance.projet.proprietaire_id
+    else:
+        proprietaire_id = Projet.objects.filter(pk=instance.projet_id).values_list(
+            'proprietaire_id', flat=True
+        ).first()
+    if proprietaire_id is None:
+        return
+    Suppression.objects.create(
+        type_objet=Suppression.TypeObjet.TACHE,
+        objet_id=instance.pk,
+        proprietaire_id=proprietaire_id,
+        sequence=prochaine_sequence(),
+    )
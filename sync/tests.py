@@ -0,0 +1,169 @@
+import io
+from unittest import mock
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from projects.models import Projet
+from tasks.importation import importer_taches
+from tasks.models import Tache
+from tasks.operations import supprimer
+from .feed import ATTENTE_MAX, CurseurPerime, attendre_flux, lire_flux
+from .models import Suppression, horizon_purge
+
+User = get_user_model()
+
+
+class FluxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        cls.taches = [
+            Tache.objects.create(titre=f'Tâche {i}', projet=cls.projet, cree_par=cls.user)
+            for i in range(5)
+        ]
+        autre = User.objects.create_user(email='bob@example.com', password='motdepasse123')
+        projet_bob = Projet.objects.create(titre='Projet de Bob', proprietaire=autre)
+        Tache.objects.create(titre='Privée', projet=projet_bob, cree_par=autre)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('api:changements')
+
+    def _synchroniser(self, curseur='', limite=2):
+        """Rejoue le flux jusqu'à encore = False ; retourne (pages, dernier curseur)."""
+        pages = []
+        while True:
+            page = lire_flux(self.user, curseur, limite)
+            pages.append(page)
+            curseur = page.curseur
+            if not page.encore:
+                return pages, curseur
+
+    def test_synchronisation_complete_par_pages(self):
+        pages, curseur = self._synchroniser()
+        self.assertEqual(len(pages), 3)
+        self.assertEqual([len(page.projets) + len(page.taches) for page in pages], [2, 2, 2])
+        self.assertEqual(
+            [tache['id'] for page in pages for tache in page.taches],
+            [tache.id for tache in self.taches]
+        )
+        # Rien de nouveau : même curseur, page vide
+        page = lire_flux(self.user, curseur)
+        self.assertTrue(page.vide)
+        self.assertEqual(page.curseur, curseur)
+
+    def test_delta_apres_modification(self):
+        _, curseur = self._synchroniser()
+        tache = self.taches[1]
+        response = self.client.patch(
+            reverse('api:tache-detail', args=[tache.id]), {'titre': 'Renommée'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        tache.refresh_from_db()
+        tache.save()
+
+        page = lire_flux(self.user, curseur)
+        # Deux écritures, mais seul l'état courant est transmis
+        self.assertEqual([t['titre'] for t in page.taches], ['Renommée'])
+        self.assertEqual(page.taches[0]['version'], 3)
+        self.assertEqual(page.projets, [])
+
+    def test_traces_de_suppression(self):
+        _, curseur = self._synchroniser()
+        self.client.force_login(self.user)
+        self.client.post(reverse('tasks:supprimer', args=[self.taches[0].id]))
+        supprimer(self.user, Tache.objects.filter(pk__in=[t.id for t in self.taches[1:3]]))
+
+        page = lire_flux(self.user, curseur)
+        self.assertEqual(
+            [(s['type'], s['objet_id']) for s in page.suppressions],
+            [('tache', tache.id) for tache in self.taches[:3]]
+        )
+
+        projet_id = self.projet.id
+        self.projet.delete()
+        page = lire_flux(self.user, page.curseur)
+        # La trace du projet couvre ses tâches supprimées en cascade
+        self.assertEqual(
+            [(s['type'], s['objet_id']) for s in page.suppressions], [('projet', projet_id)]
+        )
+        self.assertEqual(Suppression.objects.filter(proprietaire=self.user).count(), 4)
+
+    def test_suppression_du_proprietaire(self):
+        # Projets et tâches supprimés en cascade avec leur propriétaire : aucune trace
+        self.taches[0].delete()
+        self.user.delete()
+        self.assertFalse(Projet.objects.filter(pk=self.projet.pk).exists())
+        self.assertFalse(Suppression.objects.filter(proprietaire_id=self.user.pk).exists())
+        User.objects.filter(email='bob@example.com').delete()
+        self.assertFalse(Tache.objects.exists())
+
+    def test_purge_des_traces(self):
+        _, ancien = self._synchroniser()
+        self.taches[0].delete()
+        Suppression.objects.update(date_suppression=timezone.now() - timedelta(days=100))
+        _, recent = self._synchroniser(ancien)
+        tache_id = self.taches[1].id
+        self.taches[1].delete()
+
+        call_command('purger_suppressions', '--jours=90', stdout=io.StringIO())
+        self.assertEqual(
+            list(Suppression.objects.values_list('objet_id', flat=True)), [tache_id]
+        )
+        self.assertGreater(horizon_purge(), 0)
+        # Le curseur postérieur à la purge reste valable, l'ancien est périmé
+        self.assertEqual([s['objet_id'] for s in lire_flux(self.user, recent).suppressions], [tache_id])
+        with self.assertRaises(CurseurPerime):
+            lire_flux(self.user, ancien)
+        self.assertEqual(self.client.get(self.url, {'curseur': ancien}).status_code, 410)
+
+    def test_taches_importees(self):
+        _, curseur = self._synchroniser()
+        fichier = io.BytesIO(('titre,projet_id\nA,%d\nB,%d\n' % (self.projet.id, self.projet.id)).encode())
+        importer_taches(self.user, fichier)
+        page = lire_flux(self.user, curseur)
+        self.assertEqual([tache['titre'] for tache in page.taches], ['A', 'B'])
+        self.assertEqual(len({tache['sequence'] for tache in page.taches}), 2)
+
+    def test_api(self):
+        response = self.client.get(self.url, {'limite': 4})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['projets']) + len(response.data['taches']), 4)
+        self.assertTrue(response.data['encore'])
+        response = self.client.get(self.url, {'curseur': response.data['curseur']})
+        self.assertEqual(len(response.data['taches']), 2)
+        self.assertFalse(response.data['encore'])
+        self.assertEqual(self.client.get(self.url, {'curseur': 'invalide'}).status_code, 400)
+
+    def test_attente_bornee(self):
+        with mock.patch('sync.api.attendre_flux', wraps=attendre_flux) as attendre:
+            # Synchronisation complète : des changements sont disponibles, aucune attente
+            self.client.get(self.url, {'attente': 0})
+            self.client.get(self.url, {'attente': 600})
+        self.assertEqual([appel.kwargs['attente'] for appel in attendre.call_args_list], [0, ATTENTE_MAX])
+        self.assertLessEqual(ATTENTE_MAX, 5)
+
+    @mock.patch('sync.feed.INTERVALLE', 0.01)
+    def test_long_polling(self):
+        _, curseur = self._synchroniser()
+        page = attendre_flux(self.user, curseur, attente=0.05)
+        self.assertTrue(page.vide)
+        self.assertEqual(page.curseur, curseur)
+
+        # Écriture survenue pendant l'attente : la page est relue aussitôt
+        ecrire = lambda *args: Tache.objects.create(titre='Nouvelle', projet=self.projet, cree_par=self.user)
+        with mock.patch('sync.feed.time.sleep', side_effect=ecrire):
+            page = attendre_flux(self.user, curseur, attente=5)
+        self.assertEqual([tache['titre'] for tache in page.taches], ['Nouvelle'])
@@ -7,7 +7,8 @@ class TacheAdmin(admin.ModelAdmin):
     list_display = ('titre', 'projet', 'afficher_proprietaire', 'afficher_assigne_a', 'statut', 'date_echeance', 'est_terminee')
     list_filter = ('statut', 'date_echeance', 'projet')
     search_fields = ('titre', 'description', 'projet__titre', 'cree_par__email', 'assigne_a__email')
-    list_select_related = ('projet', 'cree_par', 'assigne_a')
+    # Le propriétaire du projet est affiché sur chaque ligne
+    list_select_related = ('projet__proprietaire', 'cree_par', 'assigne_a')
     date_hierarchy = 'date_creation'
     list_editable = ('statut',)
     
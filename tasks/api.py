@@ -0,0 +1,127 @@
+from django.http import Http404
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+
+from todolist.api import CompactViewSet
+from .ecritures import ConflitVersion, lire_version, modifier_tache
+from .importation import IMPORT_API_TAILLE_MAX, ImportationError, format_depuis_nom, importer_taches
+from .models import Tache
+from .operations import OperationError, executer
+from .serializers import OperationGroupeeSerializer, TacheSerializer
+
+
+class TacheViewSet(CompactViewSet):
+    """API des tâches des projets de l'utilisateur."""
+    serializer_class = TacheSerializer
+    fields = {
+        'id': 'id',
+        'titre': 'titre',
+        'description': 'description',
+        'statut': 'statut',
+        'priorite': 'priorite',
+        'projet': 'projet_id',
+        'projet_titre': 'projet__titre',
+        'date_echeance': 'date_echeance',
+        'date_accomplissement': 'date_accomplissement',
+        'date_creation': 'date_creation',
+        'date_mise_a_jour': 'date_mise_a_jour',
+        'cree_par': 'cree_par_id',
+        'assigne_a': 'assigne_a_id',
+        'assigne_a_email': 'assigne_a__email',
+        'version': 'version',
+    }
+    default_fields = (
+        'id', 'titre', 'statut', 'priorite', 'projet', 'date_echeance',
+        'date_creation', 'date_mise_a_jour', 'assigne_a', 'version',
+    )
+
+    def get_queryset(self):
+        return Tache.objects.filter(projet__proprietaire=self.request.user)
+
+    def get_write_queryset(self):
+        # Le projet sert aux compteurs et à l'invalidation du tableau de bord
+        return self.get_queryset().select_related('projet')
+
+    def filter_queryset(self, queryset):
+        params = self.request.query_params
+        if params.get('statut') in dict(Tache.StatutTache.choices):
+            queryset = queryset.filter(statut=params['statut'])
+        if params.get('priorite') in dict(Tache.PrioriteTache.choices):
+            queryset = queryset.filter(priorite=params['priorite'])
+        if params.get('projet', '').isdigit():
+            queryset = queryset.filter(projet_id=params['projet'])
+        return queryset
+
+    def perform_create(self, serializer):
+        return serializer.save(cree_par=self.request.user)
+
+    def partial_update(self, request, pk=None):
+        """
+        Modification en un UPDATE conditionnel, sans chargement de l'instance.
+        La version connue du client (champ version ou en-tête If-Match) est
+        vérifiée : 409 si la tâche a changé depuis. Sans champ à modifier,
+        rien n'est écrit : la ligne actuelle est renvoyée.
+        """
+        serializer = self.serializer_class(data=request.data, partial=True, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        if not serializer.validated_data:
+            return Response(self._get_row(pk, self.get_requested_fields()))
+        version = request.data.get('version', request.headers.get('If-Match', '').strip('"'))
+        try:
+            modifier_tache(request.user, pk, serializer.validated_data, version=lire_version(version))
+        except Tache.DoesNotExist:
+            raise Http404
+        except ConflitVersion as conflit:
+            return Response(
+                {'detail': str(conflit), 'version': conflit.version_actuelle},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(self._get_row(pk, self.get_requested_fields()))
+
+    @action(detail=False, methods=['post'], url_path='import', url_name='import',
+            parser_classes=[MultiPartParser])
+    def importer(self, request):
+        """
+        Import en masse (multipart : fichier, format csv|ndjson, dry_run).
+        Retourne le rapport d'import : lignes importées et erreurs par ligne.
+        """
+        fichier = request.FILES.get('fichier')
+        if fichier is None:
+            raise ValidationError({'fichier': 'Fichier obligatoire.'})
+        if fichier.size > IMPORT_API_TAILLE_MAX:
+            raise ValidationError({'fichier': (
+                f'Fichier trop volumineux (maximum {IMPORT_API_TAILLE_MAX} octets) : '
+                'utiliser la commande importer_taches.'
+            )})
+        try:
+            # Analyse dans le processus de la requête : pas de pool de processus
+            rapport = importer_taches(
+                request.user,
+                fichier.file,
+                workers=1,
+                format=request.data.get('format') or format_depuis_nom(fichier.name),
+                dry_run=request.data.get('dry_run') in ('1', 'true'),
+            )
+        except ImportationError as e:
+            raise ValidationError({'fichier': str(e)})
+        return Response(
+            rapport.as_dict(),
+            status=status.HTTP_201_CREATED if rapport.importees else status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk', url_name='bulk')
+    def operation_groupee(self, request):
+        """
+        Opération groupée sur une sélection de tâches (ids ou filtre), en une
+        seule requête UPDATE ou DELETE. Retourne le nombre de tâches traitées.
+        """
+        serializer = OperationGroupeeSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        try:
+            traitees = executer(request.user, **serializer.validated_data)
+        except OperationError as e:
+            raise ValidationError({'detail': str(e)})
+        return Response({'operation': serializer.validated_data['operation'], 'traitees': traitees})
@@ -0,0 +1,255 @@
+"""
+Banc d'essai des vues principales : latences (p50/p95/p99), débit et
+requêtes SQL par requête HTTP, comparés à une référence enregistrée.
+
+Les scénarios sont dérivés des données d'un utilisateur (premier projet,
+première tâche) ; un jeu de données identique d'une exécution à l'autre
+rend les mesures comparables. Les requêtes sont envoyées par le client de
+test de Django (dans le processus, middlewares compris) ou à un serveur
+local (`serveur`), par `concurrence` threads.
+
+La référence est un fichier JSON {scénario: résultats}. Une exécution
+régresse si un scénario exécute plus de requêtes SQL que la référence, ou
+si sa latence p95 ou son débit s'en écartent de plus de `tolerance`
+(proportion ; None : seules les requêtes SQL sont comparées).
+"""
+import json
+import math
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import Client, RequestFactory
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from projects.models import Projet
+from rbac.views import role_autocomplete
+from .models import Tache
+
+# Référence versionnée avec le code
+REFERENCE = Path(__file__).with_name('banc_essai_reference.json')
+
+# En-têtes des actions rapides (HTMX)
+HTMX = {'HX-Request': 'true'}
+
+_TRANSACTION = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class BancEssaiError(ValueError):
+    """Banc d'essai impossible : données manquantes, scénario inconnu, référence illisible."""
+
+
+@dataclass
+class Scenario:
+    nom: str
+    methode: str
+    url: str
+    donnees: Optional[dict] = None
+    en_tetes: dict = field(default_factory=dict)
+    statuts: tuple = (200,)
+    # Appel direct de la vue (RequestFactory, sans middlewares), pour les vues non routées
+    vue: Optional[Callable] = None
+
+
+def scenarios(user):
+    """Scénarios pour l'utilisateur, qui doit avoir au moins un projet et une tâche."""
+    projet = Projet.objects.filter(proprietaire=user).order_by('pk').first()
+    tache = Tache.objects.filter(projet__proprietaire=user).order_by('pk').first()
+    if projet is None or tache is None:
+        raise BancEssaiError(f"{user.email} n'a aucun projet ou aucune tâche.")
+    return [
+        Scenario('liste_taches', 'GET', reverse('tasks:liste')),
+        Scenario('detail_projet', 'GET', reverse('projects:detail', args=[projet.pk])),
+        Scenario('tableau_de_bord', 'GET', reverse('tableau_de_bord')),
+        # Écritures en bascule : l'état des données reste stable d'une exécution à l'autre
+        Scenario(
+            'changer_statut_tache', 'POST',
+            reverse('tasks:changer_statut', args=[tache.pk, 'toggle']), en_tetes=HTMX,
+        ),
+        Scenario('marquer_terminee', 'POST', reverse('tasks:marquer_terminee', args=[tache.pk]), en_tetes=HTMX),
+        # 403 si l'utilisateur n'a pas la permission view_role : compté en erreur
+        # Vue non routée, appelée directement avec sa garde RBAC
+        Scenario('rbac_autocompletion_roles', 'GET', '/rbac/roles/autocompletion/?q=a', vue=role_autocomplete),
+    ]
+
+
+def _percentile(valeurs, rang):
+    """Percentile par rang le plus proche, sur des valeurs triées."""
+    return valeurs[max(math.ceil(rang / 100 * len(valeurs)) - 1, 0)]
+
+
+def resumer(latences, requetes_sql, erreurs, duree):
+    latences = sorted(latences)
+    resultat = {
+        'requetes_http': len(latences),
+        'erreurs': erreurs,
+        'p50_ms': round(_percentile(latences, 50) * 1000, 2),
+        'p95_ms': round(_percentile(latences, 95) * 1000, 2),
+        'p99_ms': round(_percentile(latences, 99) * 1000, 2),
+        'debit': round(len(latences) / duree, 1) if duree else None,
+    }
+    if requetes_sql:
+        resultat['requetes_sql_moy'] = round(statistics.fmean(requetes_sql), 2)
+        resultat['requetes_sql_max'] = max(requetes_sql)
+    return resultat
+
+
+class _ClientLocal:
+    """Client de test de Django (un par thread), avec la session de l'utilisateur."""
+
+    def __init__(self, session, user):
+        self.client = Client()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = session
+        self.user = user
+
+    def appeler(self, scenario):
+        """Retourne (statut, requêtes SQL exécutées dans ce thread)."""
+        compte = [0]
+
+        def compter(execute, sql, params, many, context):
+            # Hors contrôle de transaction : BEGIN en autocommit, SAVEPOINT dans une transaction
+            if not sql.lstrip().upper().startswith(_TRANSACTION):
+                compte[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(compter):
+            if scenario.vue is not None:
+                request = getattr(RequestFactory(), scenario.methode.lower())(scenario.url, scenario.donnees)
+                # Rechargé comme par AuthenticationMiddleware : rien de mémorisé d'un appel à l'autre
+                request.user = get_user_model().objects.get(pk=self.user.pk)
+                statut = scenario.vue(request).status_code
+            else:
+                methode = getattr(self.client, scenario.methode.lower())
+                statut = methode(scenario.url, scenario.donnees, headers=scenario.en_tetes).status_code
+        return statut, compte[0]
+
+
+class _ClientServeur:
+    """Requêtes HTTP vers un serveur local ; requêtes SQL lues dans Server-Timing s'il est exposé."""
+
+    def __init__(self, serveur, session):
+        self.serveur = serveur.rstrip('/')
+        # Jeton CSRF choisi ici : le cookie et l'en-tête concordent
+        self.csrf = get_random_string(32)
+        self.cookie = f'{settings.SESSION_COOKIE_NAME}={session}; {settings.CSRF_COOKIE_NAME}={self.csrf}'
+
+    def appeler(self, scenario):
+        if scenario.vue is not None:
+            raise BancEssaiError(f'{scenario.nom} : appel direct de la vue, impossible sur un serveur.')
+        donnees = urllib.parse.urlencode(scenario.donnees or {}).encode() if scenario.methode == 'POST' else None
+        requete = urllib.request.Request(
+            self.serveur + scenario.url, data=donnees, method=scenario.methode,
+            headers={**scenario.en_tetes, 'Cookie': self.cookie, 'X-CSRFToken': self.csrf},
+        )
+        try:
+            with urllib.request.urlopen(requete) as reponse:
+                reponse.read()
+                return reponse.status, _requetes_server_timing(reponse.headers.get('Server-Timing'))
+        except urllib.error.HTTPError as e:
+            return e.code, _requetes_server_timing(e.headers.get('Server-Timing'))
+
+
+def _requetes_server_timing(valeur):
+    # Format de todolist.mesures : sql;dur=1.2;desc="5 requetes", ...
+    for metrique in (valeur or '').split(','):
+        nom, _, reste = metrique.strip().partition(';')
+        if nom == 'sql' and 'desc="' in reste:
+            return int(reste.split('desc="', 1)[1].split()[0])
+    return None
+
+
+def executer(user, noms=None, iterations=50, concurrence=1, serveur=None):
+    """
+    Exécute les scénarios (tous, ou ceux nommés) : une requête de
+    préchauffage, puis `iterations` requêtes réparties entre `concurrence`
+    threads. Retourne {scénario: résultats}.
+    """
+    disponibles = {scenario.nom: scenario for scenario in scenarios(user)}
+    inconnus = set(noms or ()) - set(disponibles)
+    if inconnus:
+        raise BancEssaiError(f"Scénarios inconnus : {', '.join(sorted(inconnus))}.")
+    connexion = Client()
+    connexion.force_login(user)
+    session = connexion.cookies[settings.SESSION_COOKIE_NAME].value
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = _ClientServeur(serveur, session) if serveur else _ClientLocal(session, user)
+        return local.client
+
+    resultats = {}
+    with ThreadPoolExecutor(max_workers=concurrence) as pool:
+        try:
+            for nom in noms or disponibles:
+                scenario = disponibles[nom]
+                client().appeler(scenario)
+
+                def appel(_):
+                    debut = time.perf_counter()
+                    statut, requetes_sql = client().appeler(scenario)
+                    return time.perf_counter() - debut, statut, requetes_sql
+
+                debut = time.perf_counter()
+                # Sans concurrence, dans le thread appelant (et sa transaction, en test)
+                mesures = list((pool.map if concurrence > 1 else map)(appel, range(iterations)))
+                duree = time.perf_counter() - debut
+                resultats[nom] = resumer(
+                    [latence for latence, _, _ in mesures],
+                    [requetes for _, _, requetes in mesures if requetes is not None],
+                    sum(1 for _, statut, _ in mesures if statut not in scenario.statuts),
+                    duree,
+                )
+        finally:
+            # Connexions ouvertes par les threads du pool
+            for _ in range(concurrence if concurrence > 1 else 0):
+                pool.submit(connections.close_all)
+            connexion.logout()
+    return resultats
+
+
+def lire_reference(chemin):
+    try:
+        with open(chemin, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise BancEssaiError(f'Référence illisible ({chemin}) : {e}')
+
+
+def enregistrer_reference(chemin, resultats):
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(resultats, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+
+
+def comparer(resultats, reference, tolerance=0.25):
+    """Régressions par rapport à la référence, sous forme de messages (liste vide : aucune)."""
+    regressions = []
+    for nom, mesure in resultats.items():
+        if mesure['erreurs']:
+            regressions.append(f"{nom} : {mesure['erreurs']} réponses en erreur")
+        attendu = reference.get(nom)
+        if attendu is None:
+            continue
+        if 'requetes_sql_max' in attendu and mesure.get('requetes_sql_max', 0) > attendu['requetes_sql_max']:
+            regressions.append(
+                f"{nom} : {mesure['requetes_sql_max']} requêtes SQL (référence {attendu['requetes_sql_max']})"
+            )
+        if tolerance is None:
+            continue
+        if mesure['p95_ms'] > attendu['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{nom} : p95 {mesure['p95_ms']} ms (référence {attendu['p95_ms']} ms)")
+        if mesure['debit'] and attendu.get('debit') and mesure['debit'] < attendu['debit'] * (1 - tolerance):
+            regressions.append(f"{nom} : {mesure['debit']} req/s (référence {attendu['debit']} req/s)")
+    return regressions
@@ -0,0 +1,134 @@
+"""
+Compteurs de tâches dénormalisés sur Projet (total, par statut, en retard).
+
+Les compteurs sont mis à jour par incréments F() à chaque création,
+suppression, changement de statut ou de projet d'une tâche. Le compteur
+"en retard" dépend aussi de l'heure courante : il est exact au moment de
+l'écriture et se recale via la commande recalculer_compteurs (à planifier).
+"""
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from projects.models import Projet
+
+# Champ de compteur de Projet pour chaque statut de tâche
+CHAMPS_STATUT = {
+    'a_faire': 'nb_a_faire',
+    'en_cours': 'nb_en_cours',
+    'terminee': 'nb_terminees',
+}
+
+# Taille des lots de projets lors du recalcul complet
+TAILLE_LOT = 500
+
+
+def est_en_retard(statut, date_echeance, maintenant=None):
+    """Une tâche est en retard si elle n'est pas terminée et que son échéance est passée."""
+    if statut == 'terminee' or not date_echeance:
+        return False
+    if isinstance(date_echeance, str):
+        from .models import Tache
+        date_echeance = Tache._meta.get_field('date_echeance').to_python(date_echeance)
+    if timezone.is_naive(date_echeance):
+        date_echeance = timezone.make_aware(date_echeance)
+    return date_echeance < (maintenant or timezone.now())
+
+
+def contribution(projet_id, statut, date_echeance):
+    """Retourne la contribution d'une tâche aux compteurs : (projet_id, statut, en_retard)."""
+    return (projet_id, statut, est_en_retard(statut, date_echeance))
+
+
+def _deltas(contribution_, signe, deltas):
+    projet_id, statut, en_retard = contribution_
+    compteurs = deltas.setdefault(projet_id, {})
+    champs = ['nb_taches', CHAMPS_STATUT.get(statut)]
+    if en_retard:
+        champs.append('nb_en_retard')
+    for champ in filter(None, champs):
+        compteurs[champ] = compteurs.get(champ, 0) + signe
+
+
+def _incrementer(champ, delta):
+    if champ == 'nb_en_retard' and delta < 0:
+        # Une tâche devenue en retard depuis sa dernière écriture n'a pas été
+        # comptée : on borne à zéro plutôt que de violer la contrainte.
+        return Greatest(F(champ) + delta, 0)
+    return F(champ) + delta
+
+
+def _appliquer(deltas):
+    for projet_id, compteurs in deltas.items():
+        mises_a_jour = {
+            champ: _incrementer(champ, delta) for champ, delta in compteurs.items() if delta
+        }
+        if mises_a_jour:
+            Projet.objects.filter(pk=projet_id).update(**mises_a_jour)
+
+
+def appliquer_changement(avant=None, apres=None):
+    """
+    Répercute le passage d'une contribution à une autre (None = tâche absente)
+    en une requête UPDATE par projet concerné, rien si elles sont identiques.
+    """
+    if avant == apres:
+        return
+    deltas = {}
+    if avant is not None:
+        _deltas(avant, -1, deltas)
+    if apres is not None:
+        _deltas(apres, +1, deltas)
+    _appliquer(deltas)
+
+
+def appliquer_changements(avant=(), apres=()):
+    """
+    Version par lots d'appliquer_changement : les contributions retirées
+    (avant) et ajoutées (apres) sont cumulées, puis appliquées en une requête
+    UPDATE par projet concerné, quel que soit le nombre de tâches.
+    """
+    deltas = {}
+    for contribution_ in avant:
+        _deltas(contribution_, -1, deltas)
+    for contribution_ in apres:
+        _deltas(contribution_, +1, deltas)
+    _appliquer(deltas)
+
+
+def recalculer_compteurs(projet_ids=None):
+    """
+    Recalcule les compteurs à partir des tâches, en une requête agrégée
+    puis un bulk_update. Retourne le nombre de projets mis à jour.
+    """
+    projets = Projet.objects.all()
+    if projet_ids is not None:
+        projets = projets.filter(pk__in=projet_ids)
+
+    ouvertes_en_retard = ~Q(taches__statut='terminee') & Q(taches__date_echeance__lt=timezone.now())
+    projets = projets.annotate(
+        calc_taches=Count('taches'),
+        calc_a_faire=Count('taches', filter=Q(taches__statut='a_faire')),
+        calc_en_cours=Count('taches', filter=Q(taches__statut='en_cours')),
+        calc_terminees=Count('taches', filter=Q(taches__statut='terminee')),
+        calc_en_retard=Count('taches', filter=ouvertes_en_retard),
+    ).only('id').order_by()
+
+    total = 0
+    lot = []
+    for projet in projets.iterator(chunk_size=TAILLE_LOT):
+        projet.nb_taches = projet.calc_taches
+        projet.nb_a_faire = projet.calc_a_faire
+        projet.nb_en_cours = projet.calc_en_cours
+        projet.nb_terminees = projet.calc_terminees
+        projet.nb_en_retard = projet.calc_en_retard
+        lot.append(projet)
+        if len(lot) >= TAILLE_LOT:
+            Projet.objects.bulk_update(lot, Projet.CHAMPS_COMPTEURS)
+            total += len(lot)
+            lot = []
+
+    if lot:
+        Projet.objects.bulk_update(lot, Projet.CHAMPS_COMPTEURS)
+        total += len(lot)
+    return total
@@ -0,0 +1,85 @@
+"""
+Indicateurs du tableau de bord, calculés en une seule requête et mis en cache par utilisateur.
+
+Le cache est protégé contre l'effet de meute (todolist.cache.obtenir_protege) :
+un seul recalcul à la fois par utilisateur, valeur périmée servie pendant ce temps.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F, Func, IntegerField, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from projects.models import Projet
+from todolist.cache import aobtenir_protege, get_cache, obtenir_protege
+from .models import Tache
+
+# Durée de vie des indicateurs en cache ; borne aussi la dérive du compteur "en retard"
+DASHBOARD_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
+
+def _cache_key(user_id):
+    return f'dashboard:kpis:{user_id}'
+
+
+def filtre_taches_utilisateur(user):
+    """
+    Tâches visibles sur le tableau de bord : celles des projets de l'utilisateur
+    et celles qu'il a créées. Les deux branches portent sur des colonnes de
+    tasks_tache, ce qui permet à SQLite d'utiliser un index par branche.
+    """
+    projets = Projet.objects.filter(proprietaire=user).values('id')
+    return Q(projet__in=projets) | Q(cree_par=user)
+
+
+def _compter(queryset):
+    """Sous-requête scalaire COUNT(*) utilisable comme annotation."""
+    compte = queryset.order_by().annotate(total=Func(F('id'), function='COUNT')).values('total')
+    return Coalesce(Subquery(compte, output_field=IntegerField()), 0)
+
+
+def _requete_indicateurs(user):
+    """
+    Tous les indicateurs du tableau de bord en une seule requête : chaque
+    indicateur est une sous-requête scalaire sur la ligne de l'utilisateur.
+    """
+    maintenant = timezone.now()
+    taches = Tache.objects.filter(filtre_taches_utilisateur(user))
+
+    return get_user_model().objects.filter(pk=user.pk).annotate(
+        projets_actifs=_compter(
+            Projet.objects.filter(proprietaire=user, statut=Projet.StatutProjet.EN_COURS)
+        ),
+        taches_total=_compter(taches),
+        taches_terminees=_compter(taches.filter(statut=Tache.StatutTache.TERMINEE)),
+        taches_en_retard=_compter(
+            taches.exclude(statut=Tache.StatutTache.TERMINEE).filter(date_echeance__lt=maintenant)
+        ),
+    ).values('projets_actifs', 'taches_total', 'taches_terminees', 'taches_en_retard')
+
+
+def calculer_indicateurs(user):
+    return _requete_indicateurs(user).get()
+
+
+def get_indicateurs(user):
+    """Retourne les indicateurs du tableau de bord, depuis le cache si possible."""
+    indicateurs, _ = obtenir_protege(
+        _cache_key(user.pk), lambda: calculer_indicateurs(user), DASHBOARD_CACHE_TIMEOUT
+    )
+    return indicateurs
+
+
+async def aget_indicateurs(user):
+    """Équivalent asynchrone de get_indicateurs, pour les vues async."""
+    indicateurs, _ = await aobtenir_protege(
+        _cache_key(user.pk), _requete_indicateurs(user).aget, DASHBOARD_CACHE_TIMEOUT
+    )
+    return indicateurs
+
+
+def invalider_indicateurs(*user_ids):
+    """Invalide les indicateurs en cache des utilisateurs donnés."""
+    keys = [_cache_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        get_cache().delete_many(keys)
@@ -0,0 +1,159 @@
+"""
+Écritures unitaires sur les tâches, en UPDATE conditionnel versionné.
+
+Chaque tâche porte un numéro de version, incrémenté à chaque écriture.
+Une modification s'exécute en une seule instruction :
+
+    UPDATE tasks_tache SET ..., version = version + 1
+    WHERE id = %s AND version = %s AND projet_id IN (projets de l'utilisateur)
+
+Si aucune ligne n'est modifiée, la tâche a changé depuis sa lecture par le
+client : ConflitVersion est levée (HTTP 409) et rien n'est écrasé.
+
+L'état précédent n'est relu que si les champs modifiés entrent dans les
+compteurs du projet (projet, statut, échéance) : il faut alors connaître
+la contribution retirée pour appliquer le delta.
+"""
+from typing import NamedTuple, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from projects.models import Projet
+from sync.models import prochaine_sequence
+from todolist.cache import ESPACES_TACHE, invalider
+from todolist.metriques import MODIFICATION, compter_mutations
+from .counters import appliquer_changement, contribution
+from .dashboard import invalider_indicateurs
+from .models import CHAMPS_COMPTEURS, Tache
+from .search import index_taches
+
+# Champs repris dans l'index plein texte
+CHAMPS_INDEXES = ('titre', 'description')
+
+
+class ConflitVersion(Exception):
+    """La tâche a été modifiée depuis la version connue du client."""
+
+    def __init__(self, version_actuelle):
+        super().__init__(f'La tâche a été modifiée entre-temps (version actuelle : {version_actuelle}).')
+        self.version_actuelle = version_actuelle
+
+
+class EtatTache(NamedTuple):
+    """Colonnes de la tâche utiles aux compteurs et à la détection de conflit."""
+    projet_id: int
+    statut: str
+    date_echeance: Optional[object]
+    cree_par_id: Optional[int]
+    version: int
+
+
+def lire_version(valeur):
+    """Version transmise par le client (champ de formulaire, JSON) ; None si absente."""
+    try:
+        return int(valeur)
+    except (TypeError, ValueError):
+        return None
+
+
+def _identifiant(tache_id):
+    """Identifiant entier ; Tache.DoesNotExist (404) pour une valeur non numérique."""
+    try:
+        return int(tache_id)
+    except (TypeError, ValueError):
+        raise Tache.DoesNotExist
+
+
+def _taches(user, tache_id):
+    # Sous-requête sur les projets plutôt qu'une jointure : le filtre reste sur tasks_tache
+    return Tache.objects.filter(
+        pk=tache_id, projet__in=Projet.objects.filter(proprietaire=user).values('id')
+    )
+
+
+def lire_etat(user, tache_id):
+    """Lit l'état minimal de la tâche ; lève Tache.DoesNotExist."""
+    tache_id = _identifiant(tache_id)
+    etat = _taches(user, tache_id).values_list(
+        'projet_id', 'statut', 'date_echeance', 'cree_par_id', 'version'
+    ).first()
+    if etat is None:
+        raise Tache.DoesNotExist
+    return EtatTache(*etat)
+
+
+def _normaliser(valeurs, etat):
+    valeurs = dict(valeurs)
+    echeance = valeurs.get('date_echeance')
+    if isinstance(echeance, str):
+        echeance = Tache._meta.get_field('date_echeance').to_python(echeance)
+        if echeance is not None and timezone.is_naive(echeance):
+            echeance = timezone.make_aware(echeance)
+        valeurs['date_echeance'] = echeance
+    statut = valeurs.get('statut')
+    if statut is not None and statut != etat.statut and 'date_accomplissement' not in valeurs:
+        # Date d'accomplissement posée en terminant la tâche, effacée en la rouvrant
+        valeurs['date_accomplissement'] = (
+            timezone.now() if statut == Tache.StatutTache.TERMINEE else None
+        )
+    return valeurs
+
+
+def modifier_tache(user, tache_id, valeurs, version=None, etat=None):
+    """
+    Applique `valeurs` ({champ: valeur}) à la tâche en un UPDATE conditionnel.
+
+    version : version connue du client ; None pour écraser sans contrôle.
+    etat : EtatTache déjà lu par l'appelant, pour éviter une seconde lecture.
+
+    Returns:
+        La nouvelle version, ou None si elle n'est pas connue sans relecture.
+    Lève Tache.DoesNotExist ou ConflitVersion.
+    """
+    tache_id = _identifiant(tache_id)
+    if etat is None and set(valeurs) & set(CHAMPS_COMPTEURS):
+        etat = lire_etat(user, tache_id)
+    if etat is not None:
+        if version is not None and version != etat.version:
+            raise ConflitVersion(etat.version)
+        version = etat.version
+        valeurs = _normaliser(valeurs, etat)
+
+    taches = _taches(user, tache_id)
+    if version is not None:
+        taches = taches.filter(version=version)
+
+    with transaction.atomic():
+        modifiees = taches.update(
+            **valeurs,
+            version=F('version') + 1,
+            sequence=prochaine_sequence(),
+            date_mise_a_jour=timezone.now(),
+        )
+        if not modifiees:
+            # Seul le chemin d'échec relit la tâche, pour distinguer 404 et 409
+            actuelle = _taches(user, tache_id).values_list('version', flat=True).first()
+            if actuelle is None:
+                raise Tache.DoesNotExist
+            raise ConflitVersion(actuelle)
+
+        if etat is not None:
+            projet = valeurs.get('projet')
+            appliquer_changement(
+                avant=contribution(etat.projet_id, etat.statut, etat.date_echeance),
+                apres=contribution(
+                    projet.pk if projet is not None else valeurs.get('projet_id', etat.projet_id),
+                    valeurs.get('statut', etat.statut),
+                    valeurs.get('date_echeance', etat.date_echeance),
+                ),
+            )
+        if set(valeurs) & set(CHAMPS_INDEXES):
+            index_taches([tache_id])
+
+    if etat is not None:
+        invalider_indicateurs(user.pk, etat.cree_par_id)
+    invalider(ESPACES_TACHE, user.pk)
+    compter_mutations(MODIFICATION)
+    return version + 1 if version is not None else None
@@ -0,0 +1,161 @@
+"""
+Export en flux des tâches (CSV ou NDJSON, éventuellement compressé en gzip).
+
+Les lignes sont lues par values_list().iterator() et encodées au fil de l'eau :
+la mémoire utilisée ne dépend pas du nombre de tâches exportées.
+"""
+import csv
+import zlib
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Tache
+
+# Colonnes exportées : (nom de colonne, lookup ORM)
+COLONNES = (
+    ('id', 'id'),
+    ('titre', 'titre'),
+    ('description', 'description'),
+    ('statut', 'statut'),
+    ('priorite', 'priorite'),
+    ('projet_id', 'projet_id'),
+    ('projet', 'projet__titre'),
+    ('date_echeance', 'date_echeance'),
+    ('date_accomplissement', 'date_accomplissement'),
+    ('date_creation', 'date_creation'),
+    ('date_mise_a_jour', 'date_mise_a_jour'),
+    ('cree_par', 'cree_par__email'),
+    ('assigne_a', 'assigne_a__email'),
+)
+
+FORMATS = ('csv', 'ndjson')
+
+# Nombre de lignes lues par aller-retour avec la base
+CHUNK_SIZE = 2000
+
+# Taille approximative des blocs émis vers le client
+TAILLE_BLOC = 64 * 1024
+
+
+class ExportError(ValueError):
+    """Paramètre d'export invalide."""
+
+
+def _parse_borne(valeur, nom):
+    """Accepte une date (AAAA-MM-JJ) ou une date et heure ISO 8601."""
+    if not valeur:
+        return None
+    try:
+        borne = parse_date(valeur) or parse_datetime(valeur)
+    except ValueError:
+        borne = None
+    if borne is None:
+        raise ExportError(f'{nom} : date invalide ({valeur}).')
+    if isinstance(borne, datetime) and timezone.is_naive(borne):
+        borne = timezone.make_aware(borne)
+    return borne
+
+
+def _filtre_echeance(borne, operateur):
+    """Une date seule est comparée à la date (et non à l'instant) d'échéance."""
+    if isinstance(borne, datetime):
+        return {f'date_echeance__{operateur}': borne}
+    return {f'date_echeance__date__{operateur}': borne}
+
+
+def taches_filtrees(user, projet_id=None, statut=None, priorite=None,
+                    echeance_apres=None, echeance_avant=None):
+    """
+    Tâches des projets de l'utilisateur, restreintes par les filtres donnés.
+    Lève ExportError si un filtre est invalide.
+    """
+    taches = Tache.objects.filter(projet__proprietaire=user)
+
+    if projet_id:
+        try:
+            taches = taches.filter(projet_id=int(projet_id))
+        except (TypeError, ValueError):
+            raise ExportError(f'Projet invalide : {projet_id}.')
+    if statut:
+        if statut not in dict(Tache.StatutTache.choices):
+            raise ExportError(f'Statut inconnu : {statut}.')
+        taches = taches.filter(statut=statut)
+    if priorite:
+        if priorite not in dict(Tache.PrioriteTache.choices):
+            raise ExportError(f'Priorité inconnue : {priorite}.')
+        taches = taches.filter(priorite=priorite)
+
+    apres = _parse_borne(echeance_apres, 'echeance_apres')
+    if apres is not None:
+        taches = taches.filter(**_filtre_echeance(apres, 'gte'))
+    avant = _parse_borne(echeance_avant, 'echeance_avant')
+    if avant is not None:
+        taches = taches.filter(**_filtre_echeance(avant, 'lte'))
+    return taches
+
+
+def taches_a_exporter(user, **filtres):
+    """
+    Construit le QuerySet values_list() des tâches de l'utilisateur à exporter
+    (filtres : voir taches_filtrees).
+    """
+    taches = taches_filtrees(user, **filtres)
+    # Pas de tri : l'ordre naturel évite un tri complet côté base
+    return taches.order_by().values_list(*(lookup for _, lookup in COLONNES))
+
+
+class _Echo:
+    """Pseudo-fichier pour csv.writer : retourne la ligne au lieu de l'écrire."""
+    def write(self, value):
+        return value
+
+
+def lignes_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([nom for nom, _ in COLONNES])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def lignes_ndjson(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    noms = [nom for nom, _ in COLONNES]
+    for row in rows:
+        yield encoder.encode(dict(zip(noms, row))) + '\n'
+
+
+def encoder_blocs(lignes, taille=TAILLE_BLOC):
+    """Regroupe les lignes en blocs d'octets d'environ `taille` octets."""
+    bloc, longueur = [], 0
+    for ligne in lignes:
+        donnees = ligne.encode('utf-8')
+        bloc.append(donnees)
+        longueur += len(donnees)
+        if longueur >= taille:
+            yield b''.join(bloc)
+            bloc, longueur = [], 0
+    if bloc:
+        yield b''.join(bloc)
+
+
+def compresser_gzip(blocs):
+    """Compresse un flux de blocs d'octets au format gzip, au fil de l'eau."""
+    compresseur = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for bloc in blocs:
+        donnees = compresseur.compress(bloc)
+        if donnees:
+            yield donnees
+    yield compresseur.flush()
+
+
+def flux_export(queryset, format='csv', gzip=False, chunk_size=CHUNK_SIZE):
+    """Retourne un générateur d'octets pour l'export du QuerySet donné."""
+    if format not in FORMATS:
+        raise ExportError(f'Format inconnu : {format}.')
+    rows = queryset.iterator(chunk_size=chunk_size)
+    lignes = lignes_csv(rows) if format == 'csv' else lignes_ndjson(rows)
+    blocs = encoder_blocs(lignes)
+    return compresser_gzip(blocs) if gzip else blocs
@@ -0,0 +1,238 @@
+"""
+Génération de données synthétiques, reproductible à partir d'une graine,
+pour les mesures de performance et le banc d'essai.
+
+Forme des données :
+- N utilisateurs (utilisateur000001@exemple.test, ...) ayant tous le même
+  mot de passe, haché une seule fois ;
+- un rôle RBAC par utilisateur (membre, invité, gestionnaire, admin) ;
+- M projets par utilisateur, de tailles réparties selon une loi de Zipf
+  (quelques gros projets, beaucoup de petits), K tâches par projet en
+  moyenne ;
+- statuts, priorités, échéances (passées ou futures) et assignations tirés
+  selon des proportions fixes.
+
+Insertion par lots de projets, une transaction par lot. bulk_create ne
+déclenche pas les signaux : les compteurs de projet sont calculés avant
+l'insertion, les séquences réservées en un bloc et l'index plein texte mis
+à jour par lot. Les utilisateurs déjà présents sont conservés (même
+adresse) ; projets et tâches s'ajoutent à chaque exécution.
+"""
+import random
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from projects.models import Projet
+from rbac.models import assign_role_to_user
+from sync.models import prochaine_sequence
+from todolist.cache import ESPACES_PROJET, invalider
+from todolist.metriques import CREATION, compter_mutations
+from .counters import CHAMPS_STATUT, est_en_retard
+from .dashboard import invalider_indicateurs
+from .models import Tache
+from .search import index_taches
+
+MOT_DE_PASSE = 'motdepasse123'
+DOMAINE = 'exemple.test'
+
+# Exposant de la loi de Zipf des tailles de projet (0 : tailles égales)
+EXPOSANT_ZIPF = 1.0
+
+# Tâches générées par transaction (un gros projet peut dépasser seul)
+TAILLE_LOT = 50000
+TAILLE_LOT_INSERTION = 2000
+
+# Proportions des tirages
+ROLES = {'membre': 70, 'invite': 20, 'gestionnaire': 9, 'admin': 1}
+STATUTS = {'a_faire': 40, 'en_cours': 20, 'terminee': 40}
+PRIORITES = {'basse': 25, 'normale': 55, 'haute': 20}
+STATUTS_PROJET = {'a_faire': 20, 'en_cours': 60, 'termine': 20}
+PART_SANS_ECHEANCE = 0.25
+PART_AVEC_DESCRIPTION = 0.3
+# Assignation : personne, le propriétaire du projet ou un autre utilisateur
+PART_NON_ASSIGNEES = 0.35
+PART_ASSIGNEES_PROPRIETAIRE = 0.45
+# Échéances entre ECHEANCE_MIN et ECHEANCE_MAX jours autour de maintenant
+ECHEANCE_MIN, ECHEANCE_MAX = -60, 120
+
+PRENOMS = ['Alice', 'Bruno', 'Chloé', 'David', 'Emma', 'Farid', 'Gaëlle', 'Hugo', 'Inès', 'Julien',
+           'Karima', 'Louis', 'Manon', 'Nicolas', 'Océane', 'Paul', 'Rose', 'Samuel', 'Théo', 'Zoé']
+NOMS = ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Leroy',
+        'Moreau', 'Simon', 'Laurent', 'Lefebvre', 'Michel', 'Garcia', 'Roux', 'Fournier', 'Girard']
+VERBES = ['Préparer', 'Relire', 'Corriger', 'Planifier', 'Valider', 'Rédiger', 'Tester', 'Livrer',
+          'Analyser', 'Documenter', 'Migrer', 'Optimiser', 'Archiver', 'Présenter']
+OBJETS = ['le budget', 'la maquette', 'le rapport', 'la réunion', 'le contrat', 'la facture',
+          "l'inventaire", 'la campagne', 'le déploiement', 'la sauvegarde', 'le compte rendu',
+          'la formation', 'le tableau de bord', 'la migration', "l'audit", 'la revue de code']
+DOMAINES_PROJET = ['Site web', 'Application mobile', 'Refonte', 'Infrastructure', 'Marketing',
+                   'Recrutement', 'Comptabilité', 'Support', 'Données', 'Sécurité']
+
+
+@dataclass
+class RapportGeneration:
+    utilisateurs: int = 0
+    projets: int = 0
+    taches: int = 0
+    duree: float = 0.0
+
+    @property
+    def taches_par_seconde(self):
+        return self.taches / self.duree if self.duree else 0.0
+
+
+def tailles_zipf(nombre, total, exposant, rng):
+    """
+    Répartit `total` tâches entre `nombre` projets selon une loi de Zipf :
+    le projet de rang r reçoit une part proportionnelle à 1 / r ** exposant.
+    Les rangs sont attribués aux projets dans un ordre aléatoire.
+    """
+    poids = [1 / rang ** exposant for rang in range(1, nombre + 1)]
+    somme = sum(poids)
+    parts = [total * p / somme for p in poids]
+    tailles = [int(part) for part in parts]
+    # Plus forts restes : la somme des tailles vaut exactement `total`
+    restes = sorted(range(nombre), key=lambda i: tailles[i] - parts[i])
+    for i in restes[:total - sum(tailles)]:
+        tailles[i] += 1
+    rng.shuffle(tailles)
+    return tailles
+
+
+def _tirage(rng, proportions):
+    return rng.choices(list(proportions), weights=list(proportions.values()))[0]
+
+
+def _utilisateurs(rng, nombre, mot_de_passe):
+    User = get_user_model()
+    # Même mot de passe pour tous : un seul hachage au lieu d'un par utilisateur
+    hachage = make_password(mot_de_passe)
+    emails = [f'utilisateur{numero:06d}@{DOMAINE}' for numero in range(1, nombre + 1)]
+    User.objects.bulk_create(
+        [
+            User(email=email, password=hachage, first_name=rng.choice(PRENOMS), last_name=rng.choice(NOMS))
+            for email in emails
+        ],
+        batch_size=TAILLE_LOT_INSERTION,
+        ignore_conflicts=True,
+    )
+    par_email = User.objects.in_bulk(emails, field_name='email')
+    utilisateurs = [par_email[email] for email in emails]
+    for user in utilisateurs:
+        assign_role_to_user(user, _tirage(rng, ROLES))
+    return utilisateurs
+
+
+def _taches(rng, taille, proprietaire_id, utilisateur_ids, maintenant):
+    """Attributs des tâches d'un projet : (titre, description, statut, priorité, échéance, accomplissement, assigné)."""
+    for _ in range(taille):
+        statut = _tirage(rng, STATUTS)
+        echeance = None
+        if rng.random() >= PART_SANS_ECHEANCE:
+            echeance = maintenant + timedelta(days=rng.uniform(ECHEANCE_MIN, ECHEANCE_MAX))
+        accomplissement = None
+        if statut == 'terminee':
+            accomplissement = maintenant - timedelta(days=rng.uniform(0, -ECHEANCE_MIN))
+        tirage = rng.random()
+        if tirage < PART_NON_ASSIGNEES:
+            assigne_id = None
+        elif tirage < PART_NON_ASSIGNEES + PART_ASSIGNEES_PROPRIETAIRE:
+            assigne_id = proprietaire_id
+        else:
+            assigne_id = rng.choice(utilisateur_ids)
+        titre = f'{rng.choice(VERBES)} {rng.choice(OBJETS)}'
+        description = f'{titre} avant le point hebdomadaire.' if rng.random() < PART_AVEC_DESCRIPTION else ''
+        yield titre, description, statut, _tirage(rng, PRIORITES), echeance, accomplissement, assigne_id
+
+
+def _compteurs(taches):
+    compteurs = dict.fromkeys(Projet.CHAMPS_COMPTEURS, 0)
+    compteurs['nb_taches'] = len(taches)
+    for _, _, statut, _, echeance, _, _ in taches:
+        compteurs[CHAMPS_STATUT[statut]] += 1
+        # Retard évalué à l'heure réelle, comme lors des écritures
+        if est_en_retard(statut, echeance):
+            compteurs['nb_en_retard'] += 1
+    return compteurs
+
+
+def _inserer(lot, indexer):
+    """Insère un lot de projets [(Projet, attributs des tâches)] et leurs tâches, dans une transaction."""
+    with transaction.atomic():
+        # Un bloc de séquences réservé en une fois, une valeur par projet et par tâche
+        nombre = len(lot) + sum(len(taches) for _, taches in lot)
+        fin = prochaine_sequence(nombre)
+        sequences = iter(range(fin - nombre + 1, fin + 1))
+        for projet, taches in lot:
+            projet.sequence = next(sequences)
+            for champ, valeur in _compteurs(taches).items():
+                setattr(projet, champ, valeur)
+        Projet.objects.bulk_create([projet for projet, _ in lot], batch_size=TAILLE_LOT_INSERTION)
+        objets = [
+            Tache(
+                titre=titre, description=description, statut=statut, priorite=priorite,
+                date_echeance=echeance, date_accomplissement=accomplissement, projet_id=projet.pk,
+                cree_par_id=projet.proprietaire_id, assigne_a_id=assigne_id, sequence=next(sequences),
+            )
+            for projet, taches in lot
+            for titre, description, statut, priorite, echeance, accomplissement, assigne_id in taches
+        ]
+        Tache.objects.bulk_create(objets, batch_size=TAILLE_LOT_INSERTION)
+        if indexer:
+            index_taches([tache.pk for tache in objets])
+    return len(objets)
+
+
+def generer(utilisateurs, projets_par_utilisateur, taches_par_projet, graine=0, exposant=EXPOSANT_ZIPF,
+            mot_de_passe=MOT_DE_PASSE, indexer=True, progression=None):
+    """
+    Génère les données ; la même graine produit les mêmes données (les dates
+    restent relatives au jour de la génération). `progression(rapport)` est
+    appelée après chaque lot.
+
+    Returns:
+        Un RapportGeneration.
+    """
+    debut = time.perf_counter()
+    rng = random.Random(graine)
+    rapport = RapportGeneration()
+    # Minuit : les échéances ne dépendent pas de l'heure de l'exécution
+    maintenant = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    users = _utilisateurs(rng, utilisateurs, mot_de_passe)
+    rapport.utilisateurs = len(users)
+    utilisateur_ids = [user.pk for user in users]
+    tailles = tailles_zipf(
+        len(users) * projets_par_utilisateur, len(users) * projets_par_utilisateur * taches_par_projet,
+        exposant, rng,
+    )
+
+    lot, taches_du_lot = [], 0
+    for indice, taille in enumerate(tailles):
+        proprietaire_id = utilisateur_ids[indice // projets_par_utilisateur]
+        projet = Projet(
+            titre=f'{rng.choice(DOMAINES_PROJET)} {indice + 1}',
+            statut=_tirage(rng, STATUTS_PROJET),
+            proprietaire_id=proprietaire_id,
+        )
+        taches = list(_taches(rng, taille, proprietaire_id, utilisateur_ids, maintenant))
+        lot.append((projet, taches))
+        taches_du_lot += taille
+        if taches_du_lot >= TAILLE_LOT or indice == len(tailles) - 1:
+            rapport.taches += _inserer(lot, indexer)
+            rapport.projets += len(lot)
+            rapport.duree = time.perf_counter() - debut
+            lot, taches_du_lot = [], 0
+            if progression is not None:
+                progression(rapport)
+
+    invalider(ESPACES_PROJET, *utilisateur_ids)
+    invalider_indicateurs(*utilisateur_ids)
+    compter_mutations(CREATION, rapport.taches)
+    rapport.duree = time.perf_counter() - debut
+    return rapport
@@ -0,0 +1,362 @@
+"""
+Import en masse de tâches (CSV ou JSON Lines), pour la reprise de données.
+
+Étapes :
+1. lecture du fichier et découpage en lots de lignes ;
+2. analyse et validation des lots, dans un pool de processus au-delà de
+   SEUIL_PARALLELE lignes si workers > 1 (les workers n'accèdent pas à la
+   base) ; réservé à la commande importer_taches, l'API analyse dans le
+   processus de la requête ;
+3. résolution des projets et des personnes assignées par requêtes groupées ;
+4. insertion par bulk_create dans une seule transaction, avec mise à jour
+   des compteurs de projet et de l'index plein texte.
+
+Les colonnes reconnues sont celles de l'export (tasks/export.py) : un
+fichier exporté peut être réimporté tel quel.
+"""
+import csv
+import io
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, time as heure
+from itertools import islice
+from typing import NamedTuple, Optional
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from projects.models import Projet
+from sync.models import prochaine_sequence
+from .counters import appliquer_changements
+from todolist.cache import ESPACES_TACHE, invalider
+from todolist.metriques import CREATION, compter_mutations
+from .dashboard import invalider_indicateurs
+from .models import Tache
+from .search import index_taches
+
+FORMATS = ('csv', 'ndjson')
+
+# Lignes par lot envoyé à un worker
+TAILLE_LOT_ANALYSE = 5000
+
+# Lignes par requête INSERT
+TAILLE_LOT_INSERTION = 1000
+
+# En dessous, l'analyse se fait dans le processus courant (démarrer le pool coûte plus cher)
+SEUIL_PARALLELE = 20000
+
+# Emails recherchés par requête
+TAILLE_LOT_EMAILS = 500
+
+# Taille maximale d'un fichier importé par l'API (lu en mémoire) ; au-delà,
+# passer par la commande importer_taches
+IMPORT_API_TAILLE_MAX = getattr(settings, 'IMPORT_API_TAILLE_MAX', 10 * 1024 * 1024)
+
+# Nombre maximal d'erreurs détaillées dans le rapport (toutes sont comptées)
+MAX_ERREURS = 1000
+
+_STATUTS = frozenset(Tache.StatutTache.values)
+_PRIORITES = frozenset(Tache.PrioriteTache.values)
+_TITRE_MAX = Tache._meta.get_field('titre').max_length
+
+
+class ImportationError(ValueError):
+    """Fichier d'import inutilisable (format, encodage, en-tête)."""
+
+
+class LigneValide(NamedTuple):
+    """Ligne analysée, en attente de résolution du projet et de l'assignation."""
+    numero: int
+    titre: str
+    description: str
+    statut: str
+    priorite: str
+    projet_id: Optional[int]
+    projet_titre: str
+    date_echeance: Optional[datetime]
+    date_accomplissement: Optional[datetime]
+    assigne_a: str
+
+
+@dataclass
+class RapportImport:
+    lignes: int = 0
+    importees: int = 0
+    nb_erreurs: int = 0
+    erreurs: list = field(default_factory=list)
+    duree: float = 0.0
+
+    def ajouter_erreur(self, numero, messages):
+        self.nb_erreurs += 1
+        if len(self.erreurs) < MAX_ERREURS:
+            self.erreurs.append({'ligne': numero, 'erreurs': messages})
+
+    @property
+    def lignes_par_seconde(self):
+        return self.lignes / self.duree if self.duree else 0.0
+
+    def as_dict(self):
+        return {
+            'lignes': self.lignes,
+            'importees': self.importees,
+            'nb_erreurs': self.nb_erreurs,
+            'erreurs': sorted(self.erreurs, key=lambda erreur: erreur['ligne']),
+            'duree': round(self.duree, 3),
+            'lignes_par_seconde': round(self.lignes_par_seconde),
+        }
+
+
+def format_depuis_nom(nom):
+    """Déduit le format de l'extension du fichier (csv par défaut)."""
+    nom = (nom or '').lower().removesuffix('.gz')
+    return 'ndjson' if nom.endswith(('.ndjson', '.jsonl', '.json')) else 'csv'
+
+
+# --- Analyse (exécutée dans les workers) ---------------------------------
+
+def _texte(valeur):
+    return '' if valeur is None else str(valeur).strip()
+
+
+def _date(valeur):
+    """Date (AAAA-MM-JJ, minuit) ou date et heure ISO 8601 ; None si vide."""
+    valeur = _texte(valeur)
+    if not valeur:
+        return None
+    jour = parse_date(valeur)
+    date = datetime.combine(jour, heure.min) if jour else parse_datetime(valeur)
+    if date is None:
+        raise ValueError(valeur)
+    return timezone.make_aware(date) if timezone.is_naive(date) else date
+
+
+def analyser_ligne(numero, donnees):
+    """Valide une ligne ; retourne (LigneValide, None) ou (None, liste d'erreurs)."""
+    erreurs = []
+
+    titre = _texte(donnees.get('titre'))
+    if not titre:
+        erreurs.append('titre : obligatoire.')
+    elif len(titre) > _TITRE_MAX:
+        erreurs.append(f'titre : {_TITRE_MAX} caractères au plus.')
+
+    statut = _texte(donnees.get('statut')) or Tache.StatutTache.A_FAIRE
+    if statut not in _STATUTS:
+        erreurs.append(f'statut : valeur inconnue ({statut}).')
+    priorite = _texte(donnees.get('priorite')) or Tache.PrioriteTache.NORMALE
+    if priorite not in _PRIORITES:
+        erreurs.append(f'priorite : valeur inconnue ({priorite}).')
+
+    projet_id = _texte(donnees.get('projet_id'))
+    projet_titre = _texte(donnees.get('projet'))
+    if projet_id:
+        try:
+            projet_id = int(projet_id)
+        except ValueError:
+            erreurs.append(f'projet_id : entier attendu ({projet_id}).')
+    elif not projet_titre:
+        erreurs.append('projet : projet_id ou titre du projet obligatoire.')
+
+    dates = {}
+    for nom in ('date_echeance', 'date_accomplissement'):
+        try:
+            dates[nom] = _date(donnees.get(nom))
+        except ValueError:
+            erreurs.append(f'{nom} : date invalide ({_texte(donnees.get(nom))}).')
+
+    if erreurs:
+        return None, erreurs
+    return LigneValide(
+        numero, titre, _texte(donnees.get('description')), statut, priorite,
+        projet_id or None, projet_titre, dates['date_echeance'],
+        dates['date_accomplissement'], _texte(donnees.get('assigne_a')),
+    ), None
+
+
+def _analyser_lot(lot):
+    """Analyse un lot (format, en-tête, [(numéro, ligne brute)]) ; retourne (valides, erreurs)."""
+    format, entete, lignes = lot
+    valides, erreurs = [], []
+    for numero, brute in lignes:
+        if format == 'csv':
+            if len(brute) != len(entete):
+                erreurs.append((numero, [f'{len(entete)} colonnes attendues, {len(brute)} trouvées.']))
+                continue
+            donnees = dict(zip(entete, brute))
+        else:
+            try:
+                donnees = json.loads(brute)
+            except ValueError:
+                erreurs.append((numero, ['JSON invalide.']))
+                continue
+            if not isinstance(donnees, dict):
+                erreurs.append((numero, ['Objet JSON attendu.']))
+                continue
+        ligne, messages = analyser_ligne(numero, donnees)
+        if ligne is None:
+            erreurs.append((numero, messages))
+        else:
+            valides.append(ligne)
+    return valides, erreurs
+
+
+# --- Lecture et orchestration ---------------------------------------------
+
+def _lots(fichier, format, taille=TAILLE_LOT_ANALYSE):
+    """Découpe le fichier texte en lots (format, en-tête, [(numéro, ligne brute)])."""
+    if format == 'csv':
+        reader = csv.reader(fichier)
+        entete = [nom.strip() for nom in next(reader, [])]
+        if 'titre' not in entete:
+            raise ImportationError("En-tête CSV invalide : colonne 'titre' manquante.")
+        lignes = ((reader.line_num, row) for row in reader if row)
+    else:
+        entete = None
+        lignes = ((numero, ligne) for numero, ligne in enumerate(fichier, 1) if ligne.strip())
+
+    while lot := list(islice(lignes, taille)):
+        yield format, entete, lot
+
+
+def _analyser(lots, workers):
+    """Analyse les lots, en parallèle si le volume le justifie ; l'ordre est conservé."""
+    if workers > 1 and sum(len(lignes) for _, _, lignes in lots) >= SEUIL_PARALLELE:
+        # django.setup : les workers démarrés par "spawn" doivent charger les réglages
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            yield from pool.map(_analyser_lot, lots)
+    else:
+        yield from map(_analyser_lot, lots)
+
+
+def _utilisateurs_par_email(emails):
+    """Résout les emails en ids, par requêtes groupées de TAILLE_LOT_EMAILS."""
+    emails = sorted(emails)
+    resolus = {}
+    for debut in range(0, len(emails), TAILLE_LOT_EMAILS):
+        resolus.update(
+            get_user_model().objects.filter(
+                email__in=emails[debut:debut + TAILLE_LOT_EMAILS]
+            ).values_list('email', 'id')
+        )
+    return resolus
+
+
+def _resoudre(user, lignes, rapport):
+    """Construit les instances de Tache ; les lignes non résolues vont au rapport."""
+    projets_par_id = {}
+    projets_par_titre = {}
+    for projet_id, titre in Projet.objects.filter(proprietaire=user).values_list('id', 'titre'):
+        projets_par_id[projet_id] = projet_id
+        # Titre porté par plusieurs projets : ambigu, signalé comme tel
+        projets_par_titre[titre] = None if titre in projets_par_titre else projet_id
+
+    assignes = _utilisateurs_par_email({ligne.assigne_a for ligne in lignes if ligne.assigne_a})
+
+    maintenant = timezone.now()
+    taches = []
+    for ligne in lignes:
+        erreurs = []
+        if ligne.projet_id is not None:
+            projet_id = projets_par_id.get(ligne.projet_id)
+            if projet_id is None:
+                erreurs.append(f'projet_id : projet introuvable ({ligne.projet_id}).')
+        else:
+            projet_id = projets_par_titre.get(ligne.projet_titre)
+            if projet_id is None:
+                erreurs.append(
+                    f'projet : projet ambigu ({ligne.projet_titre}).'
+                    if ligne.projet_titre in projets_par_titre
+                    else f'projet : projet introuvable ({ligne.projet_titre}).'
+                )
+        assigne_a_id = None
+        if ligne.assigne_a:
+            assigne_a_id = assignes.get(ligne.assigne_a)
+            if assigne_a_id is None:
+                erreurs.append(f'assigne_a : utilisateur introuvable ({ligne.assigne_a}).')
+        if erreurs:
+            rapport.ajouter_erreur(ligne.numero, erreurs)
+            continue
+
+        date_accomplissement = ligne.date_accomplissement
+        if ligne.statut == Tache.StatutTache.TERMINEE and date_accomplissement is None:
+            date_accomplissement = maintenant
+        taches.append(Tache(
+            titre=ligne.titre,
+            description=ligne.description,
+            statut=ligne.statut,
+            priorite=ligne.priorite,
+            projet_id=projet_id,
+            date_echeance=ligne.date_echeance,
+            date_accomplissement=date_accomplissement,
+            cree_par=user,
+            assigne_a_id=assigne_a_id,
+        ))
+    return taches
+
+
+def _inserer(taches, batch_size):
+    """
+    Insère les tâches dans une seule transaction. bulk_create ne déclenche
+    pas les signaux : compteurs de projet et index sont mis à jour ici, en une
+    requête par projet et par lot d'index.
+    """
+    with transaction.atomic():
+        # Un bloc de séquences réservé en une fois, une valeur par tâche
+        fin = prochaine_sequence(len(taches))
+        for sequence, tache in enumerate(taches, fin - len(taches) + 1):
+            tache.sequence = sequence
+        Tache.objects.bulk_create(taches, batch_size=batch_size)
+        appliquer_changements(apres=[tache.contribution_compteurs() for tache in taches])
+        index_taches([tache.pk for tache in taches])
+
+
+def importer_taches(user, fichier, format='csv', workers=1, dry_run=False,
+                    batch_size=TAILLE_LOT_INSERTION):
+    """
+    Importe les tâches d'un fichier binaire (CSV ou NDJSON, UTF-8) dans les
+    projets de l'utilisateur. Les lignes invalides sont ignorées et détaillées
+    dans le rapport ; avec dry_run, rien n'est écrit. `workers` > 1 analyse
+    les gros fichiers dans un pool de processus (commandes uniquement).
+
+    Returns:
+        Un RapportImport. Lève ImportationError si le fichier est inutilisable.
+    """
+    if format == 'jsonl':
+        format = 'ndjson'
+    if format not in FORMATS:
+        raise ImportationError(f'Format inconnu : {format}.')
+
+    debut = time.perf_counter()
+    rapport = RapportImport()
+    texte = io.TextIOWrapper(fichier, encoding='utf-8-sig', newline='')
+    try:
+        lots = list(_lots(texte, format))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportationError(f'Fichier illisible : {e}')
+    finally:
+        # Le fichier appartient à l'appelant
+        texte.detach()
+    rapport.lignes = sum(len(lignes) for _, _, lignes in lots)
+
+    valides = []
+    for lot_valides, lot_erreurs in _analyser(lots, workers):
+        valides.extend(lot_valides)
+        for numero, messages in lot_erreurs:
+            rapport.ajouter_erreur(numero, messages)
+
+    taches = _resoudre(user, valides, rapport)
+    if taches and not dry_run:
+        _inserer(taches, batch_size)
+        invalider_indicateurs(user.pk)
+        invalider(ESPACES_TACHE, user.pk)
+        compter_mutations(CREATION, len(taches))
+        rapport.importees = len(taches)
+
+    rapport.duree = time.perf_counter() - debut
+    return rapport
@@ -0,0 +1,91 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.banc_essai import (
+    REFERENCE, BancEssaiError, comparer, enregistrer_reference, executer, lire_reference, scenarios,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Banc d'essai des vues principales (listes, détail de projet, tableau de bord, "
+        "actions rapides, garde RBAC) : latences p50/p95/p99, débit et requêtes SQL par "
+        "requête, comparés à une référence. Échoue en cas de régression."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help="Utilisateur au nom duquel les pages sont demandées.")
+        parser.add_argument('--iterations', type=int, default=50, help='Requêtes par scénario (50 par défaut).')
+        parser.add_argument('--concurrence', type=int, default=1, help='Clients simultanés (1 par défaut).')
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='Scénario à exécuter (répétable) ; tous par défaut.')
+        parser.add_argument('--serveur', help="Serveur local à interroger (ex. http://127.0.0.1:8000) "
+                                              "au lieu du client de test.")
+        parser.add_argument('--reference', default=str(REFERENCE),
+                            help='Fichier JSON de référence (celui du dépôt par défaut).')
+        parser.add_argument('--enregistrer', action='store_true',
+                            help='Enregistre les résultats comme nouvelle référence au lieu de comparer.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Écart admis sur la latence p95 et le débit (0.25 par défaut).')
+        parser.add_argument('--requetes-seulement', action='store_true',
+                            help='Ne compare que les requêtes SQL (latences dépendantes de la machine).')
+        parser.add_argument('--json', action='store_true', help='Écrit les résultats en JSON.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['email']}")
+        if options['iterations'] < 1 or options['concurrence'] < 1:
+            raise CommandError('--iterations et --concurrence doivent être positifs.')
+        if settings.DEBUG:
+            self.stderr.write('DEBUG est actif : les requêtes SQL sont journalisées, les mesures en sont alourdies.')
+
+        try:
+            if options['serveur'] and not options['scenarios']:
+                # L'appel direct de vue n'est possible que dans le processus
+                options['scenarios'] = [scenario.nom for scenario in scenarios(user) if scenario.vue is None]
+            resultats = executer(
+                user, options['scenarios'], options['iterations'], options['concurrence'], options['serveur']
+            )
+            if options['enregistrer']:
+                enregistrer_reference(options['reference'], resultats)
+                reference = {}
+            else:
+                reference = lire_reference(options['reference'])
+        except BancEssaiError as e:
+            raise CommandError(str(e))
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultats, indent=2, ensure_ascii=False))
+        else:
+            self._afficher(resultats, reference, options)
+
+        if options['enregistrer']:
+            self.stdout.write(self.style.SUCCESS(f"Référence enregistrée : {options['reference']}"))
+            return
+        regressions = comparer(resultats, reference, None if options['requetes_seulement'] else options['tolerance'])
+        if regressions:
+            raise CommandError('Régressions :\n' + '\n'.join(f'  {regression}' for regression in regressions))
+        self.stdout.write(self.style.SUCCESS('Aucune régression par rapport à la référence.'))
+
+    def _afficher(self, resultats, reference, options):
+        self.stdout.write(
+            f"{options['iterations']} requêtes par scénario, {options['concurrence']} "
+            f"client{'s' if options['concurrence'] > 1 else ''} simultané{'s' if options['concurrence'] > 1 else ''}"
+        )
+        self.stdout.write(
+            f"{'scénario':<28}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'SQL moy':>9}{'SQL max':>9}{'réf.':>6}{'erreurs':>9}"
+        )
+        for nom, mesure in resultats.items():
+            attendu = reference.get(nom, {})
+            self.stdout.write(
+                f"{nom:<28}{mesure['debit'] or 0:>9.1f}{mesure['p50_ms']:>9.1f}{mesure['p95_ms']:>9.1f}"
+                f"{mesure['p99_ms']:>9.1f}{mesure.get('requetes_sql_moy', '-'):>9}"
+                f"{mesure.get('requetes_sql_max', '-'):>9}{attendu.get('requetes_sql_max', '-'):>6}"
+                f"{mesure['erreurs']:>9}"
+            )
@@ -0,0 +1,204 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from projects.models import Projet
+from tasks.models import Tache
+
+HOTE = 'localhost'
+
+
+def _environ(url, cookie):
+    chemin, _, query = url.partition('?')
+    return {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': chemin,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOTE,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOTE,
+        'HTTP_COOKIE': cookie,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def _scope(url, cookie):
+    chemin, _, query = url.partition('?')
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': chemin,
+        'raw_path': chemin.encode(),
+        'root_path': '',
+        'query_string': query.encode(),
+        'headers': [(b'host', HOTE.encode()), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 50000),
+        'server': (HOTE, 80),
+    }
+
+
+def appel_wsgi(application, url, cookie):
+    """Exécute une requête GET sur l'application WSGI ; retourne le code de statut."""
+    statut = []
+    reponse = application(_environ(url, cookie), lambda status, headers: statut.append(status))
+    try:
+        for _ in reponse:
+            pass
+    finally:
+        reponse.close()
+    return int(statut[0].split()[0])
+
+
+async def appel_asgi(application, url, cookie):
+    """Exécute une requête GET sur l'application ASGI ; retourne le code de statut."""
+    statut = []
+    corps_envoye = False
+    deconnexion = asyncio.get_running_loop().create_future()
+
+    async def receive():
+        nonlocal corps_envoye
+        if not corps_envoye:
+            corps_envoye = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Le client reste connecté jusqu'à la fin de la réponse
+        return await deconnexion
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statut.append(message['status'])
+
+    await application(_scope(url, cookie), receive, send)
+    return statut[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit des vues de lecture servies en WSGI (pool de threads) et en "
+        "ASGI (boucle d'événements), à forte concurrence, sur les données de la base courante."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help="Utilisateur au nom duquel les pages sont demandées.")
+        parser.add_argument('--requetes', type=int, default=2000, help='Requêtes par mode (2000 par défaut).')
+        parser.add_argument('--concurrence', type=int, default=200,
+                            help='Clients simultanés (200 par défaut).')
+        parser.add_argument('--threads', type=int, default=16,
+                            help='Threads du serveur WSGI simulé (16 par défaut).')
+        parser.add_argument('--url', action='append', dest='urls',
+                            help='URL à demander (répétable) ; par défaut les listes, détails et tableau de bord.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['email']}")
+        if options['requetes'] < 1 or options['concurrence'] < 1 or options['threads'] < 1:
+            raise CommandError('--requetes, --concurrence et --threads doivent être positifs.')
+        if settings.DEBUG:
+            self.stderr.write('DEBUG est actif : les requêtes SQL sont journalisées, les mesures en sont alourdies.')
+
+        urls = options['urls'] or self._urls(user)
+        client = Client()
+        client.force_login(user)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session}'
+
+        try:
+            resultats = [
+                ('WSGI', asyncio.run(self._wsgi(urls, cookie, options))),
+                ('ASGI', asyncio.run(self._asgi(urls, cookie, options))),
+            ]
+        finally:
+            client.logout()
+
+        self.stdout.write(
+            f"{options['requetes']} requêtes, {options['concurrence']} clients simultanés, "
+            f"{len(urls)} URL{'s' if len(urls) > 1 else ''}"
+        )
+        self.stdout.write(f"{'mode':<6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'erreurs':>10}")
+        for mode, (duree, latences, erreurs) in resultats:
+            latences.sort()
+            self.stdout.write(
+                f'{mode:<6}{len(latences) / duree:>10.1f}'
+                f'{statistics.median(latences) * 1000:>10.1f}'
+                f'{latences[int(len(latences) * 0.95) - 1] * 1000:>10.1f}'
+                f'{latences[-1] * 1000:>10.1f}{erreurs:>10}'
+            )
+
+    def _urls(self, user):
+        urls = [reverse('tasks:liste'), reverse('projects:liste'), reverse('tableau_de_bord')]
+        projet = Projet.objects.filter(proprietaire=user).order_by('pk').first()
+        tache = Tache.objects.filter(projet__proprietaire=user).order_by('pk').first()
+        if projet is not None:
+            urls.append(reverse('projects:detail', args=[projet.pk]))
+        if tache is not None:
+            urls.append(reverse('tasks:detail', args=[tache.pk]))
+        return urls
+
+    async def _charge(self, appeler, urls, options):
+        """
+        Boucle fermée : chaque client enchaîne ses requêtes dès la réponse
+        précédente. La latence inclut l'attente d'un thread ou de la boucle.
+        """
+        restantes = iter(range(options['requetes']))
+        latences, erreurs = [], 0
+
+        async def client():
+            nonlocal erreurs
+            for numero in restantes:
+                debut = time.perf_counter()
+                statut = await appeler(urls[numero % len(urls)])
+                latences.append(time.perf_counter() - debut)
+                if statut != 200:
+                    erreurs += 1
+
+        # Préchauffage : imports, templates compilés, cache des indicateurs
+        for url in urls:
+            await appeler(url)
+
+        debut = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(options['concurrence'])))
+        return time.perf_counter() - debut, latences, erreurs
+
+    async def _wsgi(self, urls, cookie, options):
+        application = get_wsgi_application()
+        boucle = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            try:
+                return await self._charge(
+                    lambda url: boucle.run_in_executor(pool, appel_wsgi, application, url, cookie),
+                    urls, options
+                )
+            finally:
+                # Connexions ouvertes par les threads du pool
+                for _ in range(options['threads']):
+                    pool.submit(connections.close_all)
+
+    async def _asgi(self, urls, cookie, options):
+        application = get_asgi_application()
+        return await self._charge(
+            lambda url: appel_asgi(application, url, cookie), urls, options
+        )
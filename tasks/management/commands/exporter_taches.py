@@ -0,0 +1,57 @@
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.export import FORMATS, ExportError, flux_export, taches_a_exporter
+
+
+class Command(BaseCommand):
+    help = "Exporte en flux les tâches d'un utilisateur (CSV ou NDJSON, gzip en option)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help="Email du propriétaire des tâches.")
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compresser la sortie (gzip).')
+        parser.add_argument('--output', '-o', help='Fichier de sortie (sortie standard par défaut).')
+        parser.add_argument('--projet', help='Identifiant du projet.')
+        parser.add_argument('--statut')
+        parser.add_argument('--priorite')
+        parser.add_argument('--echeance-apres', help='Date (AAAA-MM-JJ) ou date et heure ISO 8601.')
+        parser.add_argument('--echeance-avant', help='Date (AAAA-MM-JJ) ou date et heure ISO 8601.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['email']}")
+
+        try:
+            taches = taches_a_exporter(
+                user,
+                projet_id=options['projet'],
+                statut=options['statut'],
+                priorite=options['priorite'],
+                echeance_apres=options['echeance_apres'],
+                echeance_avant=options['echeance_avant'],
+            )
+            flux = flux_export(taches, format=options['format'], gzip=options['gzip'])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        debut = time.perf_counter()
+        taille = 0
+        sortie = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for bloc in flux:
+                sortie.write(bloc)
+                taille += len(bloc)
+        finally:
+            if options['output']:
+                sortie.close()
+            else:
+                sortie.flush()
+
+        duree = time.perf_counter() - debut
+        self.stderr.write(f'{taille} octets écrits en {duree:.2f} s.')
@@ -0,0 +1,55 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importation import (
+    TAILLE_LOT_INSERTION, ImportationError, format_depuis_nom, importer_taches,
+)
+
+
+class Command(BaseCommand):
+    help = "Importe en masse des tâches depuis un fichier CSV ou NDJSON (JSON Lines)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email du propriétaire des projets cibles.')
+        parser.add_argument('fichier', help='Fichier à importer (UTF-8).')
+        parser.add_argument('--format', choices=('csv', 'ndjson', 'jsonl'),
+                            help="Format du fichier (déduit de l'extension par défaut).")
+        parser.add_argument('--workers', type=int,
+                            help="Processus d'analyse (nombre de processeurs par défaut).")
+        parser.add_argument('--batch-size', type=int, default=TAILLE_LOT_INSERTION,
+                            help='Lignes par requête INSERT.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Valider le fichier sans rien écrire.')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['email']}")
+
+        try:
+            with open(options['fichier'], 'rb') as fichier:
+                rapport = importer_taches(
+                    user,
+                    fichier,
+                    format=options['format'] or format_depuis_nom(options['fichier']),
+                    workers=options['workers'] or os.cpu_count() or 1,
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                )
+        except (OSError, ImportationError) as e:
+            raise CommandError(str(e))
+
+        for erreur in sorted(rapport.erreurs, key=lambda erreur: erreur['ligne']):
+            self.stderr.write(f"Ligne {erreur['ligne']} : {' '.join(erreur['erreurs'])}")
+        if rapport.nb_erreurs > len(rapport.erreurs):
+            self.stderr.write(f'... {rapport.nb_erreurs - len(rapport.erreurs)} autres erreurs.')
+
+        style = self.style.SUCCESS if not rapport.nb_erreurs else self.style.WARNING
+        self.stdout.write(style(
+            f'{rapport.importees} tâches importées sur {rapport.lignes} lignes '
+            f'({rapport.nb_erreurs} erreurs) en {rapport.duree:.2f} s, '
+            f'soit {rapport.lignes_par_seconde:.0f} lignes/s.'
+        ))
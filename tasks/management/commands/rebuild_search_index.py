@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des tâches (FTS5)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-optimize',
+            action='store_true',
+            help="Ne pas fusionner les segments de l'index après reconstruction.",
+        )
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write(self.style.WARNING("FTS5 n'est disponible que sur SQLite : rien à faire."))
+            return
+
+        debut = time.perf_counter()
+        total = rebuild_index(optimize=not options['no_optimize'])
+        duree = time.perf_counter() - debut
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} tâches indexées en {duree:.2f} s.'
+        ))
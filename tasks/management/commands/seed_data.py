@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.generation import EXPOSANT_ZIPF, MOT_DE_PASSE, generer
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère des données synthétiques reproductibles : N utilisateurs, M projets par "
+        "utilisateur, K tâches par projet en moyenne (tailles selon une loi de Zipf)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--utilisateurs', type=int, default=100, help='Utilisateurs (100 par défaut).')
+        parser.add_argument('--projets', type=int, default=10,
+                            help='Projets par utilisateur (10 par défaut).')
+        parser.add_argument('--taches', type=int, default=50,
+                            help='Tâches par projet en moyenne (50 par défaut).')
+        parser.add_argument('--graine', type=int, default=0, help='Graine du générateur (0 par défaut).')
+        parser.add_argument('--zipf', type=float, default=EXPOSANT_ZIPF,
+                            help=f'Exposant de la loi de Zipf des tailles de projet ({EXPOSANT_ZIPF} par défaut, '
+                                 '0 pour des tailles égales).')
+        parser.add_argument('--mot-de-passe', default=MOT_DE_PASSE,
+                            help='Mot de passe commun des utilisateurs générés.')
+        parser.add_argument('--sans-index', action='store_true',
+                            help="Ne pas alimenter l'index plein texte (à reconstruire par rebuild_search_index).")
+
+    def handle(self, *args, **options):
+        if options['utilisateurs'] < 1 or options['projets'] < 0 or options['taches'] < 0:
+            raise CommandError('--utilisateurs doit être positif, --projets et --taches positifs ou nuls.')
+        if options['zipf'] < 0:
+            raise CommandError('--zipf doit être positif ou nul.')
+
+        def progression(rapport):
+            self.stdout.write(
+                f'{rapport.projets} projets, {rapport.taches} tâches '
+                f'({rapport.taches_par_seconde:.0f} tâches/s)'
+            )
+
+        rapport = generer(
+            options['utilisateurs'], options['projets'], options['taches'],
+            graine=options['graine'], exposant=options['zipf'], mot_de_passe=options['mot_de_passe'],
+            indexer=not options['sans_index'], progression=progression if options['verbosity'] > 0 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{rapport.utilisateurs} utilisateurs, {rapport.projets} projets et {rapport.taches} tâches '
+            f'générés en {rapport.duree:.2f} s, soit {rapport.taches_par_seconde:.0f} tâches/s.'
+        ))
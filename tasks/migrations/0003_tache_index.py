@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_projet_index'),
+        ('tasks', '0002_tache_date_accomplissement_tache_priorite'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['projet', 'statut', 'date_creation'], name='tache_projet_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['projet', '-date_creation', '-id'], name='tache_projet_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['assigne_a', 'statut'], name='tache_assigne_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['cree_par', '-date_creation'], name='tache_cree_par_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['-date_creation', '-id'], name='tache_date_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(condition=models.Q(('statut', 'terminee'), _negated=True), fields=['date_echeance'], name='tache_ouverte_echeance_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def creer_index_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_tache_fts USING fts5("
+        "titre, description, proprietaire, "
+        "tokenize = 'unicode61 remove_diacritics 2', "
+        # Index de préfixes : la recherche "mot*" ne parcourt pas tout le vocabulaire
+        "prefix = '2 3 4')"
+    )
+    schema_editor.execute(
+        "INSERT INTO tasks_tache_fts(rowid, titre, description, proprietaire) "
+        "SELECT t.id, t.titre, t.description, 'u' || p.proprietaire_id "
+        "FROM tasks_tache t INNER JOIN projects_projet p ON p.id = t.projet_id"
+    )
+
+
+def supprimer_index_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS tasks_tache_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_projet_index'),
+        ('tasks', '0003_tache_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index_fts, supprimer_index_fts),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def initialiser_compteurs(apps, schema_editor):
+    Projet = apps.get_model('projects', 'Projet')
+    ouvertes_en_retard = ~Q(taches__statut='terminee') & Q(taches__date_echeance__lt=timezone.now())
+    projets = Projet.objects.annotate(
+        calc_taches=Count('taches'),
+        calc_a_faire=Count('taches', filter=Q(taches__statut='a_faire')),
+        calc_en_cours=Count('taches', filter=Q(taches__statut='en_cours')),
+        calc_terminees=Count('taches', filter=Q(taches__statut='terminee')),
+        calc_en_retard=Count('taches', filter=ouvertes_en_retard),
+    )
+    for projet in projets:
+        projet.nb_taches = projet.calc_taches
+        projet.nb_a_faire = projet.calc_a_faire
+        projet.nb_en_cours = projet.calc_en_cours
+        projet.nb_terminees = projet.calc_terminees
+        projet.nb_en_retard = projet.calc_en_retard
+        projet.save(update_fields=[
+            'nb_taches', 'nb_a_faire', 'nb_en_cours', 'nb_terminees', 'nb_en_retard'
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_projet_compteurs'),
+        ('tasks', '0004_tache_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(initialiser_compteurs, migrations.RunPython.noop),
+    ]
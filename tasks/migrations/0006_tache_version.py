@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_initialiser_compteurs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tache',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='version'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_projet_sequence'),
+        ('tasks', '0006_tache_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tache',
+            name='sequence',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='séquence'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['projet', 'sequence', 'id'], name='tache_projet_seq_idx'),
+        ),
+    ]
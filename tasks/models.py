@@ -1,7 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from projects.models import Projet
+from sync.models import prochaine_sequence
+from .counters import contribution, appliquer_changement
+
+# Champs dont dépendent les compteurs dénormalisés de Projet
+CHAMPS_COMPTEURS = ('projet', 'projet_id', 'statut', 'date_echeance')
 
 class Tache(models.Model):
     """
@@ -57,11 +63,82 @@ class Tache(models.Model):
         related_name='taches_assignees',
         verbose_name=_('assigné à')
     )
+    # Incrémentée à chaque écriture : détection des modifications concurrentes
+    version = models.PositiveIntegerField(_('version'), default=1, editable=False)
+    # Position de la dernière écriture dans la séquence globale (flux de changements)
+    sequence = models.BigIntegerField(_('séquence'), default=0, editable=False)
 
     class Meta:
         verbose_name = _('tâche')
         verbose_name_plural = _('tâches')
         ordering = ['-date_creation']
+        # Index composites alignés sur les chemins d'accès des vues
+        # (filtre propriétaire/statut/assignation, tri par date de création)
+        indexes = [
+            models.Index(fields=['projet', 'statut', 'date_creation'], name='tache_projet_statut_date_idx'),
+            models.Index(fields=['projet', '-date_creation', '-id'], name='tache_projet_date_idx'),
+            models.Index(fields=['assigne_a', 'statut'], name='tache_assigne_statut_idx'),
+            models.Index(fields=['cree_par', '-date_creation'], name='tache_cree_par_date_idx'),
+            models.Index(fields=['-date_creation', '-id'], name='tache_date_creation_idx'),
+            models.Index(
+                fields=['date_echeance'],
+                name='tache_ouverte_echeance_idx',
+                condition=~Q(statut='terminee'),
+            ),
+            models.Index(fields=['projet', 'sequence', 'id'], name='tache_projet_seq_idx'),
+        ]
 
     def __str__(self):
         return self.titre
+
+    @property
+    def termine(self):
+        return self.statut == self.StatutTache.TERMINEE
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Mémorise l'état chargé pour calculer les deltas de compteurs sans relecture
+        if {'projet_id', 'statut', 'date_echeance'}.issubset(instance.__dict__):
+            instance._contribution_initiale = instance.contribution_compteurs()
+        return instance
+
+    def contribution_compteurs(self):
+        return contribution(self.projet_id, self.statut, self.date_echeance)
+
+    def _contribution_en_base(self):
+        if self.pk is None:
+            return None
+        if not self._state.adding and hasattr(self, '_contribution_initiale'):
+            return self._contribution_initiale
+        etat = Tache.objects.filter(pk=self.pk).values_list('projet_id', 'statut', 'date_echeance').first()
+        return contribution(*etat) if etat else None
+
+    def save(self, *args, **kwargs):
+        # Toute écriture fait avancer la version, de façon atomique en base
+        incrementer = not self._state.adding
+        if incrementer:
+            self.version = F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version', 'sequence'}
+        try:
+            # La séquence est réservée dans la transaction de l'écriture
+            with transaction.atomic():
+                self.sequence = prochaine_sequence()
+                self._enregistrer(*args, **kwargs)
+        finally:
+            if incrementer:
+                # Valeur inconnue après l'UPDATE : relue à la demande
+                self.__dict__.pop('version', None)
+
+    def _enregistrer(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & set(CHAMPS_COMPTEURS):
+            return super().save(*args, **kwargs)
+
+        # Enregistrement et compteurs du projet dans la même transaction
+        avant = self._contribution_en_base()
+        super().save(*args, **kwargs)
+        apres = self.contribution_compteurs()
+        appliquer_changement(avant, apres)
+        self._contribution_initiale = apres
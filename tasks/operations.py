@@ -0,0 +1,167 @@
+"""
+Opérations groupées sur les tâches : statut, assignation, déplacement et suppression.
+
+Chaque opération s'exécute en une seule instruction UPDATE ou DELETE sur la
+sélection, toujours restreinte aux projets de l'utilisateur. Les signaux ne
+sont pas émis : compteurs des projets concernés, index plein texte, flux de
+changements, tableau de bord, cache applicatif et métriques sont mis à jour
+ici, dans la même transaction.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from sync.models import Suppression, enregistrer_suppressions, prochaine_sequence
+from todolist.cache import ESPACES_TACHE, invalider
+from todolist.metriques import MODIFICATION, SUPPRESSION, compter_mutations
+from .counters import recalculer_compteurs
+from .dashboard import invalider_indicateurs
+from .export import ExportError, taches_filtrees
+from .models import Tache
+from .search import unindex_queryset
+
+OPERATIONS = ('statut', 'assigner', 'deplacer', 'supprimer')
+
+# Nombre maximal d'ids par sélection explicite (au-delà, utiliser un filtre)
+MAX_IDS = 1000
+
+# Clés acceptées dans un filtre, et argument correspondant de taches_filtrees
+FILTRES = {
+    'projet': 'projet_id',
+    'statut': 'statut',
+    'priorite': 'priorite',
+    'echeance_apres': 'echeance_apres',
+    'echeance_avant': 'echeance_avant',
+}
+
+
+class OperationError(ValueError):
+    """Sélection ou paramètre d'opération groupée invalide."""
+
+
+def selection_taches(user, ids=None, filtre=None):
+    """
+    Sélection des tâches de l'utilisateur, par liste d'ids ou par filtre
+    (dictionnaire dont les clés sont celles de FILTRES).
+    """
+    if ids is not None:
+        if len(ids) > MAX_IDS:
+            raise OperationError(f'{MAX_IDS} tâches au plus par sélection.')
+        return Tache.objects.filter(projet__proprietaire=user, pk__in=ids)
+    if filtre is None:
+        raise OperationError('Une liste d\'ids ou un filtre est obligatoire.')
+
+    inconnus = set(filtre) - set(FILTRES)
+    if inconnus:
+        raise OperationError(f"Filtres inconnus : {', '.join(sorted(inconnus))}.")
+    try:
+        return taches_filtrees(user, **{FILTRES[cle]: valeur for cle, valeur in filtre.items()})
+    except ExportError as e:
+        raise OperationError(str(e))
+
+
+def _portee(taches):
+    """Projets et créateurs touchés par la sélection (compteurs et tableaux de bord)."""
+    projets, createurs = set(), set()
+    for projet_id, cree_par_id in taches.order_by().values_list('projet_id', 'cree_par_id').distinct():
+        projets.add(projet_id)
+        createurs.add(cree_par_id)
+    return projets, createurs
+
+
+def _mettre_a_jour(user, taches, compteurs=True, projets_cibles=(), **valeurs):
+    """UPDATE unique sur la sélection ; retourne le nombre de tâches modifiées."""
+    valeurs.update(version=F('version') + 1, date_mise_a_jour=timezone.now())
+    with transaction.atomic():
+        projets, createurs = _portee(taches) if compteurs else (set(), set())
+        traitees = taches.update(**valeurs, sequence=prochaine_sequence())
+        if traitees and compteurs:
+            recalculer_compteurs(projets | set(projets_cibles))
+    if traitees:
+        invalider_indicateurs(user.pk, *createurs)
+        invalider(ESPACES_TACHE, user.pk)
+        compter_mutations(MODIFICATION, traitees)
+    return traitees
+
+
+def changer_statut(user, taches, statut):
+    """
+    Passe la sélection au statut donné. La date d'accomplissement est posée
+    pour les tâches qui deviennent terminées, effacée pour celles qui ne le
+    sont plus ; les tâches déjà au bon statut ne sont pas modifiées.
+    """
+    if statut not in Tache.StatutTache.values:
+        raise OperationError(f'Statut inconnu : {statut}.')
+    est_terminee = statut == Tache.StatutTache.TERMINEE
+    return _mettre_a_jour(
+        user,
+        taches.exclude(statut=statut),
+        statut=statut,
+        date_accomplissement=timezone.now() if est_terminee else None,
+    )
+
+
+def assigner(user, taches, assigne_a):
+    """Assigne la sélection à un utilisateur (None pour retirer l'assignation)."""
+    return _mettre_a_jour(
+        user, taches.exclude(assigne_a=assigne_a), compteurs=False, assigne_a=assigne_a
+    )
+
+
+def deplacer(user, taches, projet):
+    """Déplace la sélection vers un autre projet de l'utilisateur."""
+    if projet.proprietaire_id != user.pk:
+        raise OperationError('Projet invalide.')
+    return _mettre_a_jour(
+        user, taches.exclude(projet=projet), projets_cibles=[projet.pk], projet=projet
+    )
+
+
+def _delete_direct(taches):
+    """
+    DELETE direct de la sélection, sans chargement des instances ni signaux ;
+    retourne le nombre de lignes supprimées.
+
+    QuerySet._raw_delete est une API privée de Django (celle de ses
+    suppressions rapides) : une mise à jour de Django peut la modifier ou la
+    retirer, ce que vérifie OperationsGroupeesTests.test_delete_direct. Elle
+    ne convient que tant que Tache n'est la cible d'aucune clé étrangère :
+    sinon, revenir à .delete().
+    """
+    return taches._raw_delete(taches.db)
+
+
+def supprimer(user, taches):
+    """Supprime la sélection en une instruction DELETE."""
+    taches = taches.order_by()
+    with transaction.atomic():
+        projets, createurs = _portee(taches)
+        enregistrer_suppressions(Suppression.TypeObjet.TACHE, taches, user.pk)
+        unindex_queryset(taches)
+        traitees = _delete_direct(taches)
+        if traitees:
+            recalculer_compteurs(projets)
+    if traitees:
+        invalider_indicateurs(user.pk, *createurs)
+        invalider(ESPACES_TACHE, user.pk)
+        compter_mutations(SUPPRESSION, traitees)
+    return traitees
+
+
+def executer(user, operation, ids=None, filtre=None, statut=None, assigne_a=None, projet=None):
+    """
+    Point d'entrée commun à l'API et aux vues : applique l'opération à la
+    sélection et retourne le nombre de tâches traitées.
+    """
+    taches = selection_taches(user, ids=ids, filtre=filtre)
+    if operation == 'statut':
+        return changer_statut(user, taches, statut)
+    if operation == 'assigner':
+        return assigner(user, taches, assigne_a)
+    if operation == 'deplacer':
+        if projet is None:
+            raise OperationError('Projet obligatoire.')
+        return deplacer(user, taches, projet)
+    if operation == 'supprimer':
+        return supprimer(user, taches)
+    raise OperationError(f'Opération inconnue : {operation}.')
@@ -0,0 +1,184 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+# Nombre de tâches affichées par page
+PAGE_SIZE = 25
+
+# Au-delà de ce seuil, le total affiché n'est qu'une estimation ("1000+")
+COUNT_LIMIT = 1000
+
+
+class InvalidCursor(ValueError):
+    """Levée lorsqu'un curseur de pagination est illisible ou altéré."""
+
+
+def encode_cursor(direction, date_creation, pk):
+    """Encode une position (sens, date_creation, id) en curseur opaque."""
+    payload = json.dumps([direction, date_creation.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Décode un curseur opaque et retourne le tuple (sens, date_creation, id)."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, date_creation, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        date_creation = parse_datetime(date_creation)
+    except (binascii.Error, TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if direction not in ('suivant', 'precedent') or date_creation is None or not isinstance(pk, int):
+        raise InvalidCursor(cursor)
+    return direction, date_creation, pk
+
+
+def _cle(obj):
+    """Clé de pagination d'une instance ou d'une ligne values()."""
+    if isinstance(obj, dict):
+        return obj['date_creation'], obj['id']
+    return obj.date_creation, obj.pk
+
+
+class KeysetPage:
+    """
+    Page de résultats obtenue par pagination par clé (keyset).
+    Le coût d'une page ne dépend pas de sa position dans la liste.
+    """
+
+    def __init__(self, object_list, queryset, has_next, has_previous, count_limit):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self._queryset = queryset
+        self._count_limit = count_limit
+
+    def __getstate__(self):
+        """
+        Une page mise en cache emporte son décompte (s'il peut être affiché)
+        mais pas son QuerySet : le sérialiser l'évaluerait en entier.
+        """
+        etat = dict(self.__dict__, _queryset=None)
+        if self.has_other_pages():
+            etat['estimated_count'] = self.estimated_count
+        return etat
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        if not self.has_next or not self.object_list:
+            return None
+        return encode_cursor('suivant', *_cle(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous or not self.object_list:
+            return None
+        return encode_cursor('precedent', *_cle(self.object_list[0]))
+
+    @cached_property
+    def estimated_count(self):
+        """
+        Nombre de résultats plafonné à count_limit + 1 : la sous-requête
+        limitée évite un COUNT(*) sur l'ensemble de la table.
+        Évalué uniquement si le template l'affiche.
+        """
+        if not self.has_other_pages():
+            # Page unique : le nombre de résultats est connu
+            return len(self.object_list)
+        return self._queryset_compte().count()
+
+    def _queryset_compte(self):
+        return self._queryset.order_by()[:self._count_limit + 1]
+
+    @property
+    def count_is_estimate(self):
+        return self.estimated_count > self._count_limit
+
+    @property
+    def displayed_count(self):
+        return min(self.estimated_count, self._count_limit)
+
+
+class KeysetPaginator:
+    """
+    Pagine un QuerySet sur le couple (date_creation, id), du plus récent au plus ancien.
+    Le QuerySet peut retourner des instances ou des dictionnaires (values()),
+    à condition d'inclure date_creation et id.
+    """
+
+    def __init__(self, queryset, per_page=PAGE_SIZE, count_limit=COUNT_LIMIT):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.count_limit = count_limit
+
+    def _position(self, cursor):
+        """Retourne (sens, QuerySet de la page) pour le curseur donné."""
+        try:
+            direction, date_creation, pk = decode_cursor(cursor) if cursor else (None, None, None)
+        except InvalidCursor:
+            direction = None
+
+        if direction == 'suivant':
+            qs = self.queryset.filter(
+                Q(date_creation__lt=date_creation) | Q(date_creation=date_creation, id__lt=pk)
+            ).order_by('-date_creation', '-id')
+        elif direction == 'precedent':
+            qs = self.queryset.filter(
+                Q(date_creation__gt=date_creation) | Q(date_creation=date_creation, id__gt=pk)
+            ).order_by('date_creation', 'id')
+        else:
+            qs = self.queryset.order_by('-date_creation', '-id')
+        return direction, qs[:self.per_page + 1]
+
+    def _page(self, direction, rows):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == 'precedent':
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, direction == 'suivant'
+
+        return KeysetPage(rows, self.queryset, has_next, has_previous, self.count_limit)
+
+    def get_page(self, cursor=None):
+        """
+        Retourne la page désignée par le curseur, ou la première page
+        si le curseur est absent ou invalide.
+        """
+        direction, qs = self._position(cursor)
+        rows = list(qs)
+        if direction and not rows:
+            # Position disparue (tâches supprimées) : retour au début
+            return self.get_page()
+        return self._page(direction, rows)
+
+    async def aget_page(self, cursor=None):
+        """
+        Équivalent asynchrone de get_page. Le nombre de résultats, que le
+        template n'affiche qu'en présence d'autres pages, est alors calculé
+        ici : il ne peut plus l'être paresseusement pendant le rendu.
+        """
+        direction, qs = self._position(cursor)
+        rows = [row async for row in qs]
+        if direction and not rows:
+            return await self.aget_page()
+        page = self._page(direction, rows)
+        if page.has_other_pages():
+            page.estimated_count = await page._queryset_compte().acount()
+        return page
@@ -0,0 +1,206 @@
+"""
+Recherche plein texte des tâches, adossée à une table virtuelle SQLite FTS5.
+
+La table fantôme tasks_tache_fts reprend le titre et la description de chaque
+tâche (rowid = id de la tâche) ainsi qu'un jeton propriétaire ("u<id>") :
+la restriction au propriétaire se fait dans l'index lui-même, par
+intersection des listes de postings, et non après coup sur les résultats.
+"""
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Tache
+
+FTS_TABLE = 'tasks_tache_fts'
+
+# Nombre maximal de résultats retournés par une recherche
+SEARCH_LIMIT = 50
+
+# Nombre d'ids par requête d'indexation (limite de paramètres SQLite : 999)
+TAILLE_LOT = 500
+
+# Pondération bm25 : titre, description, propriétaire
+_BM25_WEIGHTS = (10.0, 1.0, 0.0)
+
+# Délimiteurs temporaires des extraits, remplacés par <mark> après échappement
+_MARK_START, _MARK_END = '\x02', '\x03'
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+_SELECT_SOURCE = f"""
+    SELECT t.id, t.titre, t.description, 'u' || p.proprietaire_id
+    FROM {Tache._meta.db_table} t
+    INNER JOIN projects_projet p ON p.id = t.projet_id
+"""
+
+
+def fts_available():
+    """La recherche FTS5 n'est disponible que sur SQLite."""
+    return connection.vendor == 'sqlite'
+
+
+def owner_token(user_id):
+    return f'u{user_id}'
+
+
+def build_match_query(query):
+    """
+    Convertit une saisie utilisateur en expression MATCH FTS5 sûre :
+    chaque mot devient une phrase entre guillemets, le dernier est un préfixe.
+    Retourne None si la saisie ne contient aucun mot.
+    """
+    terms = _TERM.findall(query or '')
+    if not terms:
+        return None
+    phrases = [f'"{term}"' for term in terms]
+    phrases[-1] += '*'
+    return ' '.join(phrases)
+
+
+def _lots(tache_ids):
+    """Découpe les ids en lots compatibles avec la limite de paramètres de SQLite."""
+    tache_ids = list(tache_ids)
+    for debut in range(0, len(tache_ids), TAILLE_LOT):
+        yield tache_ids[debut:debut + TAILLE_LOT]
+
+
+def index_taches(tache_ids):
+    """(Ré)indexe les tâches données, en une requête par lot de TAILLE_LOT."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        for lot in _lots(tache_ids):
+            placeholders = ', '.join(['%s'] * len(lot))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', lot)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, titre, description, proprietaire) '
+                f'{_SELECT_SOURCE} WHERE t.id IN ({placeholders})',
+                lot
+            )
+
+
+def index_queryset(queryset):
+    """(Ré)indexe les tâches d'un QuerySet, en deux requêtes (sous-requête SQL)."""
+    if not fts_available():
+        return
+    sql, params = queryset.order_by().values('id').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({sql})', params)
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, titre, description, proprietaire) '
+            f'{_SELECT_SOURCE} WHERE t.id IN ({sql})',
+            params
+        )
+
+
+def unindex_taches(tache_ids):
+    """Retire les tâches données de l'index."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        for lot in _lots(tache_ids):
+            placeholders = ', '.join(['%s'] * len(lot))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', lot)
+
+
+def unindex_queryset(queryset):
+    """Retire de l'index les tâches d'un QuerySet, en une requête (sous-requête SQL)."""
+    if not fts_available():
+        return
+    sql, params = queryset.order_by().values('id').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({sql})', params)
+
+
+def rebuild_index(optimize=True):
+    """
+    Reconstruit entièrement l'index en une seule instruction INSERT ... SELECT.
+    Retourne le nombre de tâches indexées.
+    """
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(f'INSERT INTO {FTS_TABLE}(rowid, titre, description, proprietaire) {_SELECT_SOURCE}')
+        if optimize:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def _highlight(snippet):
+    """Échappe un extrait FTS5 puis transforme les délimiteurs en <mark>."""
+    html = escape(snippet).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def search_taches(user, query, limit=SEARCH_LIMIT):
+    """
+    Recherche les tâches de l'utilisateur correspondant à la saisie.
+
+    Returns:
+        Une liste de dictionnaires (id, titre, projet_id, projet_titre, statut,
+        extrait_titre, extrait_description), triée par pertinence bm25.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+
+    if not fts_available():
+        return _search_fallback(user, query, limit)
+
+    # La colonne propriétaire fait partie de l'expression MATCH ; la saisie est
+    # restreinte aux colonnes de texte (sinon « u<id> » trouverait le jeton)
+    match = f'proprietaire:{owner_token(user.pk)} AND {{titre description}}:({match})'
+    sql = f"""
+        SELECT t.id, t.statut, p.id, p.titre,
+               highlight({FTS_TABLE}, 0, %s, %s),
+               snippet({FTS_TABLE}, 1, %s, %s, '…', 16)
+        FROM {FTS_TABLE}
+        INNER JOIN {Tache._meta.db_table} t ON t.id = {FTS_TABLE}.rowid
+        INNER JOIN projects_projet p ON p.id = t.projet_id
+        WHERE {FTS_TABLE} MATCH %s
+        ORDER BY bm25({FTS_TABLE}, {', '.join(str(w) for w in _BM25_WEIGHTS)})
+        LIMIT %s
+    """
+    params = [_MARK_START, _MARK_END, _MARK_START, _MARK_END, match, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'id': tache_id,
+            'statut': statut,
+            'projet_id': projet_id,
+            'projet_titre': projet_titre,
+            'extrait_titre': _highlight(titre),
+            'extrait_description': _highlight(description),
+        }
+        for tache_id, statut, projet_id, projet_titre, titre, description in rows
+    ]
+
+
+def _search_fallback(user, query, limit):
+    """Recherche par icontains pour les bases sans FTS5."""
+    from django.db.models import Q
+
+    taches = Tache.objects.filter(projet__proprietaire=user)
+    for term in _TERM.findall(query):
+        taches = taches.filter(Q(titre__icontains=term) | Q(description__icontains=term))
+    return [
+        {
+            'id': tache['id'],
+            'statut': tache['statut'],
+            'projet_id': tache['projet_id'],
+            'projet_titre': tache['projet__titre'],
+            'extrait_titre': escape(tache['titre']),
+            'extrait_description': escape(tache['description'][:120]),
+        }
+        for tache in taches.values(
+            'id', 'statut', 'projet_id', 'projet__titre', 'titre', 'description'
+        )[:limit]
+    ]
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from projects.models import Projet
+from .models import Tache
+from .operations import MAX_IDS, OPERATIONS
+
+
+class TacheSerializer(serializers.ModelSerializer):
+    """Validation des écritures de tâches, limitées aux projets de l'utilisateur."""
+    projet = serializers.PrimaryKeyRelatedField(queryset=Projet.objects.none())
+    assigne_a = serializers.PrimaryKeyRelatedField(
+        queryset=get_user_model().objects.all(), allow_null=True, required=False
+    )
+
+    class Meta:
+        model = Tache
+        fields = ['titre', 'description', 'statut', 'priorite', 'projet', 'date_echeance', 'assigne_a']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is not None:
+            self.fields['projet'].queryset = Projet.objects.filter(proprietaire=request.user)
+
+
+class OperationGroupeeSerializer(serializers.Serializer):
+    """Opération groupée : sélection (ids ou filtre) et paramètre de l'opération."""
+    operation = serializers.ChoiceField(choices=OPERATIONS)
+    ids = serializers.ListField(child=serializers.IntegerField(), max_length=MAX_IDS, required=False)
+    filtre = serializers.DictField(required=False)
+    statut = serializers.ChoiceField(choices=Tache.StatutTache.choices, required=False)
+    assigne_a = serializers.PrimaryKeyRelatedField(
+        queryset=get_user_model().objects.all(), allow_null=True, required=False
+    )
+    projet = serializers.PrimaryKeyRelatedField(queryset=Projet.objects.none(), required=False)
+
+    # Paramètre obligatoire de chaque opération
+    PARAMETRES = {'statut': 'statut', 'assigner': 'assigne_a', 'deplacer': 'projet'}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is not None:
+            self.fields['projet'].queryset = Projet.objects.filter(proprietaire=request.user)
+
+    def validate(self, data):
+        if ('ids' in data) == ('filtre' in data):
+            raise serializers.ValidationError('Indiquer soit ids, soit filtre.')
+        parametre = self.PARAMETRES.get(data['operation'])
+        if parametre and parametre not in data:
+            raise serializers.ValidationError({parametre: 'Obligatoire pour cette opération.'})
+        return data
@@ -0,0 +1,112 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from projects.models import Projet
+from todolist.cache import ESPACES_PROJET, ESPACES_TACHE, invalider
+from todolist.metriques import CREATION, MODIFICATION, SUPPRESSION, compter_mutations
+from .counters import appliquer_changement
+from .dashboard import invalider_indicateurs
+from .models import Tache
+from .search import index_queryset, index_taches, unindex_taches
+
+
+@receiver(post_save, sender=Tache)
+def indexer_tache(sender, instance, raw=False, **kwargs):
+    """Maintient l'index plein texte à jour après chaque enregistrement."""
+    if raw:
+        return
+    index_taches([instance.pk])
+
+
+@receiver(post_delete, sender=Tache)
+def desindexer_tache(sender, instance, **kwargs):
+    """Retire la tâche supprimée de l'index plein texte."""
+    unindex_taches([instance.pk])
+
+
+@receiver(post_save, sender=Tache)
+@receiver(post_delete, sender=Tache)
+def compter_mutation(sender, instance, created=False, raw=False, signal=None, **kwargs):
+    """Compteur de mutations des métriques (todolist.metriques)."""
+    if raw:
+        return
+    if signal is post_delete:
+        compter_mutations(SUPPRESSION)
+    else:
+        compter_mutations(CREATION if created else MODIFICATION)
+
+
+@receiver(post_delete, sender=Tache)
+def decompter_tache(sender, instance, origin=None, **kwargs):
+    """
+    Décrémente les compteurs du projet (dans la transaction de suppression).
+    Inutile lorsque la suppression vient du projet lui-même.
+    """
+    if isinstance(origin, Projet) or getattr(origin, 'model', None) is Projet:
+        return
+    appliquer_changement(avant=instance.contribution_compteurs())
+
+
+def _proprietaires(tache, *projet_ids):
+    """Propriétaires des projets donnés, sans requête si le projet est déjà chargé."""
+    projet_ids = {projet_id for projet_id in projet_ids if projet_id is not None}
+    proprietaires = set()
+    if Tache._meta.get_field('projet').is_cached(tache) and tache.projet.pk in projet_ids:
+        proprietaires.add(tache.projet.proprietaire_id)
+        projet_ids.discard(tache.projet.pk)
+    if projet_ids:
+        proprietaires.update(
+            Projet.objects.filter(pk__in=projet_ids).values_list('proprietaire_id', flat=True)
+        )
+    return proprietaires
+
+
+@receiver(post_save, sender=Tache)
+def invalider_caches_tache(sender, instance, raw=False, **kwargs):
+    """
+    Invalide les indicateurs du propriétaire du projet (ancien et nouveau) et
+    du créateur, et les lectures en cache des propriétaires.
+    """
+    if raw:
+        return
+    initiale = getattr(instance, '_contribution_initiale', None)
+    ancien_projet_id = initiale[0] if initiale else None
+    proprietaires = _proprietaires(instance, instance.projet_id, ancien_projet_id)
+    invalider_indicateurs(instance.cree_par_id, *proprietaires)
+    invalider(ESPACES_TACHE, *proprietaires)
+
+
+@receiver(post_delete, sender=Tache)
+def invalider_caches_suppression(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Projet) or getattr(origin, 'model', None) is Projet:
+        # Le propriétaire est invalidé par la suppression du projet
+        invalider_indicateurs(instance.cree_par_id)
+        return
+    proprietaires = _proprietaires(instance, instance.projet_id)
+    invalider_indicateurs(instance.cree_par_id, *proprietaires)
+    invalider(ESPACES_TACHE, *proprietaires)
+
+
+@receiver(post_save, sender=Projet)
+@receiver(post_delete, sender=Projet)
+def invalider_caches_projet(sender, instance, update_fields=None, **kwargs):
+    invalider_indicateurs(instance.proprietaire_id)
+    if update_fields is not None and set(update_fields) <= set(Projet.CHAMPS_COMPTEURS):
+        # Compteurs seuls : déjà couverts par l'écriture des tâches
+        return
+    invalider(ESPACES_PROJET, instance.proprietaire_id)
+
+
+@receiver(post_save, sender=Projet)
+def reindexer_taches_projet(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Changement de propriétaire : le jeton propriétaire de l'index plein texte
+    suit le projet, et les caches de l'ancien propriétaire sont invalidés.
+    """
+    ancien = getattr(instance, '_proprietaire_initial', None)
+    instance._proprietaire_initial = instance.proprietaire_id
+    if created or raw or ancien is None or ancien == instance.proprietaire_id:
+        return
+    index_queryset(Tache.objects.filter(projet=instance))
+    invalider_indicateurs(ancien)
+    invalider(ESPACES_PROJET, ancien)
@@ -1,3 +1,863 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.template import Context, Template
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from projects.models import Projet
+from rbac.models import Role, UserRole, assign_role_to_user
+from . import banc_essai, operations
+from .generation import generer, tailles_zipf
+from .ecritures import ConflitVersion, modifier_tache as ecrire_tache
+from .importation import importer_taches
+from .models import Tache
+from .pagination import KeysetPaginator, decode_cursor, InvalidCursor
+from .search import build_match_query, rebuild_index, search_taches
+from .templatetags.task_filters import filter_statut
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        Tache.objects.bulk_create([
+            Tache(titre=f'Tâche {i}', projet=cls.projet, cree_par=cls.user)
+            for i in range(7)
+        ])
+        # Dates identiques : l'id sert de départage
+        cls.date = Tache.objects.first().date_creation
+        Tache.objects.update(date_creation=cls.date)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_parcours_complet_sans_doublon(self):
+        paginator = KeysetPaginator(Tache.objects.all(), per_page=3)
+        page = paginator.get_page()
+        vues = [t.id for t in page]
+        while page.has_next:
+            page = paginator.get_page(page.next_cursor)
+            vues.extend(t.id for t in page)
+        self.assertEqual(vues, sorted(Tache.objects.values_list('id', flat=True), reverse=True))
+
+    def test_retour_page_precedente(self):
+        paginator = KeysetPaginator(Tache.objects.all(), per_page=3)
+        premiere = paginator.get_page()
+        deuxieme = paginator.get_page(premiere.next_cursor)
+        retour = paginator.get_page(deuxieme.previous_cursor)
+        self.assertEqual([t.id for t in retour], [t.id for t in premiere])
+        self.assertFalse(retour.has_previous)
+        self.assertTrue(retour.has_next)
+
+    def test_total_estime_plafonne(self):
+        page = KeysetPaginator(Tache.objects.all(), per_page=3, count_limit=5).get_page()
+        self.assertTrue(page.count_is_estimate)
+        self.assertEqual(page.displayed_count, 5)
+
+    def test_curseur_invalide(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('pas-un-curseur')
+        page = KeysetPaginator(Tache.objects.all(), per_page=3).get_page('pas-un-curseur')
+        self.assertFalse(page.has_previous)
+
+    def test_vue_liste(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tasks:liste'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['taches']), 7)
+
+
+class RechercheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.bob = User.objects.create_user(
+            email='bob@example.com', password='motdepasse123',
+            first_name='Bob', last_name='Durand'
+        )
+        cls.projet = Projet.objects.create(titre='Site web', proprietaire=cls.alice)
+        cls.projet_bob = Projet.objects.create(titre='Autre', proprietaire=cls.bob)
+        cls.tache = Tache.objects.create(
+            titre='Rédiger la documentation', description='Documenter <l\'API> publique',
+            projet=cls.projet, cree_par=cls.alice
+        )
+        Tache.objects.create(titre='Documentation interne', projet=cls.projet_bob, cree_par=cls.bob)
+
+    def test_expression_match(self):
+        self.assertEqual(build_match_query('doc "api'), '"doc" "api"*')
+        self.assertIsNone(build_match_query(' "* '))
+
+    def test_recherche_limitee_au_proprietaire(self):
+        resultats = search_taches(self.alice, 'documentation')
+        self.assertEqual([r['id'] for r in resultats], [self.tache.id])
+
+    def test_accents_prefixe_et_extrait(self):
+        resultat, = search_taches(self.alice, 'redig')
+        self.assertIn('<mark>Rédiger</mark>', resultat['extrait_titre'])
+        resultat, = search_taches(self.alice, 'api')
+        self.assertIn('&lt;l&#x27;<mark>API</mark>&gt;', resultat['extrait_description'])
+
+    def test_synchronisation(self):
+        self.tache.titre = 'Planifier la réunion'
+        self.tache.save()
+        self.assertEqual(search_taches(self.alice, 'documentation'), [])
+        self.assertEqual(len(search_taches(self.alice, 'reunion')), 1)
+        self.tache.delete()
+        self.assertEqual(search_taches(self.alice, 'reunion'), [])
+
+    def test_jeton_proprietaire_non_recherchable(self):
+        for saisie in ('u', f'u{self.alice.pk}'):
+            self.assertEqual(search_taches(self.alice, saisie), [])
+
+    def test_changement_de_proprietaire(self):
+        projet = Projet.objects.get(pk=self.projet.pk)
+        projet.proprietaire = self.bob
+        projet.save()
+        self.assertEqual(search_taches(self.alice, 'documentation'), [])
+        self.assertEqual(len(search_taches(self.bob, 'documentation')), 2)
+
+    def test_reconstruction(self):
+        self.assertEqual(rebuild_index(), 2)
+        self.assertEqual(len(search_taches(self.bob, 'documentation')), 1)
+
+    def test_vue_recherche(self):
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse('tasks:recherche'), {'q': 'documentation'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['resultats']), 1)
+
+
+class CompteursProjetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        cls.autre = Projet.objects.create(titre='Autre', proprietaire=cls.user)
+
+    def compteurs(self, projet):
+        projet.refresh_from_db()
+        return [getattr(projet, champ) for champ in Projet.CHAMPS_COMPTEURS]
+
+    def test_creation_statut_deplacement_suppression(self):
+        hier = timezone.now() - timedelta(days=1)
+        tache = Tache.objects.create(titre='T', projet=self.projet, date_echeance=hier)
+        self.assertEqual(self.compteurs(self.projet), [1, 1, 0, 0, 1])
+
+        tache.statut = Tache.StatutTache.TERMINEE
+        tache.save()
+        self.assertEqual(self.compteurs(self.projet), [1, 0, 0, 1, 0])
+
+        tache = Tache.objects.get(pk=tache.pk)
+        tache.projet = self.autre
+        tache.save()
+        self.assertEqual(self.compteurs(self.projet), [0, 0, 0, 0, 0])
+        self.assertEqual(self.compteurs(self.autre), [1, 0, 0, 1, 0])
+
+        tache.delete()
+        self.assertEqual(self.compteurs(self.autre), [0, 0, 0, 0, 0])
+
+    def test_marquer_terminee(self):
+        tache = Tache.objects.create(titre='T', projet=self.projet)
+        self.client.force_login(self.user)
+        self.client.post(reverse('tasks:marquer_terminee', args=[tache.id]))
+        self.assertEqual(self.compteurs(self.projet), [1, 0, 0, 1, 0])
+
+    def test_sauvegarde_complete_preserve_les_compteurs(self):
+        # Instance chargée avant des incréments F() faits ailleurs
+        projet = Projet.objects.get(pk=self.projet.pk)
+        Tache.objects.create(titre='T', projet=self.projet)
+        projet.titre = 'Renommé'
+        projet.save()
+        self.assertEqual(self.compteurs(self.projet), [1, 1, 0, 0, 0])
+        self.assertEqual(self.projet.titre, 'Renommé')
+
+    def test_recalcul(self):
+        Tache.objects.create(titre='T', projet=self.projet, statut='en_cours')
+        Projet.objects.update(nb_taches=42, nb_en_cours=0)
+        call_command('recalculer_compteurs', stdout=StringIO())
+        self.assertEqual(self.compteurs(self.projet), [1, 0, 1, 0, 0])
+
+
+class TacheAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.autre = User.objects.create_user(
+            email='bob@example.com', password='motdepasse123',
+            first_name='Bob', last_name='Durand'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        cls.projet_autre = Projet.objects.create(titre='Autre', proprietaire=cls.autre)
+        for i in range(5):
+            Tache.objects.create(titre=f'Tâche {i}', projet=cls.projet, cree_par=cls.user)
+        Tache.objects.create(titre='Privée', projet=cls.projet_autre, cree_par=cls.autre)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_liste_paginee_par_curseur(self):
+        url = reverse('api:tache-list') + '?page_size=2'
+        titres = []
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        while True:
+            titres.extend(t['titre'] for t in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(sorted(titres), [f'Tâche {i}' for i in range(5)])
+
+    def test_champs_a_la_demande(self):
+        response = self.client.get(reverse('api:tache-list'), {'fields': 'id,projet_titre'})
+        self.assertEqual(response.data['results'][0], {
+            'id': response.data['results'][0]['id'], 'projet_titre': 'Projet'
+        })
+        response = self.client.get(reverse('api:tache-list'), {'fields': 'id,mot_de_passe'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ecritures_limitees_au_proprietaire(self):
+        response = self.client.post(reverse('api:tache-list'), {
+            'titre': 'Nouvelle', 'projet': self.projet_autre.id
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(reverse('api:tache-list'), {
+            'titre': 'Nouvelle', 'projet': self.projet.id
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        tache_id = response.data['id']
+
+        response = self.client.patch(
+            reverse('api:tache-detail', args=[tache_id]), {'statut': 'terminee'}, format='json'
+        )
+        self.assertEqual(response.data['statut'], 'terminee')
+
+        privee = Tache.objects.get(titre='Privée')
+        response = self.client.delete(reverse('api:tache-detail', args=[privee.id]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.delete(reverse('api:tache-detail', args=[tache_id]))
+        self.assertEqual(response.status_code, 204)
+
+    def test_authentification_requise(self):
+        self.assertEqual(APIClient().get(reverse('api:tache-list')).status_code, 401)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        cls.tache = Tache.objects.create(titre='Tâche', projet=cls.projet, cree_par=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        # Cookie CSRF déjà posé, comme pour un navigateur : il fait partie de l'ETag
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+
+    def test_liste_304_puis_modification(self):
+        url = reverse('tasks:liste')
+        etag = self.client.get(url)['ETag']
+        # session + utilisateur + validateurs, sans rendu
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.tache.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_last_modified(self):
+        url = reverse('tasks:detail', args=[self.tache.id])
+        response = self.client.get(url)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.tache.titre = 'Renommée'
+        self.tache.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_detail_inexistant(self):
+        response = self.client.get(reverse('tasks:detail', args=[0]), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        autre = User.objects.create_user(email='bob@example.com', password='motdepasse123')
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        Projet.objects.create(titre='Autre', proprietaire=autre).taches.create(titre='Cachée', cree_par=autre)
+        cls.echeance = timezone.now() + timedelta(days=3)
+        cls.projet.taches.create(
+            titre='Tâche "citée", avec virgule', cree_par=cls.user,
+            statut='terminee', date_echeance=cls.echeance
+        )
+        cls.projet.taches.create(titre='Sans échéance', cree_par=cls.user, assigne_a=autre)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _get(self, **params):
+        response = self.client.get(reverse('tasks:exporter'), params)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv(self):
+        response, contenu = self._get()
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="taches.csv"')
+        lignes = list(csv.DictReader(io.StringIO(contenu.decode('utf-8'))))
+        self.assertEqual(
+            sorted(ligne['titre'] for ligne in lignes),
+            ['Sans échéance', 'Tâche "citée", avec virgule']
+        )
+        self.assertEqual(
+            {ligne['assigne_a'] for ligne in lignes}, {'', 'bob@example.com'}
+        )
+
+    def test_ndjson_gzip_et_filtres(self):
+        response, contenu = self._get(format='ndjson', gzip='1', statut='terminee')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lignes = gzip.decompress(contenu).decode('utf-8').splitlines()
+        self.assertEqual(len(lignes), 1)
+        self.assertEqual(json.loads(lignes[0])['projet'], 'Projet')
+
+        jour = self.echeance.date().isoformat()
+        _, contenu = self._get(format='ndjson', echeance_apres=jour, echeance_avant=jour)
+        self.assertEqual(len(contenu.splitlines()), 1)
+
+    def test_parametre_invalide(self):
+        for params in ({'format': 'xml'}, {'statut': 'inconnu'}, {'echeance_avant': 'demain'}):
+            response = self.client.get(reverse('tasks:exporter'), params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_commande(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, 'taches.csv.gz')
+            call_command('exporter_taches', 'alice@example.com', gzip=True, output=chemin, stderr=StringIO())
+            with gzip.open(chemin, 'rt', encoding='utf-8') as fichier:
+                self.assertEqual(len(list(csv.DictReader(fichier))), 2)
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        User.objects.create_user(email='bob@example.com', password='motdepasse123')
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        Projet.objects.create(titre='Doublon', proprietaire=cls.user)
+        Projet.objects.create(titre='Doublon', proprietaire=cls.user)
+
+    def _csv(self, *lignes):
+        entete = 'titre,statut,priorite,projet,projet_id,date_echeance,assigne_a\n'
+        return io.BytesIO((entete + '\n'.join(lignes) + '\n').encode('utf-8'))
+
+    def test_import_csv_et_erreurs(self):
+        fichier = self._csv(
+            'Rédiger,terminee,haute,Projet,,,bob@example.com',
+            'En retard,a_faire,,,%d,2020-01-01,' % self.projet.id,
+            ',a_faire,,Projet,,,',
+            'Statut,fini,,Projet,,,',
+            'Ambigu,,,Doublon,,,',
+            'Introuvable,,,,999,,',
+            'Inconnu,,,Projet,,,carol@example.com',
+        )
+        rapport = importer_taches(self.user, fichier)
+
+        self.assertEqual((rapport.lignes, rapport.importees, rapport.nb_erreurs), (7, 2, 5))
+        self.assertEqual([erreur['ligne'] for erreur in rapport.as_dict()['erreurs']], [4, 5, 6, 7, 8])
+        tache = Tache.objects.get(titre='Rédiger')
+        self.assertEqual(tache.assigne_a.email, 'bob@example.com')
+        self.assertIsNotNone(tache.date_accomplissement)
+
+        # Compteurs et index plein texte tenus à jour malgré bulk_create
+        self.projet.refresh_from_db()
+        self.assertEqual(
+            [self.projet.nb_taches, self.projet.nb_terminees, self.projet.nb_en_retard], [2, 1, 1]
+        )
+        self.assertEqual([r['id'] for r in search_taches(self.user, 'rédig')], [tache.id])
+
+    def test_aller_retour_export_api(self):
+        Tache.objects.create(titre='Existante', projet=self.projet, cree_par=self.user, priorite='haute')
+        export = b''.join(self._export())
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('api:tache-import')
+
+        response = client.post(url, {
+            'fichier': SimpleUploadedFile('taches.ndjson', export), 'dry_run': '1'
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['importees'], response.data['nb_erreurs']), (0, 0))
+
+        response = client.post(url, {'fichier': SimpleUploadedFile('taches.ndjson', export)})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Tache.objects.filter(titre='Existante', priorite='haute').count(), 2)
+
+        response = client.post(url, {'fichier': SimpleUploadedFile('t.csv', b'nom\nx\n')})
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch('tasks.importation.SEUIL_PARALLELE', 1)
+    def test_api_sans_pool_de_processus(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('api:tache-import')
+        with mock.patch('tasks.importation.ProcessPoolExecutor') as pool:
+            response = client.post(url, {'fichier': SimpleUploadedFile('t.csv', self._csv('Tâche,,,Projet,,,').read())})
+        self.assertEqual(response.status_code, 201)
+        pool.assert_not_called()
+
+        with mock.patch('tasks.api.IMPORT_API_TAILLE_MAX', 10):
+            response = client.post(url, {'fichier': SimpleUploadedFile('t.csv', b'titre\n' + b'x\n' * 10)})
+        self.assertEqual(response.status_code, 400)
+
+    def _export(self):
+        from .export import flux_export, taches_a_exporter
+        return flux_export(taches_a_exporter(self.user), format='ndjson')
+
+    @mock.patch('tasks.importation.SEUIL_PARALLELE', 1)
+    @mock.patch('tasks.importation.TAILLE_LOT_ANALYSE', 2)
+    def test_analyse_parallele(self):
+        fichier = self._csv(*[f'Tâche {i},,,Projet,,,' for i in range(5)], 'Sans projet,,,,,,')
+        rapport = importer_taches(self.user, fichier, workers=2)
+        self.assertEqual((rapport.importees, rapport.nb_erreurs), (5, 1))
+        self.assertEqual(
+            sorted(Tache.objects.values_list('titre', flat=True)),
+            [f'Tâche {i}' for i in range(5)]
+        )
+
+    def test_commande(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as fichier:
+            fichier.write(json.dumps({'titre': 'Via commande', 'projet_id': self.projet.id}) + '\n')
+            fichier.write('pas du json\n')
+        self.addCleanup(os.remove, fichier.name)
+        sortie, erreurs = StringIO(), StringIO()
+        call_command('importer_taches', 'alice@example.com', fichier.name, stdout=sortie, stderr=erreurs)
+        self.assertIn('1 tâches importées sur 2 lignes', sortie.getvalue())
+        self.assertIn('Ligne 2 : JSON invalide.', erreurs.getvalue())
+        self.assertTrue(Tache.objects.filter(titre='Via commande').exists())
+
+    def test_creer_tache_assignee(self):
+        self.client.force_login(self.user)
+        bob = User.objects.get(email='bob@example.com')
+        self.client.post(reverse('tasks:creer'), {
+            'titre': 'Assignée', 'projet': self.projet.id, 'assigne_a': bob.id
+        })
+        self.assertEqual(Tache.objects.get(titre='Assignée').assigne_a, bob)
+
+
+class OperationsGroupeesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.autre = User.objects.create_user(email='bob@example.com', password='motdepasse123')
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        cls.cible = Projet.objects.create(titre='Cible', proprietaire=cls.user)
+        cls.projet_autre = Projet.objects.create(titre='Autre', proprietaire=cls.autre)
+        hier = timezone.now() - timedelta(days=1)
+        cls.taches = [
+            Tache.objects.create(titre=f'Rapport {i}', projet=cls.projet, cree_par=cls.user, date_echeance=hier)
+            for i in range(4)
+        ]
+        cls.privee = Tache.objects.create(titre='Privée', projet=cls.projet_autre, cree_par=cls.autre)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('api:tache-bulk')
+
+    def compteurs(self, projet):
+        projet.refresh_from_db()
+        return [projet.nb_taches, projet.nb_a_faire, projet.nb_terminees, projet.nb_en_retard]
+
+    def test_statut_par_ids(self):
+        ids = [tache.id for tache in self.taches[:3]] + [self.privee.id]
+        # portée + séquence + UPDATE + recalcul (agrégat + bulk_update), dans un savepoint
+        with self.assertNumQueries(5 + 2):
+            response = self.client.post(self.url, {
+                'operation': 'statut', 'ids': ids, 'statut': 'terminee'
+            }, format='json')
+        self.assertEqual(response.data, {'operation': 'statut', 'traitees': 3})
+        self.assertEqual(self.compteurs(self.projet), [4, 1, 3, 1])
+        self.assertEqual(Tache.objects.filter(date_accomplissement__isnull=False).count(), 3)
+        self.privee.refresh_from_db()
+        self.assertEqual(self.privee.statut, 'a_faire')
+
+        # Déjà terminées : rien à faire
+        response = self.client.post(self.url, {
+            'operation': 'statut', 'ids': ids, 'statut': 'terminee'
+        }, format='json')
+        self.assertEqual(response.data['traitees'], 0)
+
+    def test_deplacer_assigner_par_filtre(self):
+        response = self.client.post(self.url, {
+            'operation': 'deplacer', 'filtre': {'projet': self.projet.id}, 'projet': self.cible.id
+        }, format='json')
+        self.assertEqual(response.data['traitees'], 4)
+        self.assertEqual(self.compteurs(self.projet), [0, 0, 0, 0])
+        self.assertEqual(self.compteurs(self.cible), [4, 4, 0, 4])
+
+        response = self.client.post(self.url, {
+            'operation': 'assigner', 'filtre': {'statut': 'a_faire'}, 'assigne_a': self.autre.id
+        }, format='json')
+        self.assertEqual(response.data['traitees'], 4)
+        self.assertFalse(Tache.objects.filter(projet=self.cible, assigne_a__isnull=True).exists())
+
+        # Projet d'un autre utilisateur refusé
+        response = self.client.post(self.url, {
+            'operation': 'deplacer', 'filtre': {}, 'projet': self.projet_autre.id
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_supprimer(self):
+        response = self.client.post(self.url, {
+            'operation': 'supprimer', 'ids': [self.taches[0].id, self.privee.id]
+        }, format='json')
+        self.assertEqual(response.data['traitees'], 1)
+        self.assertEqual(self.compteurs(self.projet), [3, 3, 0, 3])
+        self.assertTrue(Tache.objects.filter(pk=self.privee.pk).exists())
+        self.assertEqual(len(search_taches(self.user, 'rapport')), 3)
+
+    def test_delete_direct(self):
+        # API privée de Django : échoue si son comportement change ou si une
+        # clé étrangère vers Tache apparaît (cascade ignorée par le DELETE direct)
+        self.assertEqual(Tache._meta.related_objects, ())
+        recus = []
+        def recevoir(sender, instance, **kwargs):
+            recus.append(instance.pk)
+        post_delete.connect(recevoir, sender=Tache)
+        self.addCleanup(post_delete.disconnect, recevoir, sender=Tache)
+        taches = Tache.objects.filter(pk__in=[self.taches[0].pk, self.taches[1].pk])
+        with self.assertNumQueries(1):
+            self.assertEqual(operations._delete_direct(taches), 2)
+        self.assertEqual(recus, [])
+        self.assertFalse(Tache.objects.filter(pk__in=[self.taches[0].pk, self.taches[1].pk]).exists())
+        self.assertEqual(Tache.objects.count(), 3)
+
+    def test_requete_invalide(self):
+        for donnees in (
+            {'operation': 'supprimer'},
+            {'operation': 'statut', 'ids': [1]},
+            {'operation': 'supprimer', 'filtre': {'inconnu': 1}},
+        ):
+            response = self.client.post(self.url, donnees, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_vue_liste(self):
+        client = self.client_class()
+        client.force_login(self.user)
+        response = client.post(reverse('tasks:operations_groupees'), {
+            'operation': 'statut', 'statut': 'en_cours', 'ids': [self.taches[0].id, self.taches[1].id]
+        })
+        self.assertRedirects(response, reverse('tasks:liste'))
+        self.assertEqual(Tache.objects.filter(statut='en_cours').count(), 2)
+
+
+class VersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        cls.tache = Tache.objects.create(titre='Tâche', projet=cls.projet, cree_par=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_identifiant_non_numerique(self):
+        with self.assertRaises(Tache.DoesNotExist):
+            ecrire_tache(self.user, 'abc', {'titre': 'X'}, version=1)
+        with self.assertRaises(Tache.DoesNotExist):
+            ecrire_tache(self.user, None, {'statut': 'terminee'})
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.patch(reverse('api:tache-list') + 'abc/', {'titre': 'X'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_patch_sans_modification(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('api:tache-detail', args=[self.tache.pk])
+        Tache.objects.filter(pk=self.tache.pk).update(version=3)
+        for donnees in ({}, {'version': 1}):
+            response = client.patch(url, donnees, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['id'], self.tache.pk)
+        tache = Tache.objects.get(pk=self.tache.pk)
+        self.assertEqual((tache.version, tache.sequence), (3, self.tache.sequence))
+        self.assertEqual(client.patch(reverse('api:tache-detail', args=[0]), {}, format='json').status_code, 404)
+
+    def test_save_incremente_la_version(self):
+        self.assertEqual(self.tache.version, 1)
+        self.tache.titre = 'Renommée'
+        self.tache.save()
+        self.assertEqual(self.tache.version, 2)
+        self.tache.save(update_fields=['titre'])
+        self.assertEqual(Tache.objects.get(pk=self.tache.pk).version, 3)
+
+    def test_update_conditionnel_sans_relecture(self):
+        # Séquence + UPDATE (dans un savepoint) : la priorité n'entre pas dans les compteurs
+        with self.assertNumQueries(2 + 2):
+            version = ecrire_tache(self.user, self.tache.pk, {'priorite': 'haute'}, version=1)
+        self.assertEqual(version, 2)
+        with self.assertRaises(ConflitVersion) as contexte:
+            ecrire_tache(self.user, self.tache.pk, {'priorite': 'basse'}, version=1)
+        self.assertEqual(contexte.exception.version_actuelle, 2)
+        self.assertEqual(Tache.objects.get(pk=self.tache.pk).priorite, 'haute')
+
+    def test_changer_statut_htmx(self):
+        url = reverse('tasks:changer_statut', args=[self.tache.id, 'toggle'])
+        response = self.client.post(url, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.json()['statut'], 'terminee')
+        self.assertTrue(response.json()['termine'])
+        self.projet.refresh_from_db()
+        self.assertEqual((self.projet.nb_terminees, self.projet.nb_a_faire), (1, 0))
+        self.assertIsNotNone(Tache.objects.get(pk=self.tache.pk).date_accomplissement)
+
+        response = self.client.post(url, {'version': 1}, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 2)
+
+    def test_deux_onglets(self):
+        url = reverse('tasks:modifier', args=[self.tache.id])
+        donnees = {'titre': 'Onglet A', 'projet': self.projet.id, 'statut': 'en_cours', 'version': 1}
+        self.assertRedirects(self.client.post(url, donnees), reverse('tasks:detail', args=[self.tache.id]))
+
+        # Le second onglet a affiché la version 1 : son enregistrement est refusé
+        response = self.client.post(url, dict(donnees, titre='Onglet B'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'modifiée entre-temps')
+        self.assertEqual(Tache.objects.get(pk=self.tache.pk).titre, 'Onglet A')
+
+    def test_api_if_match(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('api:tache-detail', args=[self.tache.id])
+        response = client.patch(url, {'statut': 'en_cours'}, format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual((response.status_code, response.data['version']), (200, 2))
+        response = client.patch(url, {'titre': 'Perdue', 'version': 1}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['version'], 2)
+
+
+class FiltreStatutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='alice@example.com', password='motdepasse123')
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        for statut in ('a_faire', 'a_faire', 'en_cours', 'terminee', 'terminee', 'terminee'):
+            Tache.objects.create(titre=statut, projet=cls.projet, cree_par=cls.user, statut=statut)
+
+    def rendre(self, source, taches):
+        return Template('{% load task_filters %}' + source).render(Context({'taches': taches}))
+
+    def test_queryset(self):
+        taches = Tache.objects.filter(projet=self.projet)
+        self.assertIsInstance(filter_statut(taches, 'terminee'), QuerySet)
+        # Le QuerySet filtré se chaîne comme avant : count() en base
+        with self.assertNumQueries(1):
+            self.assertEqual(self.rendre("{{ taches|filter_statut:'terminee'|length }}", taches), '3')
+        self.assertEqual(self.rendre("{{ taches|filter_statut:'a_faire'|first }}", taches), 'a_faire')
+
+    def test_liste_et_vide(self):
+        taches = list(Tache.objects.filter(projet=self.projet))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.rendre("{{ taches|filter_statut:'en_cours'|length }}", taches), '1')
+            self.assertEqual(self.rendre("{{ taches|filter_statut:'en_cours'|length }}", None), '0')
+
+
+class BancEssaiTests(TestCase):
+    """Les scénarios du banc d'essai, en quelques itérations, contre la référence du dépôt."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='alice@example.com', password='motdepasse123')
+        role = Role.objects.create(name='lecteur')
+        role.permissions.add(Permission.objects.get(codename='view_role'))
+        assign_role_to_user(cls.user, 'lecteur')
+        for numero in range(3):
+            projet = Projet.objects.create(titre=f'Projet {numero}', proprietaire=cls.user)
+            for statut in ('a_faire', 'en_cours', 'terminee'):
+                Tache.objects.create(titre=f'{statut} {numero}', projet=projet, cree_par=cls.user, statut=statut)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_requetes_sql_sous_la_reference(self):
+        resultats = banc_essai.executer(self.user, iterations=3)
+        self.assertEqual(set(resultats), set(banc_essai.lire_reference(banc_essai.REFERENCE)))
+        for nom, mesure in resultats.items():
+            self.assertEqual(mesure['requetes_http'], 3, nom)
+            self.assertGreater(mesure['requetes_sql_max'], 0, nom)
+        self.assertEqual(banc_essai.comparer(resultats, banc_essai.lire_reference(banc_essai.REFERENCE), None), [])
+
+    def test_ecritures_en_bascule(self):
+        tache = Tache.objects.filter(projet__proprietaire=self.user).order_by('pk').first()
+        # Préchauffage + 3 itérations : nombre pair de bascules
+        banc_essai.executer(self.user, ['changer_statut_tache', 'marquer_terminee'], iterations=3)
+        tache.refresh_from_db()
+        self.assertEqual(tache.statut, 'a_faire')
+
+    def test_comparer(self):
+        mesure = {'erreurs': 0, 'p95_ms': 10.0, 'debit': 100.0, 'requetes_sql_max': 4}
+        reference = {'vue': dict(mesure)}
+        self.assertEqual(banc_essai.comparer({'vue': mesure}, reference), [])
+        regressions = banc_essai.comparer(
+            {'vue': {'erreurs': 1, 'p95_ms': 13.0, 'debit': 70.0, 'requetes_sql_max': 5}}, reference
+        )
+        self.assertEqual(len(regressions), 4)
+        self.assertEqual(
+            banc_essai.comparer({'vue': {**mesure, 'p95_ms': 50.0, 'debit': 1.0}}, reference, tolerance=None), []
+        )
+
+    def test_percentiles(self):
+        resultat = banc_essai.resumer([i / 1000 for i in range(100, 0, -1)], [2, 4], 0, 2.0)
+        self.assertEqual((resultat['p50_ms'], resultat['p95_ms'], resultat['p99_ms']), (50.0, 95.0, 99.0))
+        self.assertEqual((resultat['debit'], resultat['requetes_sql_moy'], resultat['requetes_sql_max']), (50.0, 3, 4))
+
+    def test_requetes_lues_dans_server_timing(self):
+        self.assertEqual(
+            banc_essai._requetes_server_timing('sql;dur=1.20;desc="5 requetes", rendu;dur=2.00, total;dur=4.10'), 5
+        )
+        self.assertIsNone(banc_essai._requetes_server_timing(None))
+
+    def test_commande_echoue_sur_regression(self):
+        with tempfile.TemporaryDirectory() as repertoire:
+            chemin = os.path.join(repertoire, 'reference.json')
+            call_command('banc_essai', self.user.email, '--iterations=2', '--scenario=liste_taches',
+                         f'--reference={chemin}', '--enregistrer', stdout=StringIO())
+            reference = banc_essai.lire_reference(chemin)
+            reference['liste_taches']['requetes_sql_max'] -= 1
+            banc_essai.enregistrer_reference(chemin, reference)
+
+            with self.assertRaisesMessage(CommandError, 'liste_taches'):
+                call_command('banc_essai', self.user.email, '--iterations=2', '--scenario=liste_taches',
+                             f'--reference={chemin}', '--requetes-seulement', stdout=StringIO())
+
+    def test_scenario_inconnu(self):
+        with self.assertRaisesMessage(CommandError, 'inconnus'):
+            call_command('banc_essai', self.user.email, '--scenario=absent', stdout=StringIO())
+
+
+class BancEssaiConcurrenceTests(TransactionTestCase):
+    """Clients simultanés : chaque thread a sa connexion, les données doivent être validées."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='alice@example.com', password='motdepasse123')
+        projet = Projet.objects.create(titre='Projet', proprietaire=self.user)
+        Tache.objects.create(titre='Tâche', projet=projet, cree_par=self.user)
+
+    def test_lectures_simultanees(self):
+        resultats = banc_essai.executer(self.user, ['liste_taches', 'detail_projet'], iterations=6, concurrence=3)
+        for mesure in resultats.values():
+            self.assertEqual(mesure['requetes_http'], 6)
+            self.assertEqual(mesure['erreurs'], 0)
+
+
+class GenerationTests(TestCase):
+    def signature(self):
+        return (
+            list(User.objects.order_by('email').values_list('email', 'first_name', 'user_roles__role__name')),
+            list(Projet.objects.order_by('titre').values_list(
+                'titre', 'statut', 'proprietaire__email', 'nb_taches', 'nb_a_faire', 'nb_terminees'
+            )),
+            list(Tache.objects.order_by('sequence').values_list(
+                'titre', 'statut', 'priorite', 'projet__titre', 'assigne_a__email'
+            )),
+        )
+
+    def test_volumes_et_compteurs(self):
+        rapport = generer(4, 3, 10, graine=1)
+        self.assertEqual((rapport.utilisateurs, rapport.projets, rapport.taches), (4, 12, 120))
+        self.assertEqual(Tache.objects.count(), 120)
+        self.assertEqual(UserRole.objects.count(), 4)
+        self.assertTrue(User.objects.get(email='utilisateur000001@exemple.test').check_password('motdepasse123'))
+
+        # Compteurs dénormalisés identiques au recalcul complet
+        avant = list(Projet.objects.order_by('pk').values_list(*Projet.CHAMPS_COMPTEURS))
+        call_command('recalculer_compteurs', stdout=StringIO())
+        self.assertEqual(list(Projet.objects.order_by('pk').values_list(*Projet.CHAMPS_COMPTEURS)), avant)
+
+        # Index plein texte alimenté par lot
+        tache = Tache.objects.select_related('projet__proprietaire').order_by('pk').last()
+        resultats = search_taches(tache.projet.proprietaire, tache.titre, limit=1000)
+        self.assertIn(tache.pk, [resultat['id'] for resultat in resultats])
+
+    def test_reproductible(self):
+        generer(3, 2, 5, graine=7)
+        premiere = self.signature()
+        User.objects.all().delete()
+        generer(3, 2, 5, graine=7)
+        self.assertEqual(self.signature(), premiere)
+
+    def test_utilisateurs_conserves(self):
+        generer(2, 1, 2, graine=1)
+        rapport = generer(3, 1, 2, graine=2)
+        self.assertEqual(rapport.utilisateurs, 3)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Projet.objects.count(), 5)
+
+    def test_tailles_zipf(self):
+        import random
+        tailles = tailles_zipf(100, 5000, 1.0, random.Random(0))
+        self.assertEqual(sum(tailles), 5000)
+        # Le plus gros projet est environ 100 fois plus gros que le plus petit
+        self.assertGreater(max(tailles), 50 * max(min(tailles), 1))
+        self.assertEqual(set(tailles_zipf(10, 100, 0, random.Random(0))), {10})
+
+    def test_commande(self):
+        sortie = StringIO()
+        call_command('seed_data', '--utilisateurs=2', '--projets=2', '--taches=3', '--sans-index', stdout=sortie)
+        self.assertIn('2 utilisateurs, 4 projets et 12 tâches', sortie.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('seed_data', '--utilisateurs=0', stdout=StringIO())
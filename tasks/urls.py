@@ -6,6 +6,9 @@ app_name = 'tasks'
 urlpatterns = [
     path('', views.liste_taches, name='liste'),
     path('creer/', views.creer_tache, name='creer'),
+    path('exporter/', views.exporter_taches, name='exporter'),
+    path('operations-groupees/', views.operations_groupees, name='operations_groupees'),
+    path('recherche/', views.rechercher_taches, name='recherche'),
     path('<int:tache_id>/', views.detail_tache, name='detail'),
     path('<int:tache_id>/modifier/', views.modifier_tache, name='modifier'),
     path('<int:tache_id>/supprimer/', views.supprimer_tache, name='supprimer'),
@@ -1,27 +1,95 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from authapp.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse, HttpResponseNotAllowed
+from django.http import Http404, JsonResponse, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.db.models import Count, Max
+from todolist import cache as cache_app
+from todolist.conditional import conditional_get
 from .models import Tache
+from .export import ExportError, flux_export, taches_a_exporter
+from .ecritures import ConflitVersion, lire_etat, lire_version, modifier_tache as ecrire_tache
+from .operations import OperationError, executer
+from .pagination import KeysetPaginator
+from .search import search_taches
 from projects.models import Projet
 
+async def _validateurs_liste_taches(request):
+    """Dernière modification et nombre de tâches (et projets) de l'utilisateur"""
+    etat = await Tache.objects.filter(projet__proprietaire=request.user).aaggregate(
+        total=Count('id'),
+        taches=Max('date_mise_a_jour'),
+        projets=Max('projet__date_mise_a_jour'),
+    )
+    # Pas de Last-Modified : une suppression ne le ferait pas avancer
+    return None, tuple(etat.values())
+
 @login_required
-def liste_taches(request):
+@conditional_get(_validateurs_liste_taches)
+async def liste_taches(request):
     """Affiche la liste des tâches de l'utilisateur"""
     taches = Tache.objects.filter(
         projet__proprietaire=request.user
-    ).select_related('projet').order_by('-date_creation')
+    ).select_related('projet')
     
     # Filtrage par statut si spécifié
     statut = request.GET.get('statut')
     if statut in dict(Tache.StatutTache.choices):
         taches = taches.filter(statut=statut)
+    else:
+        statut = None
+    
+    # Pagination par curseur sur (date_creation, id) : coût constant quelle que soit la page
+    # Page en cache dans l'espace « taches » de l'utilisateur, invalidé à chaque écriture
+    curseur = request.GET.get('curseur')
+    page = await cache_app.alire(
+        cache_app.TACHES, request.user.pk, ('liste', statut, curseur),
+        lambda: KeysetPaginator(taches).aget_page(curseur)
+    )
     
     return render(request, 'tasks/liste.html', {
-        'taches': taches,
+        'taches': page,
         'statut_filtre': statut
     })
 
+@login_required
+def rechercher_taches(request):
+    """Recherche plein texte dans les tâches de l'utilisateur, triée par pertinence"""
+    requete = request.GET.get('q', '').strip()
+    resultats = search_taches(request.user, requete) if requete else []
+    
+    return render(request, 'tasks/recherche.html', {
+        'requete': requete,
+        'resultats': resultats
+    })
+
+@login_required
+def exporter_taches(request):
+    """Exporte en flux les tâches de l'utilisateur (CSV ou NDJSON, gzip en option)"""
+    format = request.GET.get('format', 'csv')
+    gzip = request.GET.get('gzip') in ('1', 'true')
+    try:
+        taches = taches_a_exporter(
+            request.user,
+            projet_id=request.GET.get('projet'),
+            statut=request.GET.get('statut'),
+            priorite=request.GET.get('priorite'),
+            echeance_apres=request.GET.get('echeance_apres'),
+            echeance_avant=request.GET.get('echeance_avant'),
+        )
+        flux = flux_export(taches, format=format, gzip=gzip)
+    except ExportError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    nom_fichier = f'taches.{format}'
+    content_type = 'text/csv; charset=utf-8' if format == 'csv' else 'application/x-ndjson; charset=utf-8'
+    if gzip:
+        nom_fichier += '.gz'
+        content_type = 'application/gzip'
+    
+    response = StreamingHttpResponse(flux, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+    return response
+
 @login_required
 def creer_tache(request):
     """Crée une nouvelle tâche"""
@@ -39,25 +107,23 @@ def creer_tache(request):
         else:
             try:
                 projet = Projet.objects.get(id=projet_id, proprietaire=request.user)
+                
+                # Assignation résolue avant la création : un seul INSERT
+                assigne_a = None
+                assigne_a_id = request.POST.get('assigne_a')
+                if assigne_a_id:
+                    from django.contrib.auth import get_user_model
+                    assigne_a = get_user_model().objects.filter(id=assigne_a_id).first()
+                
                 tache = Tache.objects.create(
                     titre=titre,
                     description=description,
                     projet=projet,
                     cree_par=request.user,
+                    assigne_a=assigne_a,
                     date_echeance=date_echeance if date_echeance else None
                 )
                 
-                # Gestion de l'assignation si spécifiée
-                assigne_a_id = request.POST.get('assigne_a')
-                if assigne_a_id:
-                    from django.contrib.auth import get_user_model
-                    User = get_user_model()
-                    try:
-                        tache.assigne_a = User.objects.get(id=assigne_a_id)
-                        tache.save()
-                    except User.DoesNotExist:
-                        pass
-                
                 messages.success(request, 'La tâche a été créée avec succès !')
                 return redirect('tasks:detail', tache_id=tache.id)
                 
@@ -75,10 +141,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+async def _validateurs_detail_tache(request, tache_id):
+    dates = await Tache.objects.filter(
+        id=tache_id,
+        projet__proprietaire=request.user
+    ).values_list('date_mise_a_jour', 'projet__date_mise_a_jour').afirst()
+    if dates is None:
+        return None
+    return max(dates), dates
+
 @login_required
-def detail_tache(request, tache_id):
+@conditional_get(_validateurs_detail_tache)
+async def detail_tache(request, tache_id):
     """Affiche les détails d'une tâche"""
-    tache = get_object_or_404(
+    tache = await aget_object_or_404(
         Tache.objects.select_related('projet', 'cree_par', 'assigne_a'),
         id=tache_id,
         projet__proprietaire=request.user
@@ -93,20 +169,14 @@ def detail_tache(request, tache_id):
 
 @login_required
 def modifier_tache(request, tache_id):
-    """Modifie une tâche existante"""
-    tache = get_object_or_404(
-        Tache,
-        id=tache_id,
-        projet__proprietaire=request.user
-    )
-    
+    """Modifie une tâche existante (UPDATE conditionnel sur la version affichée)"""
     projets = Projet.objects.filter(proprietaire=request.user)
     
     if request.method == 'POST':
         titre = request.POST.get('titre')
         description = request.POST.get('description', '')
         projet_id = request.POST.get('projet')
-        statut = request.POST.get('statut', tache.statut)
+        statut = request.POST.get('statut')
         date_echeance = request.POST.get('date_echeance')
         assigne_a_id = request.POST.get('assigne_a')
         
@@ -116,32 +186,43 @@ def modifier_tache(request, tache_id):
             try:
                 projet = Projet.objects.get(id=projet_id, proprietaire=request.user)
                 
-                tache.titre = titre
-                tache.description = description
-                tache.projet = projet
-                tache.statut = statut
-                tache.date_echeance = date_echeance if date_echeance else None
-                
                 # Gestion de l'assignation
+                assigne_a = None
                 if assigne_a_id:
                     from django.contrib.auth import get_user_model
-                    User = get_user_model()
-                    try:
-                        tache.assigne_a = User.objects.get(id=assigne_a_id)
-                    except User.DoesNotExist:
-                        tache.assigne_a = None
-                else:
-                    tache.assigne_a = None
+                    assigne_a = get_user_model().objects.filter(id=assigne_a_id).first()
                 
-                tache.save()
+                valeurs = {
+                    'titre': titre,
+                    'description': description,
+                    'projet': projet,
+                    'date_echeance': date_echeance if date_echeance else None,
+                    'assigne_a': assigne_a,
+                }
+                if statut in dict(Tache.StatutTache.choices):
+                    valeurs['statut'] = statut
+                ecrire_tache(request.user, tache_id, valeurs, version=lire_version(request.POST.get('version')))
                 messages.success(request, 'La tâche a été mise à jour avec succès !')
-                return redirect('tasks:detail', tache_id=tache.id)
+                return redirect('tasks:detail', tache_id=tache_id)
                 
+            except Tache.DoesNotExist:
+                raise Http404
+            except ConflitVersion:
+                messages.error(
+                    request,
+                    'La tâche a été modifiée entre-temps : vérifiez la version actuelle '
+                    'ci-dessous avant de renouveler vos changements.'
+                )
             except Projet.DoesNotExist:
                 messages.error(request, 'Projet invalide.')
             except Exception as e:
                 messages.error(request, f'Une erreur est survenue : {str(e)}')
     
+    tache = get_object_or_404(
+        Tache,
+        id=tache_id,
+        projet__proprietaire=request.user
+    )
     return render(request, 'tasks/modifier.html', {
         'tache': tache,
         'projets': projets,
@@ -167,56 +248,76 @@ def supprimer_tache(request, tache_id):
     
     return render(request, 'tasks/supprimer.html', {'tache': tache})
 
+@login_required
+def operations_groupees(request):
+    """Change le statut ou supprime les tâches cochées dans la liste, en une requête"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    
+    operation = request.POST.get('operation')
+    ids = [tache_id for tache_id in request.POST.getlist('ids') if tache_id.isdigit()]
+    if operation not in ('statut', 'supprimer') or not ids:
+        messages.error(request, 'Sélectionnez au moins une tâche et une action.')
+        return redirect('tasks:liste')
+    
+    try:
+        traitees = executer(request.user, operation, ids=ids, statut=request.POST.get('statut'))
+        if operation == 'supprimer':
+            messages.success(request, f'{traitees} tâche(s) supprimée(s).')
+        else:
+            messages.success(request, f'{traitees} tâche(s) mise(s) à jour.')
+    except OperationError as e:
+        messages.error(request, str(e))
+    return redirect('tasks:liste')
+
+def _reponse_conflit(conflit):
+    return JsonResponse({
+        'success': False,
+        'error': str(conflit),
+        'version': conflit.version_actuelle
+    }, status=409)
+
 @login_required
 def changer_statut_tache(request, tache_id, nouveau_statut):
     """
     Change le statut d'une tâche (utilisé pour les actions rapides).
-    Si nouveau_statut est 'toggle', bascule entre 'termine' et 'en_cours'.
+    Si nouveau_statut est 'toggle', bascule entre 'terminee' et 'en_cours'.
+    Le champ POST facultatif `version` active la détection de conflit (409).
     """
     if request.method == 'POST' and request.headers.get('HX-Request') == 'true':
+        if nouveau_statut != 'toggle' and nouveau_statut not in dict(Tache.StatutTache.choices):
+            return JsonResponse({
+                'success': False,
+                'error': 'Statut non valide'
+            }, status=400)
+        
         try:
-            tache = Tache.objects.get(
-                id=tache_id,
-                projet__proprietaire=request.user
-            )
-            
-            # Gérer le cas du toggle
+            # État minimal (statut, projet, échéance, version) : pas de chargement complet
+            etat = lire_etat(request.user, tache_id)
             if nouveau_statut == 'toggle':
-                tache.termine = not tache.termine
-                tache.statut = 'termine' if tache.termine else 'en_cours'
-            # Vérifier que le statut est valide
-            elif nouveau_statut in dict(Tache.StatutTache.choices):
-                tache.statut = nouveau_statut
-                tache.termine = (nouveau_statut == 'termine')
-            else:
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Statut non valide'
-                }, status=400)
-            
-            tache.save()
-            
-            return JsonResponse({
-                'success': True,
-                'statut_display': tache.get_statut_display(),
-                'termine': tache.termine,
-                'statut': tache.statut
-            })
-            
+                nouveau_statut = (
+                    Tache.StatutTache.EN_COURS if etat.statut == Tache.StatutTache.TERMINEE
+                    else Tache.StatutTache.TERMINEE
+                )
+            version = ecrire_tache(
+                request.user, tache_id, {'statut': nouveau_statut},
+                version=lire_version(request.POST.get('version')), etat=etat
+            )
         except Tache.DoesNotExist:
             return JsonResponse({
                 'success': False,
                 'error': 'Tâche non trouvée ou accès non autorisé'
             }, status=404)
-            
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({
-                'success': False,
-                'error': str(e),
-                'traceback': traceback.format_exc()
-            }, status=500)
+        except ConflitVersion as conflit:
+            return _reponse_conflit(conflit)
+        
+        return JsonResponse({
+            'success': True,
+            'statut_display': Tache.StatutTache(nouveau_statut).label,
+            'termine': nouveau_statut == Tache.StatutTache.TERMINEE,
+            'statut': nouveau_statut,
+            'version': version
+        })
     
     return JsonResponse({
         'success': False,
@@ -227,17 +328,24 @@ def changer_statut_tache(request, tache_id, nouveau_statut):
 def marquer_terminee(request, tache_id):
     """Marque une tâche comme terminée ou non (utilisé avec HTMX)"""
     if request.method == 'POST':
-        tache = get_object_or_404(Tache, id=tache_id, projet__proprietaire=request.user)
+        try:
+            etat = lire_etat(request.user, tache_id)
+        except Tache.DoesNotExist:
+            raise Http404
         
         # Basculer entre 'terminee' et 'a_faire'
-        if tache.statut == Tache.StatutTache.TERMINEE:
-            tache.statut = Tache.StatutTache.A_FAIRE
+        if etat.statut == Tache.StatutTache.TERMINEE:
+            statut = Tache.StatutTache.A_FAIRE
         else:
-            tache.statut = Tache.StatutTache.TERMINEE
-            from django.utils import timezone
-            tache.date_accomplissement = timezone.now()
-            
-        tache.save()
+            statut = Tache.StatutTache.TERMINEE
+        
+        try:
+            ecrire_tache(
+                request.user, tache_id, {'statut': statut},
+                version=lire_version(request.POST.get('version')), etat=etat
+            )
+        except ConflitVersion as conflit:
+            return _reponse_conflit(conflit)
         
         # Retourner une réponse vide avec un code 200 pour HTMX
         return HttpResponse()
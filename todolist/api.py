@@ -0,0 +1,125 @@
+"""
+Socle de l'API JSON (v1) : lecture compacte par values(), champs à la demande
+(?fields=) et pagination par curseur.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from rest_framework import status, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from tasks.pagination import KeysetPaginator
+
+# Taille de page de l'API, bornée par MAX_PAGE_SIZE
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class CompactViewSet(viewsets.ViewSet):
+    """
+    ViewSet dont les lectures passent par values() plutôt que par des instances
+    de modèle et des sérialiseurs DRF.
+
+    Les sous-classes déclarent :
+        fields : dict {nom du champ API: lookup ORM}, dans l'ordre de sortie
+        default_fields : champs retournés sans ?fields=
+        serializer_class : sérialiseur DRF utilisé pour valider les écritures
+        get_queryset() : QuerySet restreint à l'utilisateur
+        get_write_queryset() : idem pour les écritures (select_related adapté)
+
+    Les identifiants sont entiers : le routeur ne reconnaît pas les autres
+    (404 plutôt qu'une erreur de conversion dans le filtre pk=).
+    """
+    lookup_value_regex = r'\d+'
+    fields = {}
+    default_fields = ()
+    serializer_class = None
+
+    def get_queryset(self):
+        raise ImproperlyConfigured(f'{type(self).__name__} doit définir get_queryset().')
+
+    def get_write_queryset(self):
+        """QuerySet des instances chargées pour modification ou suppression."""
+        return self.get_queryset()
+
+    def filter_queryset(self, queryset):
+        return queryset
+
+    def get_requested_fields(self):
+        """Champs demandés via ?fields=a,b,c (validés contre la liste autorisée)."""
+        param = self.request.query_params.get('fields')
+        if not param:
+            return list(self.default_fields)
+        requested = [name.strip() for name in param.split(',') if name.strip()]
+        unknown = [name for name in requested if name not in self.fields]
+        if unknown:
+            raise ValidationError({'fields': f"Champs inconnus : {', '.join(unknown)}"})
+        return requested
+
+    def _values(self, queryset, requested):
+        """
+        Applique values() avec les seuls lookups demandés : les jointures
+        (projet__titre, ...) ne sont faites que si le champ est demandé.
+        id et date_creation sont toujours lus pour la pagination.
+        """
+        lookups = {self.fields[name] for name in requested} | {'id', 'date_creation'}
+        return queryset.values(*lookups)
+
+    def _render(self, rows, requested):
+        return [{name: row[self.fields[name]] for name in requested} for row in rows]
+
+    def list(self, request):
+        requested = self.get_requested_fields()
+        try:
+            per_page = min(int(request.query_params.get('page_size', PAGE_SIZE)), MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValidationError({'page_size': 'Entier attendu.'})
+        queryset = self._values(self.filter_queryset(self.get_queryset()), requested)
+        page = KeysetPaginator(queryset, per_page=max(per_page, 1)).get_page(
+            request.query_params.get('curseur')
+        )
+
+        url = request.build_absolute_uri()
+        return Response({
+            'results': self._render(page, requested),
+            'next': replace_query_param(url, 'curseur', page.next_cursor) if page.has_next else None,
+            'previous': replace_query_param(url, 'curseur', page.previous_cursor) if page.has_previous else None,
+        })
+
+    def _get_row(self, pk, requested):
+        queryset = self._values(self.get_queryset().filter(pk=pk), requested)
+        row = queryset.first()
+        if row is None:
+            raise Http404
+        return self._render([row], requested)[0]
+
+    def retrieve(self, request, pk=None):
+        return Response(self._get_row(pk, self.get_requested_fields()))
+
+    def perform_create(self, serializer):
+        return serializer.save()
+
+    def create(self, request):
+        serializer = self.serializer_class(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        instance = self.perform_create(serializer)
+        return Response(
+            self._get_row(instance.pk, self.get_requested_fields()),
+            status=status.HTTP_201_CREATED
+        )
+
+    def partial_update(self, request, pk=None):
+        instance = get_object_or_404(self.get_write_queryset(), pk=pk)
+        serializer = self.serializer_class(
+            instance, data=request.data, partial=True, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(self._get_row(instance.pk, self.get_requested_fields()))
+
+    def destroy(self, request, pk=None):
+        instance = get_object_or_404(self.get_write_queryset(), pk=pk)
+        instance.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,20 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from projects.api import ProjetViewSet
+from sync.api import ChangementsView
+from tasks.api import TacheViewSet
+
+router = DefaultRouter()
+router.register('projets', ProjetViewSet, basename='projet')
+router.register('taches', TacheViewSet, basename='tache')
+
+app_name = 'api'
+
+urlpatterns = [
+    path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('changements/', ChangementsView.as_view(), name='changements'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class TodolistConfig(AppConfig):
+    name = 'todolist'
+
+    def ready(self):
+        # Enveloppes SQL de l'instrumentation, branchées au démarrage plutôt
+        # qu'à la première requête, chacune si elle est activée
+        from . import mesures, metriques, requetes_lentes
+        if mesures.MESURES_ACTIVES:
+            mesures.installer()
+        if metriques.METRIQUES_ACTIVES:
+            metriques.installer()
+        requetes_lentes.installer()
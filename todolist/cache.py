@@ -0,0 +1,269 @@
+"""
+Cache applicatif : espaces de noms versionnés par utilisateur.
+
+Chaque valeur est rangée sous une clé qui inclut la version de son espace
+de noms (une version globale et une par utilisateur). Invalider revient à
+changer de version : les anciennes clés ne sont plus lues et expirent
+d'elles-mêmes. Aucun parcours de clés n'est nécessaire, ce qui convient à
+tout backend de cache Django (locmem, fichiers, Memcached, Redis...).
+
+Les écritures unitaires invalident par les signaux post_save/post_delete
+(tasks.signals, rbac.signals) ; les écritures groupées, qui ne les émettent
+pas, appellent invalider() elles-mêmes.
+
+Les agrégats coûteux passent par obtenir_protege(), qui
+évitent l'effet de meute (cache stampede) :
+- un seul recalcul à la fois par clé, sous un verrou posé dans le cache
+  (cache.add) ; les autres requêtes servent la valeur périmée si elle
+  existe, ou attendent le résultat du recalcul en cours sinon ;
+- expiration anticipée probabiliste (XFetch) : à l'approche de l'échéance,
+  une requête déclenche le recalcul avec une probabilité croissante, d'autant
+  plus tôt que le calcul est long ;
+- les valeurs restent en cache PERIODE_GRACE secondes après leur échéance
+  pour pouvoir être servies périmées pendant le recalcul.
+"""
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Alias de settings.CACHES utilisé, et durée de vie des valeurs
+CACHE_ALIAS = getattr(settings, 'APP_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'APP_CACHE_TIMEOUT', 300)
+
+TACHES = 'taches'
+PROJETS = 'projets'
+# Rôles et permissions résolus (rbac.models), invalidés par rbac.signals
+RBAC = 'rbac'
+ESPACES = (TACHES, PROJETS, RBAC)
+
+# Espaces touchés par l'écriture d'une tâche, d'un projet (le titre du projet
+# figure dans les listes de tâches)
+ESPACES_TACHE = (TACHES,)
+ESPACES_PROJET = (TACHES, PROJETS)
+
+# Valeurs périmées servies pendant un recalcul au plus PERIODE_GRACE secondes après l'échéance
+PERIODE_GRACE = getattr(settings, 'APP_CACHE_GRACE', 300)
+
+# Durée de vie du verrou de recalcul (borne un calcul interrompu), attente
+# maximale d'une requête sans valeur à servir, et intervalle de vérification
+DUREE_VERROU = 30
+ATTENTE_MAX = 10
+INTERVALLE_ATTENTE = 0.02
+
+# Agressivité de l'expiration anticipée (1 : valeur recommandée par XFetch)
+BETA = 1.0
+
+_ABSENT = object()
+
+# Compteurs de succès et d'échecs par espace, propres au processus
+_verrou = threading.Lock()
+_succes = Counter()
+_echecs = Counter()
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _cle_version(espace, user_id=None):
+    return f'ns:{espace}' if user_id is None else f'ns:{espace}:{user_id}'
+
+
+def _cle(espace, user_id, versions, parties):
+    empreinte = hashlib.md5(repr(parties).encode()).hexdigest()
+    return f'{espace}:{user_id}:{versions[0]}.{versions[1]}:{empreinte}'
+
+
+def _compter(espace, succes):
+    with _verrou:
+        (_succes if succes else _echecs)[espace] += 1
+
+
+def _versions(cache, espace, user_id):
+    """
+    Versions (globale, utilisateur) de l'espace. Une version absente (jamais
+    créée ou évincée) est initialisée, ce qui invalide les valeurs rangées
+    sous l'ancienne.
+    """
+    cles = (_cle_version(espace), _cle_version(espace, user_id))
+    trouvees = cache.get_many(cles)
+    versions = []
+    for cle in cles:
+        version = trouvees.get(cle)
+        if version is None:
+            cache.add(cle, uuid.uuid4().hex, None)
+            version = cache.get(cle)
+        versions.append(version)
+    return versions
+
+
+async def _aversions(cache, espace, user_id):
+    cles = (_cle_version(espace), _cle_version(espace, user_id))
+    trouvees = await cache.aget_many(cles)
+    versions = []
+    for cle in cles:
+        version = trouvees.get(cle)
+        if version is None:
+            await cache.aadd(cle, uuid.uuid4().hex, None)
+            version = await cache.aget(cle)
+        versions.append(version)
+    return versions
+
+
+def cle(espace, user_id, *parties):
+    """Clé courante d'une valeur de l'espace (parties : ce qui la distingue)."""
+    return _cle(espace, user_id, _versions(get_cache(), espace, user_id), parties)
+
+
+def lire(espace, user_id, parties, calcul, timeout=CACHE_TIMEOUT):
+    """
+    Retourne la valeur identifiée par `parties` dans l'espace de l'utilisateur,
+    calculée par calcul() et mise en cache si elle est absente.
+    """
+    cache = get_cache()
+    cle_valeur = _cle(espace, user_id, _versions(cache, espace, user_id), parties)
+    valeur = cache.get(cle_valeur, _ABSENT)
+    _compter(espace, valeur is not _ABSENT)
+    if valeur is _ABSENT:
+        valeur = calcul()
+        cache.set(cle_valeur, valeur, timeout)
+    return valeur
+
+
+async def alire(espace, user_id, parties, calcul, timeout=CACHE_TIMEOUT):
+    """Équivalent asynchrone de lire() ; calcul() retourne un awaitable."""
+    cache = get_cache()
+    cle_valeur = _cle(espace, user_id, await _aversions(cache, espace, user_id), parties)
+    valeur = await cache.aget(cle_valeur, _ABSENT)
+    _compter(espace, valeur is not _ABSENT)
+    if valeur is _ABSENT:
+        valeur = await calcul()
+        await cache.aset(cle_valeur, valeur, timeout)
+    return valeur
+
+
+def invalider(espaces, *user_ids):
+    """Invalide les espaces donnés pour ces utilisateurs (None est ignoré)."""
+    versions = {
+        _cle_version(espace, user_id): uuid.uuid4().hex
+        for espace in espaces
+        for user_id in set(user_ids) if user_id is not None
+    }
+    if versions:
+        get_cache().set_many(versions, None)
+
+
+def invalider_tous(espaces):
+    """Invalide les espaces donnés pour tous les utilisateurs (version globale)."""
+    get_cache().set_many({_cle_version(espace): uuid.uuid4().hex for espace in espaces}, None)
+
+
+class Enveloppe(NamedTuple):
+    """Valeur protégée, avec son échéance (horodatage) et la durée de son calcul."""
+    valeur: Any
+    echeance: float
+    duree: float
+
+
+def _a_recalculer(enveloppe, maintenant):
+    # XFetch : -log(u) suit une loi exponentielle, le recalcul est anticipé
+    # d'environ `duree` secondes en moyenne
+    return maintenant - enveloppe.duree * BETA * math.log(1 - random.random()) >= enveloppe.echeance
+
+
+def _envelopper(valeur, debut, timeout):
+    fin = time.time()
+    return Enveloppe(valeur, fin + timeout, fin - debut)
+
+
+def obtenir_protege(cle_valeur, calcul, timeout=CACHE_TIMEOUT, grace=PERIODE_GRACE):
+    """
+    Retourne (valeur, depuis_le_cache) pour la clé, en ne laissant qu'une
+    requête à la fois recalculer la valeur (voir l'en-tête du module).
+    """
+    cache = get_cache()
+    enveloppe = cache.get(cle_valeur)
+    if enveloppe is not None and not _a_recalculer(enveloppe, time.time()):
+        return enveloppe.valeur, True
+
+    verrou = f'{cle_valeur}:verrou'
+    if cache.add(verrou, 1, DUREE_VERROU):
+        try:
+            debut = time.time()
+            enveloppe = _envelopper(calcul(), debut, timeout)
+            cache.set(cle_valeur, enveloppe, timeout + grace)
+            return enveloppe.valeur, False
+        finally:
+            cache.delete(verrou)
+
+    if enveloppe is not None:
+        # Recalcul en cours ailleurs : valeur périmée (ou sur le point de l'être)
+        return enveloppe.valeur, True
+
+    fin = time.monotonic() + ATTENTE_MAX
+    while time.monotonic() < fin:
+        time.sleep(INTERVALLE_ATTENTE)
+        enveloppe = cache.get(cle_valeur)
+        if enveloppe is not None:
+            return enveloppe.valeur, True
+    # Recalcul abandonné ou trop long : calcul sans mise en cache
+    return calcul(), False
+
+
+async def aobtenir_protege(cle_valeur, calcul, timeout=CACHE_TIMEOUT, grace=PERIODE_GRACE):
+    """Équivalent asynchrone de obtenir_protege() ; calcul() retourne un awaitable."""
+    cache = get_cache()
+    enveloppe = await cache.aget(cle_valeur)
+    if enveloppe is not None and not _a_recalculer(enveloppe, time.time()):
+        return enveloppe.valeur, True
+
+    verrou = f'{cle_valeur}:verrou'
+    if await cache.aadd(verrou, 1, DUREE_VERROU):
+        try:
+            debut = time.time()
+            enveloppe = _envelopper(await calcul(), debut, timeout)
+            await cache.aset(cle_valeur, enveloppe, timeout + grace)
+            return enveloppe.valeur, False
+        finally:
+            await cache.adelete(verrou)
+
+    if enveloppe is not None:
+        return enveloppe.valeur, True
+
+    fin = time.monotonic() + ATTENTE_MAX
+    while time.monotonic() < fin:
+        await asyncio.sleep(INTERVALLE_ATTENTE)
+        enveloppe = await cache.aget(cle_valeur)
+        if enveloppe is not None:
+            return enveloppe.valeur, True
+    return await calcul(), False
+
+
+def statistiques():
+    """Succès, échecs et taux de succès par espace, depuis le démarrage du processus."""
+    with _verrou:
+        succes, echecs = Counter(_succes), Counter(_echecs)
+    resultat = {}
+    for espace in ESPACES:
+        lectures = succes[espace] + echecs[espace]
+        resultat[espace] = {
+            'succes': succes[espace],
+            'echecs': echecs[espace],
+            'taux_succes': round(succes[espace] / lectures, 4) if lectures else None,
+        }
+    return resultat
+
+
+def reinitialiser_statistiques():
+    with _verrou:
+        _succes.clear()
+        _echecs.clear()
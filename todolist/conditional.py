@@ -0,0 +1,74 @@
+"""
+GET conditionnels (ETag / Last-Modified) pour les vues HTML.
+"""
+import hashlib
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+# À incrémenter lorsqu'un changement de template doit invalider les pages en cache
+CONDITIONAL_GET_VERSION = getattr(settings, 'CONDITIONAL_GET_VERSION', 1)
+
+
+def conditional_get(validators):
+    """
+    Décorateur répondant 304 avant tout rendu lorsque la page n'a pas changé.
+
+    validators(request, *args, **kwargs) retourne un couple
+    (last_modified, empreinte) calculé par une requête légère, ou None si la
+    ressource n'existe pas (la vue s'exécute alors normalement). L'empreinte
+    est combinée à l'utilisateur, à l'URL complète et au cookie CSRF pour
+    former l'ETag.
+    Les validateurs ne sont calculés qu'une fois par requête.
+
+    Pour une vue async, validators est une coroutine : elle est attendue avant
+    l'appel de condition(), dont les fonctions ne lisent plus que le résultat
+    mémorisé sur la requête.
+
+    À placer sous @login_required.
+    """
+    def memoriser(request, result):
+        if result is None:
+            request._validateurs = (None, None)
+        else:
+            last_modified, empreinte = result
+            # Le cookie CSRF en fait partie : une page en cache garde un jeton valide
+            source = repr((
+                CONDITIONAL_GET_VERSION, request.user.pk, request.get_full_path(),
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME), empreinte
+            ))
+            request._validateurs = (last_modified, hashlib.sha1(source.encode()).hexdigest())
+
+    def resolve(request, *args, **kwargs):
+        if not hasattr(request, '_validateurs'):
+            memoriser(request, validators(request, *args, **kwargs))
+        return request._validateurs
+
+    def revalider(request, response):
+        if request.method in ('GET', 'HEAD'):
+            # Toujours revalider : la page dépend de l'utilisateur connecté
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def decorator(view_func):
+        conditional_view = condition(
+            etag_func=lambda request, *args, **kwargs: resolve(request, *args, **kwargs)[1],
+            last_modified_func=lambda request, *args, **kwargs: resolve(request, *args, **kwargs)[0],
+        )(view_func)
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _async_wrapped_view(request, *args, **kwargs):
+                if not hasattr(request, '_validateurs'):
+                    memoriser(request, await validators(request, *args, **kwargs))
+                return revalider(request, await conditional_view(request, *args, **kwargs))
+            return _async_wrapped_view
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            return revalider(request, conditional_view(request, *args, **kwargs))
+        return _wrapped_view
+    return decorator
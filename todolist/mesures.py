@@ -0,0 +1,271 @@
+"""
+Mesures par requête HTTP : nombre de requêtes SQL, temps SQL, temps de rendu
+des templates, durée totale et requêtes dupliquées.
+
+Activé par MESURES_ACTIVES (variable d'environnement DJANGO_MESURES) ;
+désactivé, MesuresMiddleware se retire de la chaîne au démarrage
+(MiddlewareNotUsed) et rien n'est installé. Fonctionne avec DEBUG désactivé :
+les requêtes sont observées par un execute_wrapper, pas par connection.queries.
+
+Les mesures des MESURES_TAILLE dernières requêtes sont gardées en mémoire,
+dans le processus (tampon circulaire), et lues par la vue réservée au
+personnel `mesures_requetes`. L'en-tête Server-Timing les expose au
+navigateur si MESURES_SERVER_TIMING est vrai.
+
+MESURES_BUDGETS fixe des plafonds par nom de vue (`app:nom`), '*' valant
+pour toutes les vues ; un dépassement est journalisé en WARNING :
+
+    MESURES_BUDGETS = {
+        '*': {'requetes': 30},
+        'projects:detail': {'requetes': 8, 'sql_ms': 50, 'duree_ms': 200},
+    }
+
+Le temps SQL compte aussi les requêtes exécutées pendant le rendu
+(QuerySet évalués dans les templates) : il recoupe le temps de rendu.
+
+L'installation (TodolistConfig.ready) remplace Template.render au niveau de
+la classe, pour tout le processus ; hors d'une requête mesurée, le rendu
+n'est pas chronométré. desinstaller() rétablit la méthode d'origine.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+MESURES_ACTIVES = getattr(settings, 'MESURES_ACTIVES', False)
+MESURES_TAILLE = getattr(settings, 'MESURES_TAILLE', 500)
+MESURES_SERVER_TIMING = getattr(settings, 'MESURES_SERVER_TIMING', False)
+MESURES_BUDGETS = getattr(settings, 'MESURES_BUDGETS', {})
+
+# Longueur des extraits SQL rapportés, nombre de requêtes similaires rapportées
+LONGUEUR_SQL = 200
+SIMILAIRES_MAX = 5
+
+# Mesure de la requête HTTP en cours ; suit le contexte dans les threads
+# de sync_to_async, où s'exécutent les requêtes SQL des vues async
+_courante = contextvars.ContextVar('mesure', default=None)
+
+_verrou = threading.Lock()
+_tampon = deque(maxlen=MESURES_TAILLE)
+_installe = False
+_rendu_origine = None
+
+
+class Mesure:
+    __slots__ = ('debut', 'requetes', 'sql', 'rendu', 'en_rendu', 'textes', 'executions')
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.requetes = 0
+        self.sql = 0.0
+        self.rendu = 0.0
+        self.en_rendu = False
+        # Occurrences par texte SQL, et par (texte, paramètres)
+        self.textes = Counter()
+        self.executions = Counter()
+
+
+def _observer(execute, sql, params, many, context):
+    mesure = _courante.get()
+    if mesure is None:
+        return execute(sql, params, many, context)
+    debut = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        mesure.sql += time.perf_counter() - debut
+        mesure.requetes += 1
+        mesure.textes[sql] += 1
+        if not many:
+            mesure.executions[(sql, repr(params))] += 1
+
+
+def _brancher(connection, **kwargs):
+    # En tête de liste : un `with connection.execute_wrapper(...)` ouvert pendant
+    # le branchement retire à sa sortie sa propre enveloppe (la dernière)
+    if _observer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _observer)
+
+
+def _mesurer_rendu(render):
+    @wraps(render)
+    def rendre(self, context=None, request=None):
+        mesure = _courante.get()
+        if mesure is None or mesure.en_rendu:
+            return render(self, context, request)
+        mesure.en_rendu = True
+        debut = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            mesure.rendu += time.perf_counter() - debut
+            mesure.en_rendu = False
+    return rendre
+
+
+def installer():
+    """
+    Branche l'observateur sur les connexions (existantes et futures) et la
+    mesure du rendu sur les templates Django ; sans effet au second appel.
+    """
+    global _installe, _rendu_origine
+    with _verrou:
+        if _installe:
+            return
+        _installe = True
+    connection_created.connect(_brancher, dispatch_uid='mesures')
+    for connection in connections.all(initialized_only=True):
+        _brancher(connection)
+    _rendu_origine = Template.render
+    Template.render = _mesurer_rendu(Template.render)
+
+
+def desinstaller():
+    """
+    Annule installer() : observateur retiré des connexions (celles du thread
+    courant ; les autres ne mesurent plus rien hors requête mesurée) et
+    Template.render rétabli.
+    """
+    global _installe
+    with _verrou:
+        if not _installe:
+            return
+        _installe = False
+    connection_created.disconnect(dispatch_uid='mesures')
+    for connection in connections.all(initialized_only=True):
+        if _observer in connection.execute_wrappers:
+            connection.execute_wrappers.remove(_observer)
+    Template.render = _rendu_origine
+
+
+def _budget(vue):
+    budget = dict(MESURES_BUDGETS.get('*', {}))
+    budget.update(MESURES_BUDGETS.get(vue, {}))
+    return budget
+
+
+def _resultat(request, response, mesure):
+    match = request.resolver_match
+    vue = match.view_name if match else None
+    similaires = [
+        {'sql': sql[:LONGUEUR_SQL], 'nombre': nombre}
+        for sql, nombre in mesure.textes.most_common(SIMILAIRES_MAX) if nombre > 1
+    ]
+    resultat = {
+        'horodatage': time.time(),
+        'vue': vue,
+        'methode': request.method,
+        'chemin': request.path,
+        'statut': response.status_code,
+        'requetes': mesure.requetes,
+        'sql_ms': round(mesure.sql * 1000, 2),
+        'rendu_ms': round(mesure.rendu * 1000, 2),
+        'duree_ms': round((time.perf_counter() - mesure.debut) * 1000, 2),
+        # Exécutions identiques (même texte, mêmes paramètres) au-delà de la première
+        'doublons': sum(nombre - 1 for nombre in mesure.executions.values()),
+        # Même texte exécuté plusieurs fois (N+1 probable)
+        'similaires': similaires,
+    }
+    resultat['depassements'] = [
+        cle for cle, plafond in _budget(vue).items() if resultat.get(cle, 0) > plafond
+    ]
+    return resultat
+
+
+def _terminer(request, response, mesure):
+    resultat = _resultat(request, response, mesure)
+    with _verrou:
+        _tampon.append(resultat)
+    if resultat['depassements']:
+        logger.warning(
+            'Budget dépassé (%s) pour %s %s [%s] : %d requêtes, %.1f ms SQL, %.1f ms au total, %d doublons',
+            ', '.join(resultat['depassements']), resultat['methode'], resultat['chemin'], resultat['vue'],
+            resultat['requetes'], resultat['sql_ms'], resultat['duree_ms'], resultat['doublons'],
+        )
+    if MESURES_SERVER_TIMING:
+        response['Server-Timing'] = (
+            f'sql;dur={resultat["sql_ms"]};desc="{resultat["requetes"]} requetes", '
+            f'rendu;dur={resultat["rendu_ms"]}, '
+            f'total;dur={resultat["duree_ms"]}'
+        )
+    return response
+
+
+class MesuresMiddleware:
+    """Mesure chaque requête HTTP ; à placer en tête de MIDDLEWARE."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not MESURES_ACTIVES:
+            raise MiddlewareNotUsed
+        installer()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mesure = Mesure()
+        jeton = _courante.set(mesure)
+        try:
+            response = self.get_response(request)
+        finally:
+            _courante.reset(jeton)
+        return _terminer(request, response, mesure)
+
+    async def __acall__(self, request):
+        mesure = Mesure()
+        jeton = _courante.set(mesure)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _courante.reset(jeton)
+        return _terminer(request, response, mesure)
+
+
+def mesures_recentes(limite=None):
+    """Mesures les plus récentes d'abord."""
+    with _verrou:
+        mesures = list(_tampon)
+    mesures.reverse()
+    return mesures[:limite] if limite else mesures
+
+
+def synthese():
+    """Par vue : nombre de requêtes HTTP, moyennes et maxima, dépassements de budget."""
+    par_vue = defaultdict(list)
+    for mesure in mesures_recentes():
+        par_vue[mesure['vue']].append(mesure)
+    resultat = {}
+    for vue, mesures in par_vue.items():
+        nombre = len(mesures)
+        resultat[vue or '-'] = {
+            'nombre': nombre,
+            'requetes_moy': round(sum(m['requetes'] for m in mesures) / nombre, 2),
+            'requetes_max': max(m['requetes'] for m in mesures),
+            'sql_ms_moy': round(sum(m['sql_ms'] for m in mesures) / nombre, 2),
+            'rendu_ms_moy': round(sum(m['rendu_ms'] for m in mesures) / nombre, 2),
+            'duree_ms_moy': round(sum(m['duree_ms'] for m in mesures) / nombre, 2),
+            'duree_ms_max': max(m['duree_ms'] for m in mesures),
+            'doublons': sum(m['doublons'] for m in mesures),
+            'depassements': sum(1 for m in mesures if m['depassements']),
+        }
+    return resultat
+
+
+def vider():
+    with _verrou:
+        _tampon.clear()
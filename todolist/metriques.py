@@ -0,0 +1,359 @@
+"""
+Métriques au format d'exposition texte de Prometheus, servies par /metrics.
+
+- todolist_http_duree_secondes : histogramme des durées de réponse par vue
+  (nom d'URL : tasks:liste, projects:detail, tableau_de_bord...) ;
+- todolist_http_requetes_sql : histogramme du nombre de requêtes SQL par
+  réponse, par vue ;
+- todolist_http_reponses_total : réponses par vue et code de statut ;
+- todolist_cache_lectures_total / todolist_cache_taux_succes : lectures du
+  cache applicatif par espace (todolist.cache) ;
+- todolist_taches_mutations_total : tâches créées, modifiées, supprimées,
+  écritures groupées et imports compris.
+
+Chaque thread incrémente ses propres compteurs (threading.local) : aucun
+verrou sur le chemin d'une requête. La collecte additionne les fragments de
+tous les threads ; la copie d'un dict est atomique sous le GIL.
+
+Serveurs à processus multiples (gunicorn, uWSGI...) : avec
+METRIQUES_REPERTOIRE, chaque processus y publie ses valeurs (un fichier
+JSON par pid, au plus toutes les METRIQUES_INTERVALLE secondes et à chaque
+collecte) et /metrics additionne les fichiers de tous les processus. Le
+répertoire est à vider au redémarrage du serveur.
+
+Accès à /metrics : si METRIQUES_JETON est défini, l'en-tête
+`Authorization: Bearer <jeton>` est exigé ; sinon, seul le personnel
+connecté (is_staff) y accède. METRIQUES_PUBLIQUES = True (variable
+d'environnement DJANGO_METRIQUES_PUBLIQUES=1) lève ce contrôle, par exemple
+derrière un proxy qui filtre déjà l'accès.
+"""
+import atexit
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+METRIQUES_ACTIVES = getattr(settings, 'METRIQUES_ACTIVES', True)
+METRIQUES_REPERTOIRE = getattr(settings, 'METRIQUES_REPERTOIRE', None)
+METRIQUES_INTERVALLE = getattr(settings, 'METRIQUES_INTERVALLE', 5)
+METRIQUES_JETON = getattr(settings, 'METRIQUES_JETON', None)
+METRIQUES_PUBLIQUES = getattr(settings, 'METRIQUES_PUBLIQUES', False)
+
+TYPE_CONTENU = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Vue des réponses non routées (404 hors des URL connues) : borne la cardinalité
+VUE_INCONNUE = 'aucune'
+
+_registre = {}
+_verrou = threading.Lock()
+_fragments = []
+_local = threading.local()
+
+
+class _Fragment:
+    """Valeurs d'un thread : {(nom, labels): valeur} et {(nom, labels): [seaux..., somme]}."""
+    __slots__ = ('compteurs', 'histogrammes')
+
+    def __init__(self):
+        self.compteurs = {}
+        self.histogrammes = {}
+
+
+def _fragment():
+    try:
+        return _local.fragment
+    except AttributeError:
+        fragment = _local.fragment = _Fragment()
+        # Une fois par thread ; le fragment survit au thread, ses valeurs restent comptées
+        with _verrou:
+            _fragments.append(fragment)
+        return fragment
+
+
+class Compteur:
+    type = 'counter'
+
+    def __init__(self, nom, aide, labels=()):
+        self.nom, self.aide, self.labels = nom, aide, tuple(labels)
+        _registre[nom] = self
+
+    def inc(self, *labels, valeur=1):
+        compteurs = _fragment().compteurs
+        cle = (self.nom, labels)
+        compteurs[cle] = compteurs.get(cle, 0) + valeur
+
+
+class Histogramme:
+    type = 'histogram'
+
+    def __init__(self, nom, aide, labels=(), bornes=()):
+        self.nom, self.aide, self.labels = nom, aide, tuple(labels)
+        self.bornes = tuple(bornes)
+        _registre[nom] = self
+
+    def observer(self, valeur, *labels):
+        histogrammes = _fragment().histogrammes
+        cle = (self.nom, labels)
+        seaux = histogrammes.get(cle)
+        if seaux is None:
+            # Un seau par borne, un pour +Inf, puis la somme des observations
+            seaux = histogrammes[cle] = [0] * (len(self.bornes) + 2)
+        seaux[bisect.bisect_left(self.bornes, valeur)] += 1
+        seaux[-1] += valeur
+
+
+DUREE = Histogramme(
+    'todolist_http_duree_secondes', 'Durée des réponses HTTP, par vue.', ('vue',),
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUETES_SQL = Histogramme(
+    'todolist_http_requetes_sql', 'Nombre de requêtes SQL par réponse HTTP, par vue.', ('vue',),
+    (0, 1, 2, 3, 5, 8, 13, 20, 50, 100),
+)
+REPONSES = Compteur('todolist_http_reponses_total', 'Réponses HTTP, par vue et code de statut.', ('vue', 'code'))
+LECTURES_CACHE = Compteur(
+    'todolist_cache_lectures_total', 'Lectures du cache applicatif, par espace et résultat.', ('espace', 'resultat')
+)
+MUTATIONS = Compteur('todolist_taches_mutations_total', 'Tâches créées, modifiées ou supprimées.', ('operation',))
+
+CREATION = 'creation'
+MODIFICATION = 'modification'
+SUPPRESSION = 'suppression'
+
+
+def compter_mutations(operation, nombre=1):
+    """Compte `nombre` tâches créées, modifiées ou supprimées (CREATION, MODIFICATION, SUPPRESSION)."""
+    if nombre:
+        MUTATIONS.inc(operation, valeur=nombre)
+
+
+class _Suivi:
+    """Requête HTTP en cours et nombre de requêtes SQL exécutées pour elle."""
+    __slots__ = ('request', 'requetes')
+
+    def __init__(self, request):
+        self.request = request
+        self.requetes = 0
+
+
+# Suivi de la requête HTTP en cours ; suit le contexte dans les threads de
+# sync_to_async, où s'exécutent les requêtes SQL des vues async
+_suivi = contextvars.ContextVar('suivi_http', default=None)
+_installe = False
+
+
+def requete_courante():
+    """Requête HTTP en cours de traitement (None hors requête, ou métriques désactivées)."""
+    suivi = _suivi.get()
+    return suivi.request if suivi is not None else None
+
+
+def _compter_requete(execute, sql, params, many, context):
+    suivi = _suivi.get()
+    if suivi is not None:
+        suivi.requetes += 1
+    return execute(sql, params, many, context)
+
+
+def _brancher(connection, **kwargs):
+    # En tête de liste : un `with connection.execute_wrapper(...)` ouvert pendant
+    # le branchement retire à sa sortie sa propre enveloppe (la dernière)
+    if _compter_requete not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _compter_requete)
+
+
+def installer():
+    """Branche le comptage des requêtes SQL sur les connexions existantes et futures."""
+    global _installe
+    with _verrou:
+        if _installe:
+            return
+        _installe = True
+    connection_created.connect(_brancher, dispatch_uid='metriques')
+    for connection in connections.all(initialized_only=True):
+        _brancher(connection)
+    if METRIQUES_REPERTOIRE:
+        atexit.register(publier)
+
+
+# Dernière publication (processus multiples) ; une course entre threads ne
+# cause qu'une écriture de plus
+_publiee = 0.0
+
+
+def _observer(request, response, debut, suivi):
+    global _publiee
+    match = request.resolver_match
+    vue = match.view_name if match else VUE_INCONNUE
+    DUREE.observer(time.perf_counter() - debut, vue)
+    REQUETES_SQL.observer(suivi.requetes, vue)
+    REPONSES.inc(vue, str(response.status_code))
+    if METRIQUES_REPERTOIRE and time.monotonic() - _publiee >= METRIQUES_INTERVALLE:
+        _publiee = time.monotonic()
+        publier()
+    return response
+
+
+class MetriquesMiddleware:
+    """Durée, requêtes SQL et code de chaque réponse ; à placer en tête de MIDDLEWARE."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not METRIQUES_ACTIVES:
+            raise MiddlewareNotUsed
+        installer()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        debut, suivi = time.perf_counter(), _Suivi(request)
+        jeton = _suivi.set(suivi)
+        try:
+            response = self.get_response(request)
+        finally:
+            _suivi.reset(jeton)
+        return _observer(request, response, debut, suivi)
+
+    async def __acall__(self, request):
+        debut, suivi = time.perf_counter(), _Suivi(request)
+        jeton = _suivi.set(suivi)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _suivi.reset(jeton)
+        return _observer(request, response, debut, suivi)
+
+
+def instantane():
+    """Valeurs du processus : {'compteurs': [[nom, labels, valeur]], 'histogrammes': [[nom, labels, seaux]]}."""
+    from .cache import statistiques
+
+    compteurs = defaultdict(float)
+    histogrammes = {}
+    with _verrou:
+        fragments = list(_fragments)
+    for fragment in fragments:
+        for cle, valeur in fragment.compteurs.copy().items():
+            compteurs[cle] += valeur
+        for cle, seaux in fragment.histogrammes.copy().items():
+            _ajouter(histogrammes, cle, list(seaux))
+    for espace, valeurs in statistiques().items():
+        compteurs[(LECTURES_CACHE.nom, (espace, 'succes'))] += valeurs['succes']
+        compteurs[(LECTURES_CACHE.nom, (espace, 'echec'))] += valeurs['echecs']
+    return {
+        'compteurs': [[nom, list(labels), valeur] for (nom, labels), valeur in compteurs.items()],
+        'histogrammes': [[nom, list(labels), seaux] for (nom, labels), seaux in histogrammes.items()],
+    }
+
+
+def _ajouter(histogrammes, cle, seaux):
+    total = histogrammes.get(cle)
+    if total is None:
+        histogrammes[cle] = seaux
+    else:
+        for i, valeur in enumerate(seaux):
+            total[i] += valeur
+
+
+def _fichier(pid):
+    return os.path.join(METRIQUES_REPERTOIRE, f'metriques-{pid}.json')
+
+
+def publier():
+    """Écrit les valeurs du processus dans METRIQUES_REPERTOIRE (remplacement atomique)."""
+    chemin = _fichier(os.getpid())
+    temporaire = f'{chemin}.{threading.get_ident()}.tmp'
+    with open(temporaire, 'w') as f:
+        json.dump(instantane(), f)
+    os.replace(temporaire, chemin)
+
+
+def _instantanes():
+    if not METRIQUES_REPERTOIRE:
+        return [instantane()]
+    publier()
+    resultat = []
+    for nom in os.listdir(METRIQUES_REPERTOIRE):
+        if nom.startswith('metriques-') and nom.endswith('.json'):
+            try:
+                with open(os.path.join(METRIQUES_REPERTOIRE, nom)) as f:
+                    resultat.append(json.load(f))
+            except (OSError, ValueError):
+                # Fichier retiré ou en cours de remplacement
+                continue
+    return resultat
+
+
+def _echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(noms, valeurs, *supplementaires):
+    paires = [*zip(noms, valeurs), *supplementaires]
+    if not paires:
+        return ''
+    return '{' + ','.join(f'{nom}="{_echapper(valeur)}"' for nom, valeur in paires) + '}'
+
+
+def _nombre(valeur):
+    if isinstance(valeur, float) and valeur.is_integer():
+        return str(int(valeur))
+    return repr(valeur)
+
+
+def exposition():
+    """Texte d'exposition Prometheus des valeurs de ce processus, ou de tous (METRIQUES_REPERTOIRE)."""
+    compteurs = defaultdict(float)
+    histogrammes = {}
+    for valeurs in _instantanes():
+        for nom, labels, valeur in valeurs['compteurs']:
+            compteurs[(nom, tuple(labels))] += valeur
+        for nom, labels, seaux in valeurs['histogrammes']:
+            _ajouter(histogrammes, (nom, tuple(labels)), list(seaux))
+
+    lignes = []
+    for metrique in _registre.values():
+        lignes.append(f'# HELP {metrique.nom} {metrique.aide}')
+        lignes.append(f'# TYPE {metrique.nom} {metrique.type}')
+        if metrique.type == 'counter':
+            for (nom, labels), valeur in sorted(compteurs.items()):
+                if nom == metrique.nom:
+                    lignes.append(f'{nom}{_labels(metrique.labels, labels)} {_nombre(valeur)}')
+            continue
+        for (nom, labels), seaux in sorted(histogrammes.items()):
+            if nom != metrique.nom:
+                continue
+            cumul = 0
+            for borne, nombre in zip((*metrique.bornes, '+Inf'), seaux):
+                cumul += nombre
+                le = _nombre(borne) if borne != '+Inf' else borne
+                lignes.append(f'{nom}_bucket{_labels(metrique.labels, labels, ("le", le))} {cumul}')
+            lignes.append(f'{nom}_sum{_labels(metrique.labels, labels)} {_nombre(seaux[-1])}')
+            lignes.append(f'{nom}_count{_labels(metrique.labels, labels)} {cumul}')
+
+    lignes.append('# HELP todolist_cache_taux_succes Part des lectures du cache applicatif servies depuis le cache.')
+    lignes.append('# TYPE todolist_cache_taux_succes gauge')
+    lectures = defaultdict(dict)
+    for (nom, labels), valeur in compteurs.items():
+        if nom == LECTURES_CACHE.nom:
+            espace, resultat = labels
+            lectures[espace][resultat] = valeur
+    for espace, valeurs in sorted(lectures.items()):
+        total = valeurs.get('succes', 0) + valeurs.get('echec', 0)
+        if total:
+            lignes.append(f'todolist_cache_taux_succes{_labels(("espace",), (espace,))} '
+                          f'{_nombre(round(valeurs.get("succes", 0) / total, 4))}')
+    return '\n'.join(lignes) + '\n'
@@ -0,0 +1,366 @@
+"""
+Profilage à la demande d'une requête, réservé au personnel.
+
+Un membre du personnel ajoute `?_profile=<format>` à l'URL (ou envoie
+l'en-tête `X-Profile: <format>`) : la vue est exécutée sous cProfile et la
+réponse est remplacée par le profil.
+
+- `1` ou `html` : répartition du temps et arbre d'appels, en HTML ;
+- `collapsed` : piles repliées (`a;b;c microsecondes`), à passer à
+  flamegraph.pl, speedscope ou inferno ;
+- `prof` : fichier .prof (format pstats) à télécharger, pour snakeviz,
+  gprof2dot ou flameprof.
+
+Avec PROFILAGE_REPERTOIRE, chaque profil y est aussi enregistré en .prof.
+PROFILAGE_ACTIF = False retire le middleware de la chaîne.
+
+Le temps est réparti entre le code de la vue (application), l'ORM, le rendu
+des templates, le code de rbac (dont le processeur de contexte), l'attente
+(verrous, sélecteurs : un thread qui attend l'autre dans une vue async) et
+le reste (Django, bibliothèque standard). Les piles repliées sont reconstruites
+à partir du graphe d'appels agrégé de cProfile : c'est une approximation
+lorsqu'une fonction est appelée depuis plusieurs contextes.
+
+Vues async : la vue est exécutée dans une boucle d'événements dont le
+thread est profilé en plus du thread de la requête, où s'exécute l'ORM
+(sync_to_async). Sous ASGI, la boucle étant partagée, le profil peut
+inclure des coroutines d'autres requêtes.
+"""
+import cProfile
+import html
+import io
+import marshal
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.utils.text import slugify
+
+PROFILAGE_ACTIF = getattr(settings, 'PROFILAGE_ACTIF', True)
+PROFILAGE_REPERTOIRE = getattr(settings, 'PROFILAGE_REPERTOIRE', None)
+
+PARAMETRE = '_profile'
+EN_TETE = 'X-Profile'
+FORMATS = {'1': 'html', 'html': 'html', 'collapsed': 'collapsed', 'prof': 'prof'}
+
+# Arbre d'appels : profondeur et nombre de nœuds maximaux, part minimale du
+# temps total d'un nœud (affiché en HTML, retenu dans les piles repliées)
+PROFONDEUR_MAX = 25
+NOEUDS_MAX = 20000
+PART_MIN_HTML = 0.005
+PART_MIN_PILES = 0.0005
+
+_RACINE = os.path.join(str(settings.BASE_DIR), '')
+_RBAC = os.path.join(_RACINE, 'rbac', '')
+_ORM = f'{os.sep}django{os.sep}db{os.sep}'
+_TEMPLATES = f'{os.sep}django{os.sep}template{os.sep}'
+_EXCLUS = ('site-packages', f'{os.sep}.venv{os.sep}', f'{os.sep}venv{os.sep}')
+_CE_MODULE = os.path.abspath(__file__)
+
+CATEGORIES = ('vue', 'orm', 'templates', 'rbac', 'attente', 'autres')
+
+# Fonctions bloquantes : un thread y attend l'autre (vues async) ou une entrée/sortie
+_ATTENTES = (
+    "<method 'acquire' of '_thread.lock' objects>",
+    "<method 'acquire' of '_thread.RLock' objects>",
+    "<method 'poll' of 'select.epoll' objects>",
+    "<method 'select' of 'select.kqueue' objects>",
+    "<built-in method select.select>",
+    "<built-in method time.sleep>",
+)
+
+
+def categorie(fonction):
+    """Catégorie d'une fonction pstats (fichier, ligne, nom)."""
+    fichier, _, nom = fonction
+    if fichier == '~' and nom in _ATTENTES:
+        return 'attente'
+    if _ORM in fichier or 'sqlite3' in nom:
+        return 'orm'
+    if _TEMPLATES in fichier:
+        return 'templates'
+    if fichier.startswith(_RBAC):
+        return 'rbac'
+    if fichier.startswith(_RACINE) and fichier != _CE_MODULE and not any(e in fichier for e in _EXCLUS):
+        return 'vue'
+    return 'autres'
+
+
+def _format(request):
+    """Format demandé par la requête, sans vérifier l'utilisateur, ou None."""
+    valeur = request.GET.get(PARAMETRE) or request.headers.get(EN_TETE)
+    if not valeur or valeur.lower() not in FORMATS:
+        return None
+    return FORMATS[valeur.lower()]
+
+
+def _autorise(user):
+    return user is not None and user.is_active and user.is_staff
+
+
+def format_demande(request):
+    """Format de profil demandé par un membre du personnel, ou None."""
+    format = _format(request)
+    if format is None or not _autorise(getattr(request, 'user', None)):
+        return None
+    return format
+
+
+class Profil:
+    """Profilers d'une requête (un par thread) et durée mesurée de la vue."""
+
+    def __init__(self):
+        self.profilers = []
+        self.duree = 0.0
+
+    @contextmanager
+    def dans_ce_thread(self):
+        profiler = cProfile.Profile()
+        self.profilers.append(profiler)
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+    def statistiques(self):
+        stats = None
+        for profiler in self.profilers:
+            profiler.create_stats()
+            if not profiler.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+        return stats
+
+
+def executer_vue(view_func, request, args, kwargs):
+    """Exécute la vue (et le rendu d'une réponse différée) sous profilage ; retourne (Profil, réponse)."""
+    profil = Profil()
+    debut = time.perf_counter()
+    with profil.dans_ce_thread():
+        if iscoroutinefunction(view_func):
+            response = async_to_sync(_vue_async)(profil, view_func, request, args, kwargs)
+        else:
+            response = view_func(request, *args, **kwargs)
+        if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+            response = response.render()
+    profil.duree = time.perf_counter() - debut
+    return profil, response
+
+
+async def _vue_async(profil, view_func, request, args, kwargs):
+    # Thread de la boucle ; l'ORM (sync_to_async) revient dans le thread appelant, déjà profilé
+    with profil.dans_ce_thread():
+        return await view_func(request, *args, **kwargs)
+
+
+def _inclusif(stats, predicat):
+    """Temps cumulé des fonctions satisfaisant predicat, compté à l'entrée depuis une autre fonction."""
+    total = 0.0
+    for fonction, (_, _, _, _, appelants) in stats.stats.items():
+        if not predicat(fonction):
+            continue
+        for appelant, (_, _, _, cumul) in appelants.items():
+            if not predicat(appelant):
+                total += cumul
+    return total
+
+
+def repartition(stats):
+    """Temps propre par catégorie, et temps inclusif des couches ORM, templates et rbac."""
+    propre = dict.fromkeys(CATEGORIES, 0.0)
+    for fonction, (_, _, temps_propre, _, _) in stats.stats.items():
+        propre[categorie(fonction)] += temps_propre
+    processeur = os.path.join(_RBAC, 'context_processors.py')
+    inclusif = {
+        'orm': _inclusif(stats, lambda f: categorie(f) == 'orm'),
+        'templates': _inclusif(stats, lambda f: categorie(f) == 'templates'),
+        'rbac': _inclusif(stats, lambda f: categorie(f) == 'rbac'),
+        'rbac_processeur_contexte': _inclusif(stats, lambda f: f[0] == processeur),
+    }
+    return propre, inclusif
+
+
+def _nom(fonction):
+    fichier, ligne, nom = fonction
+    if fichier == '~':
+        return nom
+    if fichier.startswith(_RACINE):
+        fichier = os.path.relpath(fichier, _RACINE)
+    else:
+        fichier = os.path.basename(fichier)
+    return f'{nom} ({fichier}:{ligne})'
+
+
+def _racines(stats):
+    appelees = {f for f, (_, _, _, _, appelants) in stats.stats.items() if appelants}
+    return sorted((f for f in stats.stats if f not in appelees), key=lambda f: -stats.stats[f][3])
+
+
+def _arbre(stats, seuil):
+    """
+    Déplie le graphe d'appels depuis les racines : (profondeur, fonction,
+    temps cumulé sur ce chemin, temps propre estimé, chemin). Le temps d'un
+    arc est réparti entre les chemins qui mènent à l'appelant au prorata de
+    leur part de son temps cumulé.
+    """
+    stats.calc_callees()
+    noeuds = []
+
+    def visiter(fonction, cumul, chemin, profondeur):
+        cumul_total = stats.stats[fonction][3]
+        part = min(cumul / cumul_total, 1.0) if cumul_total else 0.0
+        enfants = sorted(
+            (
+                (f, valeurs[3] * part)
+                for f, valeurs in stats.all_callees.get(fonction, {}).items() if f not in chemin
+            ),
+            key=lambda item: -item[1],
+        )
+        enfants = [(f, c) for f, c in enfants if c >= seuil]
+        propre = max(cumul - sum(c for _, c in enfants), 0.0)
+        noeuds.append((profondeur, fonction, cumul, propre, chemin + (fonction,)))
+        if profondeur < PROFONDEUR_MAX:
+            for enfant, cumul_enfant in enfants:
+                if len(noeuds) >= NOEUDS_MAX:
+                    return
+                visiter(enfant, cumul_enfant, chemin + (fonction,), profondeur + 1)
+
+    for racine in _racines(stats):
+        if stats.stats[racine][3] >= seuil:
+            visiter(racine, stats.stats[racine][3], (), 0)
+    return noeuds
+
+
+def piles_repliees(stats):
+    """Piles repliées (une ligne `f1;f2;f3 microsecondes` par chemin), pour les outils de flamegraph."""
+    lignes = []
+    for _, _, _, propre, chemin in _arbre(stats, stats.total_tt * PART_MIN_PILES):
+        microsecondes = round(propre * 1e6)
+        if microsecondes:
+            lignes.append(';'.join(_nom(f).replace(';', ',') for f in chemin) + f' {microsecondes}')
+    return '\n'.join(lignes) + '\n'
+
+
+def _html(request, profil, stats, response):
+    propre, inclusif = repartition(stats)
+    total = stats.total_tt or 1
+    vue = getattr(request.resolver_match, 'view_name', None) or request.path
+    tampon = io.StringIO()
+    stats.stream = tampon
+    stats.sort_stats('cumulative').print_stats(40)
+
+    lignes = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8">',
+        f'<title>Profil – {html.escape(vue)}</title>',
+        '<style>body{font-family:sans-serif;margin:2em}td,th{padding:2px 12px;text-align:right}'
+        'td:first-child,th:first-child{text-align:left}details{margin-left:1.2em}'
+        'summary{font-family:monospace;white-space:nowrap}pre{font-size:12px}</style></head><body>',
+        f'<h1>{html.escape(request.method)} {html.escape(request.get_full_path())}</h1>',
+        f'<p>Vue {html.escape(vue)} : réponse {response.status_code}, {profil.duree * 1000:.1f} ms '
+        f'(dont surcoût du profilage), {stats.total_calls} appels.</p>',
+        '<h2>Répartition</h2><table><tr><th>Catégorie</th><th>Temps propre (ms)</th><th>%</th>'
+        '<th>Temps inclusif (ms)</th></tr>',
+    ]
+    for nom in CATEGORIES:
+        cumul = f'{inclusif[nom] * 1000:.1f}' if nom in inclusif else ''
+        lignes.append(
+            f'<tr><td>{nom}</td><td>{propre[nom] * 1000:.1f}</td><td>{propre[nom] / total:.0%}</td>'
+            f'<td>{cumul}</td></tr>'
+        )
+    lignes.append(
+        f'<tr><td>dont processeur de contexte rbac</td><td></td><td></td>'
+        f'<td>{inclusif["rbac_processeur_contexte"] * 1000:.1f}</td></tr></table>'
+    )
+
+    lignes.append('<h2>Arbre d\'appels</h2>')
+    profondeur_courante = -1
+    for profondeur, fonction, cumul, propre_noeud, _ in _arbre(stats, total * PART_MIN_HTML):
+        while profondeur_courante >= profondeur:
+            lignes.append('</details>')
+            profondeur_courante -= 1
+        lignes.append(
+            f'<details{" open" if profondeur < 4 else ""}><summary>{cumul * 1000:8.1f} ms '
+            f'[{categorie(fonction)}] {html.escape(_nom(fonction))} '
+            f'(propre {propre_noeud * 1000:.1f} ms)</summary>'
+        )
+        profondeur_courante = profondeur
+    lignes.extend(['</details>'] * (profondeur_courante + 1))
+    lignes.append(f'<h2>Fonctions (temps cumulé)</h2><pre>{html.escape(tampon.getvalue())}</pre></body></html>')
+    return '\n'.join(lignes)
+
+
+def _nom_fichier(request):
+    vue = getattr(request.resolver_match, 'view_name', None) or request.path
+    return f"profil-{slugify(vue.replace(':', '-')) or 'vue'}-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+
+
+def reponse_profil(request, format, profil, response):
+    """Réponse remplaçant la page : profil au format demandé."""
+    stats = profil.statistiques()
+    if stats is None:
+        return HttpResponse('Aucun appel profilé.\n', content_type='text/plain; charset=utf-8')
+    nom = _nom_fichier(request)
+    donnees = marshal.dumps(stats.stats)
+    if PROFILAGE_REPERTOIRE:
+        os.makedirs(PROFILAGE_REPERTOIRE, exist_ok=True)
+        with open(os.path.join(PROFILAGE_REPERTOIRE, nom), 'wb') as f:
+            f.write(donnees)
+
+    if format == 'prof':
+        reponse = HttpResponse(donnees, content_type='application/octet-stream')
+        reponse['Content-Disposition'] = f'attachment; filename="{nom}"'
+    elif format == 'collapsed':
+        reponse = HttpResponse(piles_repliees(stats), content_type='text/plain; charset=utf-8')
+    else:
+        reponse = HttpResponse(_html(request, profil, stats, response))
+    reponse['Cache-Control'] = 'no-store'
+    return reponse
+
+
+class ProfilageMiddleware:
+    """
+    Profile la vue pour un membre du personnel qui le demande ; à placer
+    après AuthenticationMiddleware. Sans demande, une lecture de paramètre
+    et d'en-tête par requête, sans changement de thread sous ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not PROFILAGE_ACTIF:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # process_view synchrone serait adapté par sync_to_async à chaque requête
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        # En mode async, get_response retourne la coroutine, attendue par l'appelant
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        format = format_demande(request)
+        if format is None:
+            return None
+        return self._profiler(format, request, view_func, view_args, view_kwargs)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        format = _format(request)
+        # Utilisateur chargé seulement si un profil est demandé
+        if format is None or not _autorise(await request.auser()):
+            return None
+        return await sync_to_async(self._profiler)(format, request, view_func, view_args, view_kwargs)
+
+    def _profiler(self, format, request, view_func, view_args, view_kwargs):
+        profil, response = executer_vue(view_func, request, view_args, view_kwargs)
+        return reponse_profil(request, format, profil, response)
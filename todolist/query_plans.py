@@ -0,0 +1,53 @@
+"""
+Outils d'analyse des plans d'exécution SQLite (EXPLAIN QUERY PLAN).
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connections, DEFAULT_DB_ALIAS
+
+# "SCAN tasks_tache" sans "USING INDEX" : parcours complet de la table
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def explain_query_plan(sql, params=None, using=DEFAULT_DB_ALIAS):
+    """
+    Retourne les lignes de détail de EXPLAIN QUERY PLAN pour une requête.
+    Retourne une liste vide pour les bases autres que SQLite.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params or ())
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_table_scans(sql, params=None, using=DEFAULT_DB_ALIAS):
+    """
+    Retourne les tables parcourues intégralement par une requête.
+    Les sous-requêtes (CO-ROUTINE, tables temporaires) sont ignorées.
+    """
+    tables = set(connections[using].introspection.table_names())
+    scans = []
+    for detail in explain_query_plan(sql, params, using):
+        match = _FULL_SCAN.match(detail.strip())
+        if match and match.group(1) in tables:
+            scans.append(match.group(1))
+    return scans
+
+
+@contextmanager
+def capture_selects(using=DEFAULT_DB_ALIAS):
+    """
+    Enregistre les requêtes SELECT exécutées (sql, params) dans le bloc.
+    """
+    captured = []
+
+    def wrapper(execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            captured.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connections[using].execute_wrapper(wrapper):
+        yield captured
@@ -0,0 +1,181 @@
+"""
+Journal des requêtes SQL lentes.
+
+Désactivé par défaut : REQUETES_LENTES_ACTIVES (variable d'environnement
+DJANGO_REQUETES_LENTES=1) l'active. Un execute_wrapper, branché alors au
+démarrage sur toutes les connexions (TodolistConfig.ready), chronomètre
+chaque requête. Au-delà de
+REQUETES_LENTES_SEUIL_MS, la requête est journalisée avec :
+- ses paramètres et sa durée ;
+- la vue d'origine (todolist.metriques suit la requête HTTP en cours) ;
+- la première frame du code de l'application dans la pile d'appel ;
+- le plan d'exécution (EXPLAIN QUERY PLAN, SQLite seulement).
+
+Deux journaux : `todolist.requetes_lentes`, lisible, en WARNING, et
+`todolist.requetes_lentes.jsonl`, une ligne JSON par requête, écrit par
+settings.LOGGING dans un fichier à rotation (REQUETES_LENTES_FICHIER, sous
+JOURNAUX_REPERTOIRE par défaut ; le répertoire est créé à l'installation).
+
+REQUETES_LENTES_ECHANTILLON est la part des requêtes lentes journalisées.
+REQUETES_LENTES_PAR_MINUTE plafonne leur nombre, pour ne pas aggraver une
+surcharge ; le nombre de requêtes écartées figure dans l'entrée suivante.
+Un seuil de 0 désactive le journal.
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from .metriques import requete_courante
+from .query_plans import explain_query_plan
+
+logger = logging.getLogger(__name__)
+logger_jsonl = logging.getLogger(f'{__name__}.jsonl')
+
+REQUETES_LENTES_ACTIVES = getattr(settings, 'REQUETES_LENTES_ACTIVES', False)
+REQUETES_LENTES_SEUIL_MS = getattr(settings, 'REQUETES_LENTES_SEUIL_MS', 200)
+REQUETES_LENTES_ECHANTILLON = getattr(settings, 'REQUETES_LENTES_ECHANTILLON', 1.0)
+REQUETES_LENTES_PAR_MINUTE = getattr(settings, 'REQUETES_LENTES_PAR_MINUTE', 30)
+REQUETES_LENTES_FICHIER = getattr(settings, 'REQUETES_LENTES_FICHIER', None)
+
+# Longueur du SQL dans le journal lisible (le fichier JSONL garde tout)
+LONGUEUR_SQL = 500
+
+# Code de l'application : sous BASE_DIR, hors environnements virtuels et hors
+# des modules d'instrumentation
+_RACINE = os.path.join(str(settings.BASE_DIR), '')
+_EXCLUS = ('site-packages', f'{os.sep}.venv{os.sep}', f'{os.sep}venv{os.sep}')
+_INSTRUMENTATION = {
+    os.path.join(_RACINE, 'todolist', f'{module}.py')
+    for module in ('requetes_lentes', 'metriques', 'mesures', 'query_plans')
+}
+
+# Vrai pendant l'EXPLAIN lancé par le journal : il n'est pas lui-même observé
+_en_explication = contextvars.ContextVar('explication', default=False)
+_installe = False
+
+
+class Limiteur:
+    """Seau à jetons : au plus `par_minute` entrées par minute, en rafale comprise."""
+
+    def __init__(self, par_minute):
+        self.par_minute = par_minute
+        self.jetons = float(par_minute)
+        self.mise_a_jour = time.monotonic()
+        self.ecartees = 0
+        self._verrou = threading.Lock()
+
+    def autoriser(self):
+        """Retourne (autorisé, nombre d'entrées écartées depuis la dernière autorisée)."""
+        with self._verrou:
+            maintenant = time.monotonic()
+            self.jetons = min(
+                self.par_minute, self.jetons + (maintenant - self.mise_a_jour) * self.par_minute / 60
+            )
+            self.mise_a_jour = maintenant
+            if self.jetons < 1:
+                self.ecartees += 1
+                return False, 0
+            self.jetons -= 1
+            ecartees, self.ecartees = self.ecartees, 0
+            return True, ecartees
+
+
+_limiteur = Limiteur(REQUETES_LENTES_PAR_MINUTE)
+
+
+def _origine():
+    """Première frame du code de l'application dans la pile : 'fichier:ligne in fonction'."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        fichier = frame.f_code.co_filename
+        if (fichier.startswith(_RACINE) and fichier not in _INSTRUMENTATION
+                and not any(exclu in fichier for exclu in _EXCLUS)):
+            return f'{os.path.relpath(fichier, _RACINE)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def _plan(sql, params, many, connection):
+    if many or not sql.lstrip()[:6].upper().startswith(('SELECT', 'WITH')):
+        return None
+    jeton = _en_explication.set(True)
+    try:
+        return explain_query_plan(sql, params, using=connection.alias)
+    except Exception as e:
+        # Le journal ne doit jamais faire échouer la requête observée
+        return [f'EXPLAIN impossible : {e}']
+    finally:
+        _en_explication.reset(jeton)
+
+
+def _journaliser(sql, params, many, connection, duree, origine):
+    autorise, ecartees = _limiteur.autoriser()
+    if not autorise:
+        return
+    request = requete_courante()
+    match = getattr(request, 'resolver_match', None)
+    entree = {
+        'horodatage': timezone.now().isoformat(),
+        'duree_ms': round(duree * 1000, 2),
+        'base': connection.alias,
+        'sql': sql,
+        'params': None if many else params,
+        'lots': len(params) if many and hasattr(params, '__len__') else None,
+        'vue': match.view_name if match else None,
+        'methode': request.method if request is not None else None,
+        'chemin': request.path if request is not None else None,
+        'origine': origine,
+        'plan': _plan(sql, params, many, connection),
+        'ecartees': ecartees,
+    }
+    logger.warning(
+        'Requête lente (%.1f ms) [%s] %s : %s%s',
+        entree['duree_ms'], entree['vue'] or '-', origine or '-', sql[:LONGUEUR_SQL],
+        ''.join(f'\n    {ligne}' for ligne in entree['plan'] or ()),
+    )
+    logger_jsonl.info(json.dumps(entree, default=str, ensure_ascii=False))
+
+
+def _observer(execute, sql, params, many, context):
+    if _en_explication.get():
+        return execute(sql, params, many, context)
+    debut = time.perf_counter()
+    resultat = execute(sql, params, many, context)
+    duree = time.perf_counter() - debut
+    if duree * 1000 >= REQUETES_LENTES_SEUIL_MS and random.random() < REQUETES_LENTES_ECHANTILLON:
+        _journaliser(sql, params, many, context['connection'], duree, _origine())
+    return resultat
+
+
+def _brancher(connection, **kwargs):
+    # En tête de liste : un `with connection.execute_wrapper(...)` ouvert pendant
+    # le branchement retire à sa sortie sa propre enveloppe (la dernière)
+    if _observer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _observer)
+
+
+def installer():
+    """
+    Branche le journal sur les connexions existantes et futures ; sans effet
+    s'il est désactivé ou si le seuil est nul.
+    """
+    global _installe
+    if not REQUETES_LENTES_ACTIVES or not REQUETES_LENTES_SEUIL_MS or _installe:
+        return
+    _installe = True
+    if REQUETES_LENTES_FICHIER:
+        # Le fichier est ouvert à la première entrée (delay) : son répertoire doit exister
+        os.makedirs(os.path.dirname(os.fspath(REQUETES_LENTES_FICHIER)), exist_ok=True)
+    connection_created.connect(_brancher, dispatch_uid='requetes_lentes')
+    for connection in connections.all(initialized_only=True):
+        _brancher(connection)
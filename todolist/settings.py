@@ -32,12 +32,16 @@ INSTALLED_APPS = [
     'projects',
     'tasks',
     'rbac',  # Application RBAC personnalisée
+    'sync',  # Flux de changements pour la synchronisation des clients
+    'todolist',  # Instrumentation : journal des requêtes lentes
     "tailwind",
     "theme",
     "django_browser_reload",
 ]
 
 MIDDLEWARE = [
+    'todolist.metriques.MetriquesMiddleware',
+    'todolist.mesures.MesuresMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "django_browser_reload.middleware.BrowserReloadMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -46,6 +50,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'todolist.profilage.ProfilageMiddleware',
 ]
 
 ROOT_URLCONF = 'todolist.urls'
@@ -81,6 +86,75 @@ DATABASES = {
 }
 
 
+# Cache
+# Mémoire locale par défaut (propre à chaque processus) ; tout backend Django
+# convient, par exemple django.core.cache.backends.filebased.FileBasedCache
+# avec un répertoire pour LOCATION, ou Redis / Memcached en production.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'todolist'),
+        'TIMEOUT': 300,
+    }
+}
+
+# Cache applicatif (todolist.cache) : alias de CACHES et durée de vie des valeurs
+APP_CACHE_ALIAS = 'default'
+APP_CACHE_TIMEOUT = 300
+
+# Import en masse par l'API (tasks.importation) : taille maximale du fichier,
+# en octets ; les fichiers plus gros passent par la commande importer_taches
+IMPORT_API_TAILLE_MAX = 10 * 1024 * 1024
+
+# Flux de changements (sync) : rétention des traces de suppression, en jours
+# (commande purger_suppressions, à planifier)
+SYNC_RETENTION_SUPPRESSIONS_JOURS = 90
+# Attente maximale du long-polling, en secondes : chaque client en attente
+# occupe un worker (ou un thread du pool sync_to_async sous ASGI)
+SYNC_ATTENTE_MAX = 5
+
+
+# Mesures par requête (todolist.mesures) : activation, taille du tampon,
+# en-tête Server-Timing et plafonds par vue ('*' : toutes les vues)
+MESURES_ACTIVES = os.environ.get('DJANGO_MESURES', '') == '1'
+MESURES_TAILLE = 500
+MESURES_SERVER_TIMING = DEBUG
+MESURES_BUDGETS = {
+    '*': {'requetes': 30, 'duree_ms': 500},
+    'tableau_de_bord': {'requetes': 8},
+    'projects:detail': {'requetes': 8},
+    'tasks:detail': {'requetes': 8},
+}
+
+# Métriques Prometheus (todolist.metriques, /metrics) : répertoire partagé
+# par les processus d'un serveur pre-fork (agrégation) et accès : jeton Bearer
+# s'il est défini, sinon personnel connecté ; METRIQUES_PUBLIQUES lève le contrôle
+METRIQUES_ACTIVES = True
+METRIQUES_REPERTOIRE = os.environ.get('DJANGO_METRIQUES_REPERTOIRE') or None
+METRIQUES_JETON = os.environ.get('DJANGO_METRIQUES_JETON') or None
+METRIQUES_PUBLIQUES = os.environ.get('DJANGO_METRIQUES_PUBLIQUES') == '1'
+
+# Répertoire des journaux écrits dans des fichiers (créé au besoin)
+JOURNAUX_REPERTOIRE = os.environ.get('DJANGO_JOURNAUX_REPERTOIRE') or BASE_DIR / 'logs'
+
+# Journal des requêtes lentes (todolist.requetes_lentes) : activation
+# (DJANGO_REQUETES_LENTES=1, désactivé par défaut), seuil en ms, part
+# journalisée, plafond par minute et fichier JSONL à rotation
+REQUETES_LENTES_ACTIVES = os.environ.get('DJANGO_REQUETES_LENTES', '') == '1'
+REQUETES_LENTES_SEUIL_MS = int(os.environ.get('DJANGO_REQUETES_LENTES_SEUIL_MS', 200))
+REQUETES_LENTES_ECHANTILLON = 1.0
+REQUETES_LENTES_PAR_MINUTE = 30
+REQUETES_LENTES_FICHIER = (
+    os.environ.get('DJANGO_REQUETES_LENTES_FICHIER') or os.path.join(JOURNAUX_REPERTOIRE, 'requetes_lentes.jsonl')
+)
+
+# Profilage à la demande (todolist.profilage, ?_profile=1 pour le personnel) :
+# activation (DJANGO_PROFILAGE=0 retire le middleware) et répertoire où
+# enregistrer les profils .prof (aucun par défaut)
+PROFILAGE_ACTIF = os.environ.get('DJANGO_PROFILAGE', '1') != '0'
+PROFILAGE_REPERTOIRE = os.environ.get('DJANGO_PROFILAGE_REPERTOIRE') or None
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -137,12 +211,25 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'brut': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'requetes_lentes': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': REQUETES_LENTES_FICHIER,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'brut',
+        },
     },
     'loggers': {
         'django': {
@@ -160,6 +247,16 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': True,
         },
+        'todolist': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': True,
+        },
+        'todolist.requetes_lentes.jsonl': {
+            'handlers': ['requetes_lentes'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
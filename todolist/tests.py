@@ -0,0 +1,893 @@
+import asyncio
+import json
+import marshal
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template as DjangoTemplate
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from projects.models import Projet
+from rbac import views as rbac_views
+from rbac.models import Role, UserRole
+from tasks.dashboard import DASHBOARD_CACHE_TIMEOUT, aget_indicateurs, get_indicateurs
+from tasks.models import Tache
+from tasks.operations import executer
+from . import cache as cache_app, mesures, metriques, profilage, requetes_lentes
+from .query_plans import capture_selects, full_table_scans
+
+User = get_user_model()
+
+
+class QueryPlanTests(TestCase):
+    """
+    Vérifie qu'aucune requête des vues principales ne retombe sur un
+    parcours complet de table (EXPLAIN QUERY PLAN).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user, statut='en_cours')
+        demain = timezone.now() + timedelta(days=1)
+        Tache.objects.bulk_create([
+            Tache(
+                titre=f'Tâche {i}', projet=cls.projet, cree_par=cls.user,
+                statut=Tache.StatutTache.values[i % 3], date_echeance=demain
+            )
+            for i in range(30)
+        ])
+        cls.tache = Tache.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def assertNoFullScan(self, url):
+        with capture_selects() as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        failures = []
+        for sql, params in queries:
+            scans = full_table_scans(sql, params)
+            if scans:
+                failures.append(f"{', '.join(scans)}: {sql}")
+        self.assertFalse(failures, 'Parcours complet de table :\n' + '\n'.join(failures))
+
+    def test_liste_taches(self):
+        self.assertNoFullScan(reverse('tasks:liste'))
+        self.assertNoFullScan(reverse('tasks:liste') + '?statut=en_cours')
+
+    def test_detail_tache(self):
+        self.assertNoFullScan(reverse('tasks:detail', args=[self.tache.id]))
+
+    def test_creer_et_modifier_tache(self):
+        self.assertNoFullScan(reverse('tasks:creer'))
+        self.assertNoFullScan(reverse('tasks:modifier', args=[self.tache.id]))
+
+    def test_liste_projets(self):
+        self.assertNoFullScan(reverse('projects:liste'))
+
+    def test_detail_projet(self):
+        self.assertNoFullScan(reverse('projects:detail', args=[self.projet.id]))
+
+    def test_tableau_de_bord(self):
+        self.assertNoFullScan(reverse('tableau_de_bord'))
+
+
+class DashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        hier = timezone.now() - timedelta(days=1)
+        for i in range(3):
+            projet = Projet.objects.create(titre=f'Projet {i}', proprietaire=cls.user, statut='en_cours')
+            Tache.objects.create(titre='Terminée', projet=projet, cree_par=cls.user, statut='terminee')
+            Tache.objects.create(titre='En retard', projet=projet, cree_par=cls.user, date_echeance=hier)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_indicateurs(self):
+        response = self.client.get(reverse('tableau_de_bord'))
+        self.assertEqual(response.context['projets_actifs_count'], 3)
+        self.assertEqual(response.context['taches_terminees_count'], 3)
+        self.assertEqual(response.context['taches_en_attente_count'], 3)
+
+    def test_nombre_de_requetes(self):
+        # session + utilisateur + indicateurs + projets récents + tâches récentes
+        self.client.get(reverse('tableau_de_bord'))
+        cache.clear()
+        with self.assertNumQueries(5):
+            self.client.get(reverse('tableau_de_bord'))
+        # Indicateurs servis depuis le cache
+        with self.assertNumQueries(4):
+            self.client.get(reverse('tableau_de_bord'))
+
+    def test_invalidation(self):
+        self.client.get(reverse('tableau_de_bord'))
+        Tache.objects.filter(titre='En retard').first().delete()
+        response = self.client.get(reverse('tableau_de_bord'))
+        self.assertEqual(response.context['taches_en_attente_count'], 2)
+
+
+class AsyncViewTests(TestCase):
+    """Vues de lecture servies par la boucle d'événements (client ASGI)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user, statut='en_cours')
+        Tache.objects.bulk_create([
+            Tache(titre=f'Tâche {i}', projet=cls.projet, cree_par=cls.user) for i in range(30)
+        ])
+        cls.tache = Tache.objects.first()
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_redirection_anonyme(self):
+        response = await self.async_client.get(reverse('tasks:liste'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith('/auth/connexion/?next='))
+
+    async def test_pages(self):
+        await self.async_client.aforce_login(self.user)
+        urls = [
+            reverse('tasks:liste'),
+            reverse('tasks:detail', args=[self.tache.id]),
+            reverse('projects:liste'),
+            reverse('projects:detail', args=[self.projet.id]),
+            reverse('tableau_de_bord'),
+        ]
+        for url in urls:
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+        # Plusieurs pages : le nombre de résultats est calculé avant le rendu
+        response = await self.async_client.get(reverse('tasks:liste'))
+        self.assertEqual(response.context['taches'].displayed_count, 30)
+        response = await self.async_client.get(reverse('tableau_de_bord'))
+        self.assertEqual(response.context['projets_actifs_count'], 1)
+
+    async def test_get_conditionnel(self):
+        await self.async_client.aforce_login(self.user)
+        self.async_client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 32
+        url = reverse('tasks:detail', args=[self.tache.id])
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual((await self.async_client.get(reverse('tasks:detail', args=[0]))).status_code, 404)
+
+
+class CacheApplicatifTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.autre = User.objects.create_user(email='bob@example.com', password='motdepasse123')
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        cls.tache = Tache.objects.create(titre='Tâche', projet=cls.projet, cree_par=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        cache_app.reinitialiser_statistiques()
+
+    def lire(self, espace, user):
+        """Valeur en cache, ou None (sans la calculer)."""
+        return cache_app.get_cache().get(cache_app.cle(espace, user.pk, 'test'))
+
+    def remplir(self, *espaces):
+        for espace in espaces:
+            for user in (self.user, self.autre):
+                cache_app.lire(espace, user.pk, ('test',), lambda: 'valeur')
+
+    def test_lecture_et_statistiques(self):
+        calculs = []
+        for _ in range(3):
+            cache_app.lire(cache_app.TACHES, self.user.pk, ('liste',), lambda: calculs.append(1) or 'ok')
+        self.assertEqual(len(calculs), 1)
+        self.assertEqual(
+            cache_app.statistiques()[cache_app.TACHES], {'succes': 2, 'echecs': 1, 'taux_succes': 0.6667}
+        )
+        self.assertIsNone(cache_app.statistiques()[cache_app.PROJETS]['taux_succes'])
+
+    def test_invalidation_par_signaux(self):
+        self.remplir(*cache_app.ESPACES)
+        self.tache.titre = 'Renommée'
+        self.tache.save()
+        # Seuls les espaces des tâches du propriétaire sont invalidés
+        for espace in cache_app.ESPACES_TACHE:
+            self.assertIsNone(self.lire(espace, self.user))
+            self.assertEqual(self.lire(espace, self.autre), 'valeur')
+        self.assertEqual(self.lire(cache_app.PROJETS, self.user), 'valeur')
+
+        self.projet.titre = 'Renommé'
+        self.projet.save()
+        self.assertIsNone(self.lire(cache_app.PROJETS, self.user))
+
+    def test_invalidation_operations_groupees(self):
+        self.remplir(cache_app.TACHES)
+        executer(self.user, 'statut', ids=[self.tache.pk], statut='terminee')
+        self.assertIsNone(self.lire(cache_app.TACHES, self.user))
+        self.assertEqual(self.lire(cache_app.TACHES, self.autre), 'valeur')
+
+    def test_invalidation_roles(self):
+        self.remplir(cache_app.RBAC)
+        role = Role.objects.create(name='relecteur')
+        self.assertIsNone(self.lire(cache_app.RBAC, self.autre))
+
+        self.remplir(cache_app.RBAC)
+        UserRole.objects.create(user=self.user, role=role)
+        self.assertIsNone(self.lire(cache_app.RBAC, self.user))
+        self.assertEqual(self.lire(cache_app.RBAC, self.autre), 'valeur')
+
+    def test_liste_taches_en_cache(self):
+        self.client.force_login(self.user)
+        url = reverse('tasks:liste')
+        self.client.get(url)
+        # Page servie depuis le cache : seuls restent session,
+        # utilisateur et validateurs du GET conditionnel
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertContains(response, 'Tâche')
+
+        self.tache.titre = 'Renommée'
+        self.tache.save()
+        self.assertContains(self.client.get(url), 'Renommée')
+
+    def test_statistiques_reservees_au_personnel(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('statistiques_cache')).status_code, 302)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        response = self.client.get(reverse('statistiques_cache'))
+        self.assertEqual(set(response.json()['espaces']), set(cache_app.ESPACES))
+
+
+class EffetDeMeuteTests(TestCase):
+    """Rafale de 200 requêtes simultanées sur un agrégat absent ou périmé : un seul recalcul."""
+
+    RAFALE = 200
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.calculs = 0
+        self.verrou = threading.Lock()
+
+    def calcul_lent(self, user):
+        with self.verrou:
+            self.calculs += 1
+        time.sleep(0.2)
+        return {'projets_actifs': self.calculs}
+
+    def rafale(self):
+        depart = threading.Barrier(self.RAFALE)
+
+        def requete(_):
+            depart.wait()
+            return get_indicateurs(self.user)
+
+        with mock.patch('tasks.dashboard.calculer_indicateurs', self.calcul_lent):
+            with ThreadPoolExecutor(max_workers=self.RAFALE) as pool:
+                return list(pool.map(requete, range(self.RAFALE)))
+
+    def test_valeur_absente(self):
+        resultats = self.rafale()
+        self.assertEqual(self.calculs, 1)
+        # Les autres requêtes ont attendu le résultat du recalcul
+        self.assertEqual(resultats, [{'projets_actifs': 1}] * self.RAFALE)
+
+    def test_valeur_perimee(self):
+        with mock.patch('tasks.dashboard.calculer_indicateurs', self.calcul_lent):
+            get_indicateurs(self.user)
+        # Échéance dépassée : la valeur reste servie pendant l'unique recalcul
+        with mock.patch('todolist.cache.time.time', return_value=time.time() + DASHBOARD_CACHE_TIMEOUT + 1):
+            resultats = self.rafale()
+        self.assertEqual(self.calculs, 2)
+        self.assertEqual(resultats.count({'projets_actifs': 2}), 1)
+        self.assertEqual(resultats.count({'projets_actifs': 1}), self.RAFALE - 1)
+        self.assertEqual(get_indicateurs(self.user), {'projets_actifs': 2})
+
+    def test_expiration_anticipee(self):
+        enveloppe = cache_app.Enveloppe('valeur', echeance=100.0, duree=1.0)
+        # Loin de l'échéance : jamais ; à l'échéance : toujours ; entre les deux : parfois
+        self.assertFalse(any(cache_app._a_recalculer(enveloppe, 80.0) for _ in range(1000)))
+        self.assertTrue(all(cache_app._a_recalculer(enveloppe, 100.0) for _ in range(1000)))
+        anticipes = sum(cache_app._a_recalculer(enveloppe, 99.0) for _ in range(1000))
+        self.assertTrue(200 < anticipes < 550, anticipes)
+
+    async def test_indicateurs_async(self):
+        calculs = []
+
+        class Requete:
+            async def aget(self):
+                calculs.append(1)
+                await asyncio.sleep(0.2)
+                return {'projets_actifs': 1}
+
+        with mock.patch('tasks.dashboard._requete_indicateurs', lambda user: Requete()):
+            resultats = await asyncio.gather(*(aget_indicateurs(self.user) for _ in range(self.RAFALE)))
+        self.assertEqual(len(calculs), 1)
+        self.assertEqual(resultats, [{'projets_actifs': 1}] * self.RAFALE)
+
+
+class MesuresTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        Tache.objects.create(titre='Tâche', projet=cls.projet, cree_par=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        mesures.vider()
+        self.actives = mock.patch.multiple(
+            'todolist.mesures', MESURES_ACTIVES=True, MESURES_SERVER_TIMING=True,
+            MESURES_BUDGETS={'*': {'requetes': 30}, 'projects:detail': {'requetes': 1}},
+        )
+        self.actives.start()
+        self.addCleanup(self.actives.stop)
+        # Client créé sous le patch : la chaîne de middlewares est construite à sa première requête
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_mesure_et_server_timing(self):
+        response = self.client.get(reverse('projects:liste'))
+        mesure = mesures.mesures_recentes()[0]
+        self.assertEqual(mesure['vue'], 'projects:liste')
+        self.assertEqual(mesure['statut'], 200)
+        self.assertGreater(mesure['requetes'], 0)
+        self.assertGreater(mesure['rendu_ms'], 0)
+        self.assertGreaterEqual(mesure['duree_ms'], mesure['rendu_ms'])
+        self.assertEqual(mesure['depassements'], [])
+        self.assertIn(f'sql;dur={mesure["sql_ms"]};desc="{mesure["requetes"]} requetes"', response['Server-Timing'])
+
+    def test_budget_depasse(self):
+        with self.assertLogs('todolist.mesures', 'WARNING') as journal:
+            self.client.get(reverse('projects:detail', args=[self.projet.id]))
+        self.assertEqual(mesures.mesures_recentes()[0]['depassements'], ['requetes'])
+        self.assertIn('projects:detail', journal.output[0])
+
+    def test_doublons(self):
+        mesure = mesures.Mesure()
+        jeton = mesures._courante.set(mesure)
+        try:
+            for _ in range(3):
+                list(Tache.objects.filter(projet=self.projet))
+            Tache.objects.filter(projet_id=0).exists()
+            Tache.objects.filter(projet_id=-1).exists()
+        finally:
+            mesures._courante.reset(jeton)
+        self.assertEqual(mesure.requetes, 5)
+        self.assertEqual(sum(mesure.executions.values()) - len(mesure.executions), 2)
+        self.assertEqual(sorted(mesure.textes.values()), [2, 3])
+
+    def test_enveloppes_en_tete(self):
+        # Branchement pendant un `with connection.execute_wrapper(...)` : la
+        # sortie du bloc retire sa propre enveloppe, pas celle des mesures
+        enveloppes = connection.execute_wrappers
+        self.addCleanup(enveloppes.__setitem__, slice(None), list(enveloppes))
+        observateurs = (mesures._observer, metriques._compter_requete, requetes_lentes._observer)
+        enveloppes[:] = [enveloppe for enveloppe in enveloppes if enveloppe not in observateurs]
+
+        def capture(execute, sql, params, many, context):
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            for module in (mesures, metriques, requetes_lentes):
+                module._brancher(connection)
+        self.assertNotIn(capture, enveloppes)
+        for observateur in observateurs:
+            self.assertIn(observateur, enveloppes)
+
+    def test_desinstaller(self):
+        self.addCleanup(connection.execute_wrappers.__setitem__, slice(None), list(connection.execute_wrappers))
+        if mesures._installe:
+            self.addCleanup(connection_created.connect, mesures._brancher, dispatch_uid='mesures')
+        rendu = DjangoTemplate.render
+        with mock.patch.object(DjangoTemplate, 'render', rendu), mock.patch('todolist.mesures._installe', False):
+            mesures.installer()
+            self.assertIsNot(DjangoTemplate.render, rendu)
+            self.assertIn(mesures._observer, connection.execute_wrappers)
+            mesures.desinstaller()
+            self.assertIs(DjangoTemplate.render, rendu)
+            self.assertNotIn(mesures._observer, connection.execute_wrappers)
+
+    def test_desactivees(self):
+        with mock.patch('todolist.mesures.MESURES_ACTIVES', False):
+            client = Client()
+            client.force_login(self.user)
+            response = client.get(reverse('projects:liste'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(mesures.mesures_recentes(), [])
+
+    def test_vue_reservee_au_personnel(self):
+        self.client.get(reverse('projects:liste'))
+        self.assertEqual(self.client.get(reverse('mesures_requetes')).status_code, 302)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        response = self.client.get(reverse('mesures_requetes'), {'limite': 2})
+        donnees = response.json()
+        self.assertEqual(len(donnees['mesures']), 2)
+        self.assertEqual(donnees['vues']['projects:liste']['nombre'], 1)
+
+
+class MetriquesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        cls.staff = User.objects.create_user(
+            email='admin@example.com', password='motdepasse123',
+            first_name='Admin', last_name='Durand', is_staff=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def valeur(self, texte, serie):
+        """Valeur d'une série (nom et labels exacts) dans le texte d'exposition ; 0 si absente."""
+        correspondance = re.search(rf'^{re.escape(serie)} (\S+)$', texte, re.MULTILINE)
+        return float(correspondance.group(1)) if correspondance else 0
+
+    def exposer(self):
+        # /metrics est réservé au personnel par défaut
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(reverse('metriques'))
+        self.assertEqual(response['Content-Type'], metriques.TYPE_CONTENU)
+        return response.content.decode()
+
+    def test_histogrammes_par_vue(self):
+        avant = self.exposer()
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse('tasks:liste')).status_code, 200)
+        self.client.get('/inexistante/')
+        texte = self.exposer()
+
+        compte = 'todolist_http_duree_secondes_count{vue="tasks:liste"}'
+        self.assertEqual(self.valeur(texte, compte) - self.valeur(avant, compte), 3)
+        infini = 'todolist_http_duree_secondes_bucket{vue="tasks:liste",le="+Inf"}'
+        self.assertEqual(self.valeur(texte, infini), self.valeur(texte, compte))
+        self.assertIn('# TYPE todolist_http_requetes_sql histogram', texte)
+        self.assertGreater(self.valeur(texte, 'todolist_http_requetes_sql_sum{vue="tasks:liste"}'), 0)
+        self.assertGreaterEqual(
+            self.valeur(texte, 'todolist_http_reponses_total{vue="tasks:liste",code="200"}'), 3
+        )
+        self.assertGreaterEqual(
+            self.valeur(texte, 'todolist_http_reponses_total{vue="aucune",code="404"}'), 1
+        )
+        self.assertIn('todolist_cache_taux_succes{espace="taches"}', texte)
+
+    def test_mutations(self):
+        serie = 'todolist_taches_mutations_total{operation="%s"}'
+        avant = self.exposer()
+        taches = [Tache.objects.create(titre=f'Tâche {i}', projet=self.projet, cree_par=self.user) for i in range(3)]
+        taches[0].save()
+        executer(self.user, 'statut', ids=[t.id for t in taches], statut='terminee')
+        executer(self.user, 'supprimer', ids=[t.id for t in taches[:2]])
+        texte = self.exposer()
+        for operation, attendu in (('creation', 3), ('modification', 4), ('suppression', 2)):
+            self.assertEqual(
+                self.valeur(texte, serie % operation) - self.valeur(avant, serie % operation), attendu, operation
+            )
+
+    def test_fragments_par_thread(self):
+        compteur = metriques.Compteur('todolist_test_total', 'Compteur de test.', ('thread',))
+        self.addCleanup(metriques._registre.pop, compteur.nom)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: [compteur.inc('tous') for _ in range(1000)], range(8)))
+        self.assertIn('todolist_test_total{thread="tous"} 8000', metriques.exposition())
+
+    def test_jeton(self):
+        with mock.patch('todolist.metriques.METRIQUES_JETON', 'secret'):
+            self.assertEqual(self.client.get(reverse('metriques')).status_code, 401)
+            response = self.client.get(reverse('metriques'), HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, 200)
+
+    def test_acces_reserve_au_personnel_par_defaut(self):
+        self.assertEqual(self.client.get(reverse('metriques')).status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('metriques')).status_code, 403)
+        with mock.patch('todolist.metriques.METRIQUES_PUBLIQUES', True):
+            self.assertEqual(self.client.get(reverse('metriques')).status_code, 200)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('metriques')).status_code, 200)
+
+    def test_agregation_multi_processus(self):
+        serie = 'todolist_http_reponses_total{vue="tasks:liste",code="200"}'
+        self.client.get(reverse('tasks:liste'))
+        local = self.valeur(metriques.exposition(), serie)
+        with tempfile.TemporaryDirectory() as repertoire:
+            # Valeurs publiées par un autre processus du serveur
+            with open(os.path.join(repertoire, 'metriques-1.json'), 'w') as f:
+                json.dump({
+                    'compteurs': [['todolist_http_reponses_total', ['tasks:liste', '200'], 5]],
+                    'histogrammes': [],
+                }, f)
+            with mock.patch('todolist.metriques.METRIQUES_REPERTOIRE', repertoire):
+                texte = metriques.exposition()
+                self.assertIn(f'metriques-{os.getpid()}.json', os.listdir(repertoire))
+        self.assertEqual(self.valeur(texte, serie), local + 5)
+
+
+class RequetesLentesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+
+    def setUp(self):
+        # Journal désactivé par défaut : branché sur la connexion le temps du test
+        self.enterContext(connection.execute_wrapper(requetes_lentes._observer))
+        # Seuil nul : toutes les requêtes sont « lentes »
+        self.patch = mock.patch.multiple(
+            'todolist.requetes_lentes', REQUETES_LENTES_SEUIL_MS=0, _limiteur=requetes_lentes.Limiteur(100)
+        )
+        self.patch.start()
+        self.addCleanup(self.patch.stop)
+        # Journal lisible réduit au silence, fichier JSONL détaché : les entrées
+        # sont lues sur le journal JSONL par assertLogs
+        for silence in (
+            mock.patch.object(requetes_lentes.logger, 'disabled', True),
+            mock.patch.object(requetes_lentes.logger_jsonl, 'handlers', []),
+        ):
+            silence.start()
+            self.addCleanup(silence.stop)
+
+    def entrees(self, journal):
+        return [json.loads(record.getMessage()) for record in journal.records]
+
+    def journaliser(self, action):
+        with self.assertLogs('todolist.requetes_lentes.jsonl', 'INFO') as journal:
+            action()
+        return self.entrees(journal)
+
+    def test_installation_sur_activation(self):
+        with mock.patch('todolist.requetes_lentes.connection_created') as signal, \
+                mock.patch('todolist.requetes_lentes._installe', False):
+            requetes_lentes.installer()
+            signal.connect.assert_not_called()
+            with tempfile.TemporaryDirectory() as repertoire:
+                fichier = os.path.join(repertoire, 'journaux', 'requetes_lentes.jsonl')
+                with mock.patch.multiple(
+                    'todolist.requetes_lentes', REQUETES_LENTES_ACTIVES=True, REQUETES_LENTES_SEUIL_MS=200,
+                    REQUETES_LENTES_FICHIER=fichier,
+                ), mock.patch('todolist.requetes_lentes._brancher'):
+                    requetes_lentes.installer()
+                self.assertTrue(os.path.isdir(os.path.dirname(fichier)))
+            signal.connect.assert_called_once()
+
+    def test_entree_complete(self):
+        entrees = self.journaliser(lambda: list(Tache.objects.filter(projet=self.projet, statut='a_faire')))
+        self.assertEqual(len(entrees), 1)
+        entree = entrees[0]
+        self.assertIn('"tasks_tache"', entree['sql'])
+        self.assertEqual(entree['params'], [self.projet.id, 'a_faire'])
+        self.assertTrue(entree['origine'].startswith('todolist/tests.py:'))
+        self.assertIn('in <lambda>', entree['origine'])
+        self.assertTrue(any('INDEX' in ligne for ligne in entree['plan']), entree['plan'])
+        self.assertIsNone(entree['vue'])
+
+    def test_vue_d_origine(self):
+        self.client.force_login(self.user)
+        url = reverse('projects:modifier', args=[self.projet.id])
+        entrees = self.journaliser(lambda: self.client.get(url))
+        self.assertTrue(entrees)
+        self.assertEqual({(e['vue'], e['methode'], e['chemin']) for e in entrees}, {('projects:modifier', 'GET', url)})
+        self.assertTrue(any(e['origine'] and e['origine'].startswith('projects/views.py:') for e in entrees))
+
+    def test_echantillon(self):
+        with mock.patch('todolist.requetes_lentes.REQUETES_LENTES_ECHANTILLON', 0):
+            with self.assertNoLogs('todolist.requetes_lentes.jsonl', 'INFO'):
+                Projet.objects.count()
+
+    def test_plafond_par_minute(self):
+        horloge = mock.Mock(return_value=1000.0)
+        with mock.patch('todolist.requetes_lentes.time.monotonic', horloge):
+            limiteur = requetes_lentes.Limiteur(2)
+            with mock.patch('todolist.requetes_lentes._limiteur', limiteur):
+                self.assertEqual(len(self.journaliser(lambda: [Projet.objects.count() for _ in range(5)])), 2)
+                # 30 secondes : un jeton de nouveau disponible
+                horloge.return_value += 30
+                entrees = self.journaliser(lambda: [Projet.objects.count() for _ in range(2)])
+        self.assertEqual([e['ecartees'] for e in entrees], [3])
+
+
+class ProfilageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.projet = Projet.objects.create(titre='Projet', proprietaire=cls.user)
+        Tache.objects.create(titre='Tâche', projet=cls.projet, cree_par=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.detail = reverse('projects:detail', args=[self.projet.id])
+
+    def personnel(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+
+    def test_reserve_au_personnel(self):
+        response = self.client.get(self.detail, {'_profile': '1'})
+        self.assertContains(response, 'Projet')
+        self.assertNotContains(response, 'Arbre d')
+
+    def test_html_vue_async(self):
+        self.personnel()
+        response = self.client.get(self.detail, {'_profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        contenu = response.content.decode()
+        self.assertIn('Vue projects:detail : réponse 200', contenu)
+        for categorie in ('vue', 'orm', 'templates', 'rbac', 'attente', 'dont processeur de contexte rbac'):
+            self.assertIn(f'<td>{categorie}</td>', contenu)
+        # ORM exécuté dans le thread de la requête, vue dans celui de la boucle
+        self.assertIn('detail_projet (projects/views.py', contenu)
+        self.assertIn('[orm]', contenu)
+
+    def test_piles_repliees(self):
+        self.personnel()
+        url = reverse('projects:modifier', args=[self.projet.id])
+        response = self.client.get(url, HTTP_X_PROFILE='collapsed')
+        lignes = response.content.decode().splitlines()
+        self.assertTrue(lignes)
+        self.assertTrue(all(re.fullmatch(r'[^ ].* \d+', ligne) for ligne in lignes), lignes[:3])
+        self.assertTrue(any(';modifier_projet (projects/views.py:' in ligne for ligne in lignes))
+        self.assertTrue(any(';render (django.py:' in ligne for ligne in lignes))
+
+    def test_fichier_prof(self):
+        self.personnel()
+        with tempfile.TemporaryDirectory() as repertoire:
+            with mock.patch('todolist.profilage.PROFILAGE_REPERTOIRE', repertoire):
+                response = self.client.get(self.detail, {'_profile': 'prof'})
+            enregistres = os.listdir(repertoire)
+            self.assertEqual(len(enregistres), 1)
+            self.assertIn(f'filename="{enregistres[0]}"', response['Content-Disposition'])
+            stats = pstats.Stats(os.path.join(repertoire, enregistres[0]))
+        self.assertEqual(stats.stats, marshal.loads(response.content))
+        self.assertTrue(any(nom == 'detail_projet' for _, _, nom in stats.stats))
+
+    def test_mode_async(self):
+        async def get_response(request):
+            return None
+
+        middleware = profilage.ProfilageMiddleware(get_response)
+        # Ni le middleware ni process_view ne sont adaptés par sync_to_async sous ASGI
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+        self.assertFalse(iscoroutinefunction(profilage.ProfilageMiddleware(lambda request: None).process_view))
+
+    async def test_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.detail, {'_profile': '1'})
+        self.assertNotContains(response, 'Arbre d')
+        await User.objects.filter(pk=self.user.pk).aupdate(is_staff=True)
+        response = await self.async_client.get(self.detail, {'_profile': 'collapsed'})
+        self.assertTrue(any('detail_projet (projects/views.py:' in ligne
+                            for ligne in response.content.decode().splitlines()))
+
+    def test_desactive(self):
+        with mock.patch('todolist.profilage.PROFILAGE_ACTIF', False):
+            with self.assertRaises(MiddlewareNotUsed):
+                profilage.ProfilageMiddleware(lambda request: None)
+
+    def test_repartition(self):
+        profil, response = profilage.executer_vue(
+            lambda request: Tache.objects.filter(projet=self.projet).count(), None, (), {}
+        )
+        propre, inclusif = profilage.repartition(profil.statistiques())
+        self.assertEqual(response, 1)
+        self.assertGreater(propre['orm'], 0)
+        self.assertGreater(inclusif['orm'], propre['orm'] / 2)
+        self.assertEqual(propre['templates'], 0)
+
+
+class NombreRequetesTests(TestCase):
+    """
+    Le nombre de requêtes SQL de chaque vue ne dépend pas du volume de
+    données : mesuré sur un petit jeu, puis après l'avoir agrandi, il doit
+    être identique. En cas d'écart, les requêtes répétées sont listées.
+    """
+
+    PETIT, GRAND = 2, 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            email='alice@example.com', password='motdepasse123',
+            first_name='Alice', last_name='Martin'
+        )
+        cls.taille = 0
+        cls.agrandir(cls.PETIT)
+        cls.projet = Projet.objects.filter(proprietaire=cls.user).order_by('pk').first()
+        cls.tache = Tache.objects.filter(projet=cls.projet).order_by('pk').first()
+        cls.role = Role.objects.order_by('pk').first()
+
+    @classmethod
+    def agrandir(cls, taille):
+        """
+        Ajoute `taille` utilisateurs ayant chacun un rôle (avec des
+        permissions), et `taille` projets de `taille` tâches chacun,
+        assignées à ces utilisateurs.
+        """
+        numero, cls.taille = cls.taille, cls.taille + taille
+        users = User.objects.bulk_create([
+            User(email=f'membre{numero + i}@exemple.test', first_name='Membre', last_name=str(numero + i))
+            for i in range(taille)
+        ])
+        permissions = list(Permission.objects.order_by('pk')[:taille])
+        for user in users:
+            role = Role.objects.create(name=f'role-{user.last_name}')
+            role.permissions.add(*permissions)
+            UserRole.objects.create(user=user, role=role, created_by=cls.user)
+        demain = timezone.now() + timedelta(days=1)
+        for i in range(taille):
+            projet = Projet.objects.create(titre=f'Projet {numero + i}', proprietaire=cls.user)
+            Tache.objects.bulk_create([
+                Tache(
+                    titre=f'Tâche {numero + i}.{j}', projet=projet, cree_par=cls.user, assigne_a=users[j],
+                    statut=Tache.StatutTache.values[j % 3], date_echeance=demain
+                )
+                for j in range(taille)
+            ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def mesurer(self, appel):
+        cache.clear()
+        with CaptureQueriesContext(connection) as requetes:
+            response = appel()
+        self.assertEqual(response.status_code, 200)
+        return [requete['sql'] for requete in requetes.captured_queries]
+
+    @staticmethod
+    def normaliser(sql):
+        # Valeurs remplacées par ?, colonnes sélectionnées omises
+        sql = re.sub(r"'(?:[^']|'')*'|\b\d+\b", '?', sql)
+        return re.sub(r'^SELECT .*? FROM ', 'SELECT … FROM ', sql)
+
+    def assertRequetesConstantes(self, appel):
+        # Préchauffage : caches du processus (types de contenu, templates)
+        appel()
+        petit = self.mesurer(appel)
+        self.agrandir(self.GRAND - self.PETIT)
+        grand = self.mesurer(appel)
+        if len(grand) == len(petit):
+            return
+        avant = Counter(map(self.normaliser, petit))
+        repetees = [
+            f'  {nombre}× (contre {avant[sql]}) {sql[:300]}'
+            for sql, nombre in Counter(map(self.normaliser, grand)).most_common()
+            if nombre > avant[sql]
+        ]
+        self.fail(
+            f'{len(petit)} requêtes sur le petit jeu de données, {len(grand)} sur le grand. '
+            'Requêtes répétées :\n' + '\n'.join(repetees)
+        )
+
+    def assertPageConstante(self, url):
+        self.assertRequetesConstantes(lambda: self.client.get(url))
+
+    # Vues HTML
+
+    def test_tableau_de_bord(self):
+        self.assertPageConstante(reverse('tableau_de_bord'))
+
+    def test_liste_taches(self):
+        self.assertPageConstante(reverse('tasks:liste'))
+
+    def test_liste_taches_filtree(self):
+        self.assertPageConstante(reverse('tasks:liste') + '?statut=en_cours')
+
+    def test_detail_tache(self):
+        self.assertPageConstante(reverse('tasks:detail', args=[self.tache.pk]))
+
+    def test_creer_tache(self):
+        self.assertPageConstante(reverse('tasks:creer'))
+
+    def test_modifier_tache(self):
+        self.assertPageConstante(reverse('tasks:modifier', args=[self.tache.pk]))
+
+    def test_recherche(self):
+        self.assertPageConstante(reverse('tasks:recherche') + '?q=Tâche')
+
+    def test_liste_projets(self):
+        self.assertPageConstante(reverse('projects:liste'))
+
+    def test_detail_projet(self):
+        self.assertPageConstante(reverse('projects:detail', args=[self.projet.pk]))
+
+    def test_modifier_projet(self):
+        self.assertPageConstante(reverse('projects:modifier', args=[self.projet.pk]))
+
+    # Listes de l'administration
+
+    def test_admin_taches(self):
+        self.assertPageConstante(reverse('admin:tasks_tache_changelist'))
+
+    def test_admin_projets(self):
+        self.assertPageConstante(reverse('admin:projects_projet_changelist'))
+
+    def test_admin_utilisateurs(self):
+        self.assertPageConstante(reverse(f'admin:{User._meta.app_label}_user_changelist'))
+
+    def test_admin_roles(self):
+        self.assertPageConstante(reverse('admin:rbac_role_changelist'))
+
+    def test_admin_roles_utilisateurs(self):
+        self.assertPageConstante(reverse('admin:rbac_userrole_changelist'))
+
+    def test_admin_groupes(self):
+        self.assertPageConstante(reverse('admin:auth_group_changelist'))
+
+    # Vues RBAC (non routées : appelées directement)
+
+    def appeler_vue_rbac(self, vue, **kwargs):
+        request = RequestFactory().get('/rbac/', {'q': 'role', 'search': 'role'})
+        request.user = User.objects.get(pk=self.user.pk)
+        return vue(request, **kwargs)
+
+    def test_rbac_liste_roles(self):
+        self.assertRequetesConstantes(lambda: self.appeler_vue_rbac(rbac_views.RoleListAPIView.as_view()))
+
+    def test_rbac_permissions_role(self):
+        self.assertRequetesConstantes(
+            lambda: self.appeler_vue_rbac(rbac_views.RolePermissionsAPIView.as_view(), pk=self.role.pk)
+        )
+
+    def test_rbac_autocompletion_roles(self):
+        self.assertRequetesConstantes(lambda: self.appeler_vue_rbac(rbac_views.role_autocomplete))
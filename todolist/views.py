@@ -1,5 +1,13 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
-from django.contrib.auth.decorators import login_required
+from django.utils.crypto import constant_time_compare
+from authapp.decorators import login_required
+from projects.models import Projet
+from tasks.dashboard import aget_indicateurs, filtre_taches_utilisateur
+from tasks.models import Tache
+from . import mesures, metriques as metriques_app
+from .cache import statistiques
 
 def accueil(request):
     """Vue pour la page d'accueil"""
@@ -7,6 +15,65 @@ def accueil(request):
         return redirect('tableau_de_bord')
     return render(request, 'accueil.html')
 
+@login_required
+async def tableau_de_bord(request):
+    """Tableau de bord : indicateurs (en cache par utilisateur), projets et tâches récents"""
+    user = request.user
+    
+    # Indicateurs : une requête agrégée, mise en cache par utilisateur
+    indicateurs = await aget_indicateurs(user)
+    
+    # Projets récents (limités à 3)
+    projets_recents = [
+        projet async for projet in Projet.objects.filter(
+            proprietaire=user
+        ).order_by('-date_creation')[:3]
+    ]
+    
+    # Tâches récentes (limitées à 5)
+    taches_recentes = [
+        tache async for tache in Tache.objects.filter(
+            filtre_taches_utilisateur(user)
+        ).select_related('projet').order_by('-date_creation')[:5]
+    ]
+    
+    return render(request, 'tableau_de_bord.html', {
+        'user': user,
+        'projets_actifs_count': indicateurs['projets_actifs'],
+        'taches_terminees_count': indicateurs['taches_terminees'],
+        'taches_en_attente_count': indicateurs['taches_en_retard'],
+        'projets_recents': projets_recents,
+        'taches_recentes': taches_recentes,
+    })
+
+@staff_member_required
+def statistiques_cache(request):
+    """Taux de succès du cache applicatif par espace de noms, pour ce processus"""
+    return JsonResponse({'espaces': statistiques()})
+
+@staff_member_required
+def mesures_requetes(request):
+    """Mesures des dernières requêtes HTTP de ce processus et synthèse par vue"""
+    try:
+        limite = max(int(request.GET.get('limite', 50)), 1)
+    except ValueError:
+        limite = 50
+    return JsonResponse({
+        'actives': mesures.MESURES_ACTIVES,
+        'vues': mesures.synthese(),
+        'mesures': mesures.mesures_recentes(limite),
+    })
+
+def metriques(request):
+    """Métriques au format d'exposition Prometheus (jeton Bearer, ou personnel connecté sans jeton)"""
+    jeton = metriques_app.METRIQUES_JETON
+    if jeton:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {jeton}'):
+            return HttpResponse(status=401)
+    elif not metriques_app.METRIQUES_PUBLIQUES and not request.user.is_staff:
+        return HttpResponse(status=403)
+    return HttpResponse(metriques_app.exposition(), content_type=metriques_app.TYPE_CONTENU)
+
 def test_tailwind(request):
     """Vue de test pour Tailwind CSS"""
     return render(request, 'test.html')